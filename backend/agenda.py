@@ -0,0 +1,268 @@
+"""Availability of the agenda.
+
+An agendamento occupies ``[data_hora, data_hora + Servico.duracao_minutos)``.
+The salon serves AGENDA_CAPACIDADE clientes at the same time (chairs), so a
+booking is refused when, at some instant of its interval, the busy intervals
+already reach the capacity. Cancelled agendamentos free their time.
+
+Busy intervals come from one query on idx_agendamento_tenant_data
+(tenant_id, data_hora): agendamentos starting before the end of the range and
+no earlier than its beginning minus the longest servico of the tenant, the
+only ones that can reach into it.
+
+Concurrent bookings of a tenant are serialized by bumping its "agendamentos"
+counter (catalogo_versoes, see versoes.py) before the check: the row lock
+holds the second writer until the first one commits, so two requests cannot
+both pass the check for the same slot.
+
+A series of agendamentos (``expandir_recorrencia`` or an explicit list) is
+checked by ``ocorrencias_livres`` against one query spanning the whole series,
+each accepted occurrence counting against the following ones.
+
+Times are stored in UTC. A datetime without offset is a wall-clock time of
+the salon (AGENDA_TIMEZONE), which also places the opening hours of the days
+searched by ``horarios_livres`` and the days of ``calendario``.
+"""
+import os
+from bisect import bisect_left
+from calendar import monthrange
+from datetime import date, datetime, time, timedelta, timezone
+from typing import List, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from database import Agendamento, Cliente, Servico, em_utc
+from versoes import incrementar_versao
+
+AGENDA_TIMEZONE = ZoneInfo(os.environ.get('AGENDA_TIMEZONE', 'America/Sao_Paulo'))
+AGENDA_CAPACIDADE = int(os.environ.get('AGENDA_CAPACIDADE', '1'))  # simultaneous agendamentos
+AGENDA_ABERTURA = time.fromisoformat(os.environ.get('AGENDA_ABERTURA', '08:00'))
+AGENDA_FECHAMENTO = time.fromisoformat(os.environ.get('AGENDA_FECHAMENTO', '20:00'))
+AGENDA_INTERVALO_MINUTOS = int(os.environ.get('AGENDA_INTERVALO_MINUTOS', '15'))  # between offered start times
+AGENDA_MAX_DIAS = 31  # days per availability query
+CALENDARIO_MAX_DIAS = 42  # days per calendar query (a six week month view)
+AGENDA_MAX_OCORRENCIAS = 100  # agendamentos per series
+FREQUENCIAS = ("semanal", "quinzenal", "mensal")
+STATUS_LIVRES = ("cancelado",)
+
+Intervalo = Tuple[datetime, datetime]
+
+
+def para_utc(valor: datetime) -> datetime:
+    """``valor`` in UTC; without an offset it is a wall-clock time in AGENDA_TIMEZONE."""
+    if valor.tzinfo is None:
+        valor = valor.replace(tzinfo=AGENDA_TIMEZONE)
+    return valor.astimezone(timezone.utc)
+
+
+def periodo_utc(data_inicio: date, data_fim: date) -> Tuple[datetime, datetime]:
+    """``[start of data_inicio, start of the day after data_fim)`` of the salon, in UTC."""
+    return (para_utc(datetime.combine(data_inicio, time.min)),
+            para_utc(datetime.combine(data_fim + timedelta(days=1), time.min)))
+
+
+def ocupa_agenda(status: Optional[str]) -> bool:
+    return status not in STATUS_LIVRES
+
+
+def reservar_agenda(db: Session, tenant_id):
+    """Serialize the bookings of the tenant until the caller's transaction ends."""
+    incrementar_versao(db, tenant_id, "agendamentos")
+
+
+def duracao_servico(db: Session, tenant_id, servico_id) -> Optional[int]:
+    """Minutes of the servico, None when it does not exist in the tenant."""
+    row = db.query(Servico.duracao_minutos).filter(Servico.id == servico_id, Servico.tenant_id == tenant_id).first()
+    return None if row is None else (row.duracao_minutos or 0)
+
+
+def intervalos_ocupados(db: Session, tenant_id, inicio: datetime, fim: datetime,
+                        ignorar_id=None) -> List[Intervalo]:
+    """Busy intervals reaching into ``[inicio, fim)``, sorted by start."""
+    maior_duracao = db.query(func.max(Servico.duracao_minutos)).filter(Servico.tenant_id == tenant_id).scalar() or 0
+    query = (
+        db.query(Agendamento.data_hora, Servico.duracao_minutos)
+        .join(Servico, Servico.id == Agendamento.servico_id)
+        .filter(
+            Agendamento.tenant_id == tenant_id,
+            Agendamento.data_hora >= inicio - timedelta(minutes=maior_duracao),
+            Agendamento.data_hora < fim,
+            or_(Agendamento.status.is_(None), Agendamento.status.notin_(STATUS_LIVRES)),
+        )
+    )
+    if ignorar_id is not None:
+        query = query.filter(Agendamento.id != ignorar_id)
+
+    intervalos = []
+    for data_hora, duracao in query:
+        comeco = em_utc(data_hora)
+        termino = comeco + timedelta(minutes=duracao or 0)
+        if termino > inicio:
+            intervalos.append((comeco, termino))
+    intervalos.sort()
+    return intervalos
+
+
+def ocupacao_maxima(intervalos: Sequence[Intervalo], inicio: datetime, fim: datetime) -> int:
+    """Largest number of ``intervalos`` overlapping at one instant of ``[inicio, fim)``."""
+    eventos = []
+    for comeco, termino in intervalos:
+        if comeco < fim and termino > inicio:
+            eventos.append((max(comeco, inicio), 1))
+            eventos.append((min(termino, fim), -1))
+    # At the same instant ends come first: back-to-back agendamentos do not overlap
+    eventos.sort(key=lambda evento: (evento[0], evento[1]))
+    ocupacao = maxima = 0
+    for _, delta in eventos:
+        ocupacao += delta
+        maxima = max(maxima, ocupacao)
+    return maxima
+
+
+def horario_ocupado(db: Session, tenant_id, inicio: datetime, duracao_minutos: int,
+                    ignorar_id=None, capacidade: int = AGENDA_CAPACIDADE) -> bool:
+    """Whether a booking of ``duracao_minutos`` at ``inicio`` would exceed the capacity.
+
+    Call after ``reservar_agenda`` and insert in the same transaction.
+    """
+    fim = inicio + timedelta(minutes=duracao_minutos)
+    intervalos = intervalos_ocupados(db, tenant_id, inicio, fim, ignorar_id)
+    return ocupacao_maxima(intervalos, inicio, fim) >= capacidade
+
+
+def _somar_meses(valor: datetime, meses: int) -> datetime:
+    # The 31st of a shorter month falls on its last day
+    mes = valor.month - 1 + meses
+    ano, mes = valor.year + mes // 12, mes % 12 + 1
+    return valor.replace(year=ano, month=mes, day=min(valor.day, monthrange(ano, mes)[1]))
+
+
+def expandir_recorrencia(inicio: datetime, frequencia: str, quantidade: Optional[int] = None,
+                         ate: Optional[date] = None, limite: int = AGENDA_MAX_OCORRENCIAS) -> List[datetime]:
+    """Start times (UTC) of a series, stopping after ``quantidade`` occurrences or
+    the last one on or before ``ate`` (salon date), at most ``limite + 1``.
+
+    Occurrences keep the wall-clock time of the first one in AGENDA_TIMEZONE,
+    across daylight saving changes; a monthly series repeats the day of month.
+    """
+    if frequencia not in FREQUENCIAS:
+        raise ValueError(f"frequencia must be one of: {', '.join(FREQUENCIAS)}")
+    if quantidade is None and ate is None:
+        raise ValueError("quantidade or ate is required")
+    primeiro = para_utc(inicio).astimezone(AGENDA_TIMEZONE).replace(tzinfo=None)
+    ocorrencias = []
+    # One past the limit, so callers can tell a series that is too long
+    while len(ocorrencias) <= limite and (quantidade is None or len(ocorrencias) < quantidade):
+        n = len(ocorrencias)
+        if frequencia == "mensal":
+            local = _somar_meses(primeiro, n)
+        else:
+            local = primeiro + timedelta(days=n * (7 if frequencia == "semanal" else 14))
+        if ate is not None and local.date() > ate:
+            break
+        ocorrencias.append(para_utc(local))
+    return ocorrencias
+
+
+def ocorrencias_livres(db: Session, tenant_id, inicios: Sequence[datetime], duracao_minutos: int,
+                       capacidade: int = AGENDA_CAPACIDADE) -> List[bool]:
+    """Whether each start of a series fits the agenda, in the given order.
+
+    One ``intervalos_ocupados`` query covers the span of the series; every
+    accepted occurrence is added to the busy intervals, so the series cannot
+    overlap itself. Call after ``reservar_agenda`` and insert the accepted ones
+    in the same transaction.
+    """
+    if not inicios:
+        return []
+    duracao = timedelta(minutes=duracao_minutos)
+    intervalos = intervalos_ocupados(db, tenant_id, min(inicios), max(inicios) + duracao)
+    comecos = [comeco for comeco, _ in intervalos]
+    maior = max([termino - comeco for comeco, termino in intervalos] + [duracao])
+
+    livres = []
+    for inicio in inicios:
+        fim = inicio + duracao
+        vizinhos = intervalos[bisect_left(comecos, inicio - maior):bisect_left(comecos, fim)]
+        livre = ocupacao_maxima(vizinhos, inicio, fim) < capacidade
+        if livre:
+            posicao = bisect_left(comecos, inicio)
+            comecos.insert(posicao, inicio)
+            intervalos.insert(posicao, (inicio, fim))
+        livres.append(livre)
+    return livres
+
+
+def horarios_livres(db: Session, tenant_id, duracao_minutos: int, data_inicio: date, data_fim: date,
+                    abertura: time = AGENDA_ABERTURA, fechamento: time = AGENDA_FECHAMENTO,
+                    intervalo_minutos: int = AGENDA_INTERVALO_MINUTOS, capacidade: int = AGENDA_CAPACIDADE,
+                    agora: Optional[datetime] = None) -> List[Tuple[date, List[datetime]]]:
+    """Free start times (UTC) of a ``duracao_minutos`` servico for each day of the range.
+
+    Starts are offered every ``intervalo_minutos`` from ``abertura`` while the
+    servico still ends by ``fechamento`` (salon time); past times are skipped.
+    """
+    agora = agora or datetime.now(timezone.utc)
+    duracao = timedelta(minutes=duracao_minutos)
+    passo = timedelta(minutes=intervalo_minutos)
+    comeco_periodo = para_utc(datetime.combine(data_inicio, abertura))
+    fim_periodo = para_utc(datetime.combine(data_fim, fechamento))
+    intervalos = intervalos_ocupados(db, tenant_id, comeco_periodo, fim_periodo) if fim_periodo > comeco_periodo else []
+    comecos = [comeco for comeco, _ in intervalos]
+    maior = max((termino - comeco for comeco, termino in intervalos), default=timedelta(0))
+
+    dias = []
+    dia = data_inicio
+    while dia <= data_fim:
+        horarios = []
+        candidato = datetime.combine(dia, abertura, tzinfo=AGENDA_TIMEZONE)
+        ultimo = datetime.combine(dia, fechamento, tzinfo=AGENDA_TIMEZONE) - duracao
+        while candidato <= ultimo:
+            inicio = candidato.astimezone(timezone.utc)
+            fim = inicio + duracao
+            if inicio >= agora:
+                # Only intervals starting in [inicio - maior, fim) can overlap the candidate
+                vizinhos = intervalos[bisect_left(comecos, inicio - maior):bisect_left(comecos, fim)]
+                if ocupacao_maxima(vizinhos, inicio, fim) < capacidade:
+                    horarios.append(inicio)
+            candidato += passo
+        dias.append((dia, horarios))
+        dia += timedelta(days=1)
+    return dias
+
+
+def calendario(db: Session, tenant_id, data_inicio: date, data_fim: date,
+               status: Optional[str] = None) -> List[Tuple[date, List]]:
+    """Agendamentos of each salon day of the range, with cliente and servico names.
+
+    One query on idx_agendamento_tenant_data, joined by primary key to clientes
+    and servicos, so its cost follows the agendamentos of the range and not the
+    tenant's history. Every day of the range is returned, empty or not.
+    """
+    inicio, fim = periodo_utc(data_inicio, data_fim)
+    query = (
+        db.query(
+            Agendamento.id, Agendamento.data_hora, Agendamento.status, Agendamento.observacoes,
+            Agendamento.cliente_id, Cliente.nome.label("cliente_nome"),
+            Agendamento.servico_id, Servico.nome.label("servico_nome"),
+            Servico.preco.label("servico_preco"), Servico.duracao_minutos,
+        )
+        .outerjoin(Cliente, Cliente.id == Agendamento.cliente_id)
+        .outerjoin(Servico, Servico.id == Agendamento.servico_id)
+        .filter(Agendamento.tenant_id == tenant_id, Agendamento.data_hora >= inicio, Agendamento.data_hora < fim)
+        .order_by(Agendamento.data_hora, Agendamento.id)
+    )
+    if status:
+        query = query.filter(Agendamento.status == status)
+
+    por_dia = {}
+    for row in query:
+        por_dia.setdefault(em_utc(row.data_hora).astimezone(AGENDA_TIMEZONE).date(), []).append(row)
+    dias = []
+    dia = data_inicio
+    while dia <= data_fim:
+        dias.append((dia, por_dia.get(dia, [])))
+        dia += timedelta(days=1)
+    return dias
@@ -0,0 +1,148 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional
+
+# In-process revocation/version table for access tokens.
+#
+# Tokens carry the user id, tenant id, role and the user's token_version, so
+# authorization is decided from the claims. The only server-side state a
+# request needs is whether the token was revoked: this table maps each user id
+# to its current token_version and the user/tenant active flags. It is filled
+# lazily from the database, updated by the routes that change a user or tenant
+# status, and expires after a TTL so other worker processes (which keep their
+# own table) converge within PRINCIPAL_CACHE_TTL seconds.
+
+PRINCIPAL_CACHE_TTL = float(os.environ.get('PRINCIPAL_CACHE_TTL', '60'))  # seconds
+PRINCIPAL_CACHE_SIZE = int(os.environ.get('PRINCIPAL_CACHE_SIZE', '10000'))
+
+
+@dataclass(frozen=True)
+class CurrentUser:
+    id: Any
+    email: str
+    name: str
+    role: str
+    tenant_id: Any
+    is_active: bool
+
+
+@dataclass(frozen=True)
+class TenantSnapshot:
+    id: Any
+    is_active: bool
+
+
+@dataclass(frozen=True)
+class Principal:
+    user: CurrentUser
+    tenant: Optional[TenantSnapshot]
+
+
+@dataclass(frozen=True)
+class TokenState:
+    token_version: int
+    is_active: bool
+    tenant_id: Any
+    tenant_active: bool
+
+
+def token_claims(user) -> Dict[str, Any]:
+    """JWT claims identifying ``user``; see principal_from_claims."""
+    return {
+        "sub": str(user.id),
+        "email": user.email,
+        "name": user.name,
+        "role": user.role,
+        "tid": str(user.tenant_id) if user.tenant_id else None,
+        "ver": user.token_version or 0,
+    }
+
+
+def principal_from_claims(claims: Dict[str, Any], state: TokenState) -> Principal:
+    user = CurrentUser(
+        id=claims["sub"],
+        email=claims["email"],
+        name=claims["name"],
+        role=claims["role"],
+        tenant_id=claims.get("tid"),
+        is_active=state.is_active,
+    )
+    tenant = TenantSnapshot(id=user.tenant_id, is_active=state.tenant_active) if user.tenant_id else None
+    return Principal(user=user, tenant=tenant)
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            if self._data.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def invalidate_where(self, predicate: Callable[[Any], bool]):
+        """Drop every entry whose value matches ``predicate`` (O(n), for rare admin writes)."""
+        with self._lock:
+            stale = [key for key, (_, value) in self._data.items() if predicate(value)]
+            for key in stale:
+                del self._data[key]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": (self.hits / total) if total else 0.0,
+            }
+
+
+principal_cache = TTLCache(PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL)
+
+
+def invalidate_user(user_id):
+    principal_cache.invalidate(str(user_id))
+
+
+def invalidate_tenant(tenant_id):
+    tenant_id = str(tenant_id)
+    principal_cache.invalidate_where(lambda state: str(state.tenant_id) == tenant_id)
@@ -0,0 +1,140 @@
+"""Micro-benchmark of the list serialization paths for 10k produtos and vendas.
+
+Compares the previous path (ORM entities -> response models -> FastAPI
+validation of response_model -> json.dumps) with the fast path used by the
+list routes (column tuples -> dicts -> orjson, see serializacao.py). Runs
+against a throwaway SQLite database unless BENCH_DATABASE_URL is set:
+
+    python bench_listas.py [--rows 10000] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+os.environ["DATABASE_URL"] = os.environ.get("BENCH_DATABASE_URL") or f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+os.environ.setdefault("OUTBOX_WORKER_ENABLED", "false")
+os.environ.setdefault("VENCIMENTO_SWEEP_ENABLED", "false")
+
+from pydantic import TypeAdapter
+from sqlalchemy import insert
+
+from database import Produto, SessionLocal, Tenant, User, Venda, VendaItem
+from serializacao import FastJSONResponse, colunas, registros
+from server import PRODUTO_CAMPOS, VENDA_CAMPOS, ItemVenda, ProdutoResponse, VendaResponse, get_itens_por_venda
+
+
+def seed(db, rows: int):
+    tenant = Tenant(subdomain=f"bench{uuid.uuid4().hex[:8]}", company_name="Bench")
+    db.add(tenant)
+    db.flush()
+    vendedor = User(email=f"vendedor@{tenant.subdomain}.com", name="Vendedor", hashed_password="x", role="admin_empresa", tenant_id=tenant.id)
+    db.add(vendedor)
+    db.flush()
+    agora = datetime.now(timezone.utc)
+    produtos = [{"id": str(uuid.uuid4()), "codigo": f"P{i:06d}", "nome": f"Produto {i}", "categoria": f"cat{i % 10}",
+                 "custo": 5.0, "preco": 10.0, "estoque_atual": i % 50, "estoque_minimo": 5,
+                 "tenant_id": tenant.id, "created_at": agora - timedelta(seconds=i)} for i in range(rows)]
+    vendas, itens = [], []
+    for i in range(rows):
+        venda_id = str(uuid.uuid4())
+        vendas.append({"id": venda_id, "cliente_nome": f"Cliente {i}", "itens": "[]", "subtotal": 20.0, "desconto_total": 0.0,
+                       "total": 20.0, "forma_pagamento": "pix", "emitir_nota": False, "tenant_id": tenant.id, "vendedor_id": vendedor.id,
+                       "created_at": agora - timedelta(seconds=i)})
+        for posicao in range(2):
+            produto = produtos[(i + posicao) % rows]
+            itens.append({"id": str(uuid.uuid4()), "venda_id": venda_id, "posicao": posicao, "tipo": "produto",
+                          "item_id": produto["id"], "nome": produto["nome"], "quantidade": 1.0, "preco_unitario": 10.0,
+                          "desconto": 0.0, "total": 10.0, "tenant_id": tenant.id})
+    for model, linhas in ((Produto, produtos), (Venda, vendas), (VendaItem, itens)):
+        db.execute(insert(model), linhas)
+    db.commit()
+    return tenant.id
+
+
+def response_model_body(model, objetos) -> bytes:
+    # What FastAPI did with a returned list: validate against response_model, dump, json.dumps
+    adapter = TypeAdapter(List[model])
+    conteudo = adapter.dump_python(adapter.validate_python(objetos, from_attributes=True), mode="json")
+    return json.dumps(conteudo, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def produtos_pydantic(db, tenant_id) -> bytes:
+    produtos = db.query(Produto).filter(Produto.tenant_id == tenant_id).order_by(Produto.created_at.desc(), Produto.id.desc()).all()
+    return response_model_body(ProdutoResponse, [ProdutoResponse(
+        id=str(produto.id), codigo=produto.codigo, nome=produto.nome, descricao=produto.descricao,
+        categoria=produto.categoria, ncm=produto.ncm, custo=produto.custo, preco=produto.preco,
+        estoque_atual=produto.estoque_atual, estoque_minimo=produto.estoque_minimo, created_at=produto.created_at,
+    ) for produto in produtos])
+
+
+def produtos_orjson(db, tenant_id) -> bytes:
+    produtos = (db.query(*colunas(Produto, PRODUTO_CAMPOS)).filter(Produto.tenant_id == tenant_id)
+                .order_by(Produto.created_at.desc(), Produto.id.desc()).all())
+    return FastJSONResponse(registros(produtos, PRODUTO_CAMPOS)).body
+
+
+def vendas_pydantic(db, tenant_id) -> bytes:
+    vendas = db.query(Venda).filter(Venda.tenant_id == tenant_id).order_by(Venda.created_at.desc(), Venda.id.desc()).all()
+    itens_por_venda = {}
+    for item in (db.query(VendaItem).filter(VendaItem.venda_id.in_([venda.id for venda in vendas]))
+                 .order_by(VendaItem.venda_id, VendaItem.posicao)):
+        itens_por_venda.setdefault(item.venda_id, []).append(ItemVenda(
+            tipo=item.tipo, item_id=item.item_id, nome=item.nome, quantidade=item.quantidade,
+            preco_unitario=item.preco_unitario, desconto=item.desconto or 0.0, total=item.total,
+        ))
+    return response_model_body(VendaResponse, [VendaResponse(
+        id=str(venda.id), cliente_id=str(venda.cliente_id) if venda.cliente_id else None, cliente_nome=venda.cliente_nome,
+        itens=itens_por_venda.get(venda.id, []), subtotal=venda.subtotal, desconto_total=venda.desconto_total,
+        total=venda.total, forma_pagamento=venda.forma_pagamento, emitir_nota=venda.emitir_nota,
+        status_nota=venda.status_nota, created_at=venda.created_at,
+    ) for venda in vendas])
+
+
+def vendas_orjson(db, tenant_id) -> bytes:
+    vendas = (db.query(*colunas(Venda, VENDA_CAMPOS)).filter(Venda.tenant_id == tenant_id)
+              .order_by(Venda.created_at.desc(), Venda.id.desc()).all())
+    itens_por_venda = get_itens_por_venda(db, [venda.id for venda in vendas])
+    result = registros(vendas, VENDA_CAMPOS)
+    for venda in result:
+        venda["itens"] = itens_por_venda.get(venda["id"], [])
+    return FastJSONResponse(result).body
+
+
+def medir(fn, db, tenant_id, repeat: int) -> float:
+    tempos = []
+    for _ in range(repeat):
+        db.expunge_all()
+        inicio = time.perf_counter()
+        fn(db, tenant_id)
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        tenant_id = seed(db, args.rows)
+        for recurso, lento, rapido in (("produtos", produtos_pydantic, produtos_orjson), ("vendas", vendas_pydantic, vendas_orjson)):
+            if json.loads(lento(db, tenant_id)) != json.loads(rapido(db, tenant_id)):
+                sys.exit(f"{recurso}: the two paths produced different JSON")
+            antes = medir(lento, db, tenant_id, args.repeat)
+            depois = medir(rapido, db, tenant_id, args.repeat)
+            print(f"{recurso:<9} {args.rows} rows  pydantic {antes * 1000:8.1f} ms  orjson {depois * 1000:8.1f} ms  x{antes / depois:.1f}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Autocomplete search over the clientes of a tenant.
+
+The query is split into normalized terms (normalizacao.termos_busca) and
+matched against ``Cliente.busca``; every term has to match. The lookup goes
+through the index created by migration 0007:
+
+- SQLite: FTS5 prefix query (``"ana"* AND "silva"*``) restricted to the
+  tenant's token. bm25 would score every match before the limit applies (tens
+  of ms for a two letter prefix over 100k clientes), so up to
+  BUSCA_CANDIDATOS matches are read straight from the index and ranked here
+  with ``pontuar``, which favours the nome over email/telefone/documento.
+  The index returns matches in rowid order, so the candidates are read in
+  passes, best first: a term is the first word of the nome, a term starts
+  the nome, then any match.
+- PostgreSQL: substring match served by the pg_trgm GIN index, or a fuzzy
+  word similarity for typos ("marai" -> "maria"), ranked by similarity.
+- Other databases: substring match without ranking.
+
+Ties are broken by nome, and at most ``limite`` rows come back.
+"""
+import os
+import re
+from typing import List, Optional, Sequence
+
+from sqlalchemy import and_, case, func, or_, text
+from sqlalchemy.orm import Session
+
+from database import Cliente
+from normalizacao import termos_busca
+
+BUSCA_LIMITE_PADRAO = 10
+BUSCA_LIMITE_MAX = 50
+# Matches read from the SQLite FTS index before ranking
+BUSCA_CANDIDATOS = int(os.environ.get('BUSCA_CANDIDATOS', '200'))
+
+_PALAVRAS = re.compile(r"[^\W_]+")
+
+# Candidate passes over the FTS index (see consulta_fts)
+INICIO_PALAVRA = "^{}"
+INICIO_PREFIXO = "^{}*"
+_PASSAGENS = (INICIO_PALAVRA, INICIO_PREFIXO, None)
+
+_CANDIDATOS_FTS = text(
+    "SELECT cliente_id, nome, busca FROM clientes_fts WHERE clientes_fts MATCH :consulta LIMIT :candidatos"
+)
+
+
+def _frase(valor) -> str:
+    return '"' + str(valor).replace('"', '""') + '"'
+
+
+def token_tenant(tenant_id) -> str:
+    """The tenant id as indexed in clientes_fts.tenant (hyphens dropped: one token)."""
+    return str(tenant_id).replace("-", "")
+
+
+def consulta_fts(tenant_id, termos: Sequence[str], inicio: Optional[str] = None) -> str:
+    """FTS5 MATCH expression: every term as a prefix, only the tenant's rows.
+    With ``inicio`` (INICIO_PALAVRA or INICIO_PREFIXO) busca must also start
+    with one of the terms."""
+    prefixos = " AND ".join(f"{_frase(termo)}*" for termo in termos)
+    consulta = f"tenant : {token_tenant(tenant_id)} AND busca : ({prefixos})"
+    if inicio:
+        consulta += " AND busca : (" + " OR ".join(inicio.format(_frase(termo)) for termo in termos) + ")"
+    return consulta
+
+
+def pontuar(termos: Sequence[str], busca: str, palavras_nome: int) -> int:
+    """Relevance of a matching cliente: per term, a whole word of the nome
+    beats a word of the nome it starts, which beats the other fields; the
+    first word of the nome counts double. ``busca`` starts with the
+    ``palavras_nome`` words of the normalized nome."""
+    palavras = busca.split()
+    pontos = 0
+    for termo in termos:
+        melhor = 0
+        for posicao, palavra in enumerate(palavras):
+            if not palavra.startswith(termo):
+                continue
+            if posicao >= palavras_nome:
+                melhor = max(melhor, 1)
+                continue
+            valor = 4 if palavra == termo else 3
+            melhor = max(melhor, valor * 2 if posicao == 0 else valor)
+        pontos += melhor
+    return pontos
+
+
+def _candidatos_sqlite(db: Session, tenant_id, termos: Sequence[str]) -> List:
+    """Up to BUSCA_CANDIDATOS matches (cliente_id, nome, busca), best passes first."""
+    candidatos = {}
+    for inicio in _PASSAGENS:
+        if len(candidatos) >= BUSCA_CANDIDATOS:
+            break
+        rows = db.execute(_CANDIDATOS_FTS, {
+            "consulta": consulta_fts(tenant_id, termos, inicio), "candidatos": BUSCA_CANDIDATOS,
+        })
+        for row in rows:
+            candidatos.setdefault(row.cliente_id, row)
+    return list(candidatos.values())[:BUSCA_CANDIDATOS]
+
+
+def _buscar_sqlite(db: Session, tenant_id, termos: Sequence[str], limite: int, campos: Sequence) -> List:
+    candidatos = _candidatos_sqlite(db, tenant_id, termos)
+    # busca begins with the normalized nome, so it also orders the ties by nome
+    candidatos.sort(key=lambda row: (-pontuar(termos, row.busca, len(_PALAVRAS.findall(row.nome))), row.busca, row.cliente_id))
+    ids = [row.cliente_id for row in candidatos[:limite]]
+    if not ids:
+        return []
+    # By primary key only: the ids already matched the tenant's token, and a
+    # tenant_id filter would let the planner walk the whole tenant index
+    ordem = case({cliente_id: posicao for posicao, cliente_id in enumerate(ids)}, value=Cliente.id)
+    return db.query(*campos).filter(Cliente.id.in_(ids)).order_by(ordem).all()
+
+
+def buscar_clientes(db: Session, tenant_id, q: str, limite: int, campos: Sequence) -> List:
+    """Rows of ``campos`` (column attributes of Cliente) best matching ``q``."""
+    termos = termos_busca(q)
+    if not termos:
+        return []
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        return _buscar_sqlite(db, tenant_id, termos, limite, campos)
+
+    query = db.query(*campos).filter(Cliente.tenant_id == tenant_id)
+    correspondem = and_(*[Cliente.busca.contains(termo, autoescape=True) for termo in termos])
+    if dialect == "postgresql":
+        frase = " ".join(termos)
+        query = (
+            query.filter(or_(correspondem, Cliente.busca.op("%>")(frase)))
+            .order_by(func.word_similarity(frase, Cliente.busca).desc(), Cliente.nome)
+        )
+    else:
+        query = query.filter(correspondem).order_by(Cliente.nome)
+    return query.limit(limite).all()
@@ -0,0 +1,161 @@
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from agenda import AGENDA_TIMEZONE, periodo_utc
+from database import Agendamento, Produto, ProdutoDiario, VendaDiaria
+
+# Tenant dashboard engine: every metric is a single aggregate query, so the
+# cost depends on the number of buckets returned, never on the number of
+# sales loaded into Python. Revenue figures read the vendas_diarias rollup,
+# cost and product figures the produtos_diarios rollup (see rollups.py), both
+# through their (tenant_id, dia, ...) index.
+
+BUCKETS = ("dia", "semana", "mes")
+AGRUPAMENTOS_RELATORIO = ("forma_pagamento", "vendedor_id")
+DEFAULT_PERIOD_DAYS = 30
+TOP_PRODUTOS_LIMIT = 5
+
+
+def bucket_expression(db: Session, column, bucket: str):
+    """SQL expression that truncates ``column`` to the start of its bucket (as a date)."""
+    if db.bind.dialect.name == "postgresql":
+        unit = {"dia": "day", "semana": "week", "mes": "month"}[bucket]
+        return func.to_char(func.date_trunc(unit, column), "YYYY-MM-DD")
+    if bucket == "semana":
+        # Monday of the week, like date_trunc('week') on PostgreSQL
+        return func.date(column, "weekday 0", "-6 days")
+    if bucket == "mes":
+        return func.strftime("%Y-%m-01", column)
+    return func.date(column)
+
+
+def resumo_vendas(db: Session, tenant_id, inicio: Optional[date], fim: Optional[date]) -> Dict[str, float]:
+    """Revenue and number of sales between ``inicio`` and ``fim`` (inclusive days)."""
+    query = db.query(
+        func.coalesce(func.sum(VendaDiaria.total_bruto - VendaDiaria.desconto), 0.0),
+        func.coalesce(func.sum(VendaDiaria.quantidade), 0),
+    ).filter(VendaDiaria.tenant_id == tenant_id)
+    query = _filtrar_dias(query, inicio, fim)
+    total, quantidade = query.one()
+    return {"total": float(total), "quantidade": int(quantidade)}
+
+
+def custo_vendas(db: Session, tenant_id, inicio: Optional[date], fim: Optional[date]) -> float:
+    """Cost of the products sold in the period (quantity x Produto.custo at sale time)."""
+    query = db.query(func.coalesce(func.sum(ProdutoDiario.custo), 0.0)).filter(ProdutoDiario.tenant_id == tenant_id)
+    return float(_filtrar_dias(query, inicio, fim, ProdutoDiario.dia).scalar() or 0.0)
+
+
+def serie_vendas(db: Session, tenant_id, inicio: date, fim: date, bucket: str,
+                 agrupar_por: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Sales per bucket, optionally split by ``forma_pagamento`` or ``vendedor_id``."""
+    bucket_col = bucket_expression(db, VendaDiaria.dia, bucket)
+    colunas = [bucket_col.label("data")]
+    if agrupar_por:
+        colunas.append(getattr(VendaDiaria, agrupar_por))
+    query = (
+        db.query(
+            *colunas,
+            func.sum(VendaDiaria.total_bruto),
+            func.sum(VendaDiaria.desconto),
+            func.sum(VendaDiaria.quantidade),
+        )
+        .filter(VendaDiaria.tenant_id == tenant_id)
+    )
+    rows = _filtrar_dias(query, inicio, fim).group_by(*colunas).order_by(*colunas).all()
+
+    serie = []
+    for row in rows:
+        bruto, desconto, quantidade = row[-3:]
+        ponto = {
+            "data": str(row[0]),
+            "valor": float((bruto or 0) - (desconto or 0)),
+            "bruto": float(bruto or 0),
+            "desconto": float(desconto or 0),
+            "quantidade": int(quantidade or 0),
+        }
+        if agrupar_por:
+            ponto[agrupar_por] = str(row[1])
+        serie.append(ponto)
+    return serie
+
+
+def top_produtos(db: Session, tenant_id, inicio: Optional[date], fim: Optional[date],
+                 limite: int = TOP_PRODUTOS_LIMIT) -> List[Dict[str, Any]]:
+    vendas = func.sum(ProdutoDiario.quantidade).label("vendas")
+    query = (
+        db.query(ProdutoDiario.produto_id, func.max(ProdutoDiario.nome), vendas, func.sum(ProdutoDiario.total))
+        .filter(ProdutoDiario.tenant_id == tenant_id)
+    )
+    rows = (
+        _filtrar_dias(query, inicio, fim, ProdutoDiario.dia)
+        .group_by(ProdutoDiario.produto_id)
+        .order_by(vendas.desc(), ProdutoDiario.produto_id)
+        .limit(limite)
+    )
+    return [
+        {"item_id": item_id, "nome": nome, "vendas": float(quantidade or 0), "valor": float(valor or 0)}
+        for item_id, nome, quantidade, valor in rows
+    ]
+
+
+def itens_estoque(db: Session, tenant_id) -> int:
+    return int(
+        db.query(func.coalesce(func.sum(Produto.estoque_atual), 0))
+        .filter(Produto.tenant_id == tenant_id)
+        .scalar()
+    )
+
+
+def agendamentos_hoje(db: Session, tenant_id) -> int:
+    """Agendamentos of the current salon day (AGENDA_TIMEZONE)."""
+    hoje = datetime.now(AGENDA_TIMEZONE).date()
+    inicio, fim = periodo_utc(hoje, hoje)
+    return (
+        db.query(func.count(Agendamento.id))
+        .filter(
+            Agendamento.tenant_id == tenant_id,
+            Agendamento.data_hora >= inicio,
+            Agendamento.data_hora < fim,
+            Agendamento.status != "cancelado",
+        )
+        .scalar()
+    )
+
+
+def calcular_dashboard(db: Session, tenant_id, inicio: Optional[date] = None,
+                       fim: Optional[date] = None, bucket: str = "dia") -> Dict[str, Any]:
+    """Compute the tenant dashboard.
+
+    Totals, top products and the sales series cover the days ``inicio``..``fim``
+    (inclusive), by default the last ``DEFAULT_PERIOD_DAYS`` days up to today
+    (salon days, like the rollups).
+    """
+    fim = fim or datetime.now(AGENDA_TIMEZONE).date()
+    inicio = inicio or (fim - timedelta(days=DEFAULT_PERIOD_DAYS - 1))
+
+    total_vendas = resumo_vendas(db, tenant_id, inicio, fim)["total"]
+    total_despesas = custo_vendas(db, tenant_id, inicio, fim)
+    lucro = total_vendas - total_despesas
+
+    return {
+        "total_vendas": total_vendas,
+        "total_despesas": total_despesas,
+        "lucro": lucro,
+        "margem_lucro": (lucro / total_vendas * 100) if total_vendas > 0 else 0,
+        "itens_estoque": itens_estoque(db, tenant_id),
+        "agendamentos_hoje": agendamentos_hoje(db, tenant_id),
+        "vendas_periodo": serie_vendas(db, tenant_id, inicio, fim, bucket),
+        "top_produtos": top_produtos(db, tenant_id, inicio, fim),
+    }
+
+
+def _filtrar_dias(query, inicio: Optional[date], fim: Optional[date], coluna=VendaDiaria.dia):
+    if inicio:
+        query = query.filter(coluna >= inicio)
+    if fim:
+        query = query.filter(coluna <= fim)
+    return query
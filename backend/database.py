@@ -1,10 +1,13 @@
-from sqlalchemy import create_engine, Column, String, DateTime, Boolean, Float, Integer, Text, ForeignKey, Index
+from sqlalchemy import create_engine, event, Column, String, Date, DateTime, Boolean, Float, Integer, Text, ForeignKey, Index, JSON
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session, relationship
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+import functools
 import uuid
 import os
-from typing import Generator
+from typing import Any, AsyncGenerator, Callable, Generator, Optional
+
+from normalizacao import documento_busca
 
 DATABASE_URL = os.environ.get('DATABASE_URL')
 if not DATABASE_URL:
@@ -17,18 +20,46 @@ if is_sqlite:
     engine = create_engine(DATABASE_URL, pool_pre_ping=True, connect_args={"check_same_thread": False})
     # Use String for SQLite (no UUID support)
     IdType = String(36)
+    # JSON documents are stored as text and queried with the JSON1 functions
+    JsonType = JSON(none_as_null=True)
 elif DATABASE_URL.startswith("postgresql://"):
-    from sqlalchemy.dialects.postgresql import UUID
+    from sqlalchemy.dialects.postgresql import JSONB, UUID
     DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+psycopg2://", 1)
     engine = create_engine(DATABASE_URL, pool_pre_ping=True)
     # Use UUID for PostgreSQL
     IdType = UUID(as_uuid=True)
+    JsonType = JSONB(none_as_null=True)
 else:
     engine = create_engine(DATABASE_URL, pool_pre_ping=True)
     IdType = String(36)
+    JsonType = JSON(none_as_null=True)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+def em_utc(valor: datetime) -> datetime:
+    """A stored datetime as an aware UTC value (SQLite returns naive datetimes
+    for DateTime(timezone=True) columns)."""
+    return valor if valor.tzinfo else valor.replace(tzinfo=timezone.utc)
+
+# Async mode (opt-in): requests use an AsyncEngine (aiosqlite / asyncpg) so
+# waiting on the database never blocks the event loop. The sync engine above
+# is still used by migrate_database, the startup bootstrap and the CLI scripts.
+DB_ASYNC_MODE = os.environ.get('DB_ASYNC_MODE', 'false').lower() in ('1', 'true', 'yes')
+
+def get_async_database_url(url: str) -> str:
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    if url.startswith("postgresql+psycopg2://"):
+        return url.replace("postgresql+psycopg2://", "postgresql+asyncpg://", 1)
+    raise ValueError(f"DB_ASYNC_MODE is not supported for {url.split(':', 1)[0]}")
+
+async_engine = None
+AsyncSessionLocal = None
+if DB_ASYNC_MODE:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    async_engine = create_async_engine(get_async_database_url(DATABASE_URL), pool_pre_ping=True)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=True)
+
 # Database Models
 class Tenant(Base):
     __tablename__ = "tenants"
@@ -52,10 +83,10 @@ class Tenant(Base):
     
     # Certificate configuration
     usar_certificado = Column(Boolean, default=False)
-    certificado_config = Column(Text)  # JSON string
+    certificado_config = Column(JsonType)
     
-    created_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc))
-    updated_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     
     # Relationships
     users = relationship("User", back_populates="tenant", cascade="all, delete-orphan")
@@ -65,6 +96,20 @@ class Tenant(Base):
     vendas = relationship("Venda", back_populates="tenant", cascade="all, delete-orphan")
     agendamentos = relationship("Agendamento", back_populates="tenant", cascade="all, delete-orphan")
     vencimentos = relationship("Vencimento", cascade="all, delete-orphan")
+    vendas_diarias = relationship("VendaDiaria", cascade="all, delete-orphan")
+    produtos_diarios = relationship("ProdutoDiario", cascade="all, delete-orphan")
+    
+    # Indexes (super admin listing: sorts and filters, keyset by id; see also
+    # the PostgreSQL lower()/pattern indexes of migration 0006 for search)
+    __table_args__ = (
+        Index('idx_tenant_created', 'created_at', 'id'),
+        Index('idx_tenant_company_name', 'company_name', 'id'),
+        Index('idx_tenant_status', 'subscription_status', 'created_at', 'id'),
+        Index('idx_tenant_plan', 'plan', 'created_at', 'id'),
+        Index('idx_tenant_active', 'is_active', 'created_at', 'id'),
+        Index('idx_tenant_cnpj', 'cnpj'),
+        Index('idx_tenant_email', 'email'),
+    )
 
 class User(Base):
     __tablename__ = "users"
@@ -75,6 +120,7 @@ class User(Base):
     hashed_password = Column(String(200), nullable=False)
     role = Column(String(20), nullable=False, default="operador")  # super_admin, admin_empresa, operador
     is_active = Column(Boolean, default=True)
+    token_version = Column(Integer, nullable=False, default=0)  # bumped to revoke issued tokens
     
     # Multi-tenant
     tenant_id = Column(IdType, ForeignKey("tenants.id"), nullable=True)  # Null for super_admin
@@ -83,8 +129,8 @@ class User(Base):
     reset_token = Column(String(200))
     reset_token_expires = Column(DateTime(timezone=True))
     
-    created_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc))
-    updated_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     
     # Relationships
     tenant = relationship("Tenant", back_populates="users")
@@ -93,8 +139,16 @@ class User(Base):
     # Indexes
     __table_args__ = (
         Index('idx_user_email_tenant', 'email', 'tenant_id', unique=True),
+        Index('idx_user_tenant', 'tenant_id', 'created_at'),
+        Index('idx_user_created', 'created_at', 'id'),
+        Index('idx_user_name', 'name', 'id'),
     )
 
+def _busca_cliente(context) -> str:
+    # Column default, so Core bulk inserts (importacao.py) fill it in as well
+    params = context.get_current_parameters()
+    return documento_busca(params.get("nome"), params.get("email"), params.get("telefone"), params.get("cpf_cnpj"))
+
 class Cliente(Base):
     __tablename__ = "clientes"
     
@@ -106,17 +160,29 @@ class Cliente(Base):
     endereco = Column(Text)
     foto_url = Column(String(500))
     anamnese = Column(Text)
+    # Normalized nome/email/telefone/cpf_cnpj, indexed for /clientes/search
+    busca = Column(Text, default=_busca_cliente)
     
     # Multi-tenant
     tenant_id = Column(IdType, ForeignKey("tenants.id"), nullable=False)
     
-    created_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc))
-    updated_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     
     # Relationships
     tenant = relationship("Tenant", back_populates="clientes")
     vendas = relationship("Venda", back_populates="cliente")
     agendamentos = relationship("Agendamento", back_populates="cliente")
+    
+    # Indexes (keyset pagination: tenant_id + sort column + id)
+    __table_args__ = (
+        Index('idx_cliente_tenant_created', 'tenant_id', 'created_at', 'id'),
+        Index('idx_cliente_tenant_nome', 'tenant_id', 'nome', 'id'),
+    )
+
+@event.listens_for(Cliente, "before_update")
+def _atualizar_busca_cliente(mapper, connection, target):
+    target.busca = documento_busca(target.nome, target.email, target.telefone, target.cpf_cnpj)
 
 class Produto(Base):
     __tablename__ = "produtos"
@@ -135,11 +201,19 @@ class Produto(Base):
     # Multi-tenant
     tenant_id = Column(IdType, ForeignKey("tenants.id"), nullable=False)
     
-    created_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc))
-    updated_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     
     # Relationships
     tenant = relationship("Tenant", back_populates="produtos")
+    
+    # Indexes (keyset pagination: tenant_id + sort column + id)
+    __table_args__ = (
+        Index('idx_produto_tenant_created', 'tenant_id', 'created_at', 'id'),
+        Index('idx_produto_tenant_nome', 'tenant_id', 'nome', 'id'),
+        Index('idx_produto_tenant_categoria', 'tenant_id', 'categoria'),
+        Index('idx_produto_tenant_codigo', 'tenant_id', 'codigo', unique=True),
+    )
 
 class Servico(Base):
     __tablename__ = "servicos"
@@ -149,16 +223,22 @@ class Servico(Base):
     descricao = Column(Text)
     duracao_minutos = Column(Integer, default=60)
     preco = Column(Float, nullable=False)
-    tributacao_iss = Column(Text)  # JSON string
+    tributacao_iss = Column(JsonType)
     
     # Multi-tenant
     tenant_id = Column(IdType, ForeignKey("tenants.id"), nullable=False)
     
-    created_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc))
-    updated_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     
     # Relationships
     tenant = relationship("Tenant", back_populates="servicos")
+    
+    # Indexes (keyset pagination: tenant_id + sort column + id)
+    __table_args__ = (
+        Index('idx_servico_tenant_created', 'tenant_id', 'created_at', 'id'),
+        Index('idx_servico_tenant_nome', 'tenant_id', 'nome', 'id'),
+    )
 
 class Venda(Base):
     __tablename__ = "vendas"
@@ -166,7 +246,7 @@ class Venda(Base):
     id = Column(IdType, primary_key=True, default=lambda: str(uuid.uuid4()))
     cliente_id = Column(IdType, ForeignKey("clientes.id"))
     cliente_nome = Column(String(200))
-    itens = Column(Text, nullable=False)  # JSON string
+    itens = Column(Text, nullable=False)  # JSON string (legacy copy; venda_itens is the source of truth)
     subtotal = Column(Float, nullable=False)
     desconto_total = Column(Float, default=0.0)
     total = Column(Float, nullable=False)
@@ -181,13 +261,91 @@ class Venda(Base):
     tenant_id = Column(IdType, ForeignKey("tenants.id"), nullable=False)
     vendedor_id = Column(IdType, ForeignKey("users.id"), nullable=False)
     
-    created_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc))
-    updated_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     
     # Relationships
     tenant = relationship("Tenant", back_populates="vendas")
     cliente = relationship("Cliente", back_populates="vendas")
     vendedor = relationship("User", back_populates="vendas")
+    itens_venda = relationship("VendaItem", back_populates="venda", cascade="all, delete-orphan", order_by="VendaItem.posicao")
+    
+    # Indexes (keyset pagination: tenant_id + sort column + id)
+    __table_args__ = (
+        Index('idx_venda_tenant_created', 'tenant_id', 'created_at', 'id'),
+        Index('idx_venda_tenant_total', 'tenant_id', 'total', 'id'),
+        Index('idx_venda_tenant_cliente', 'tenant_id', 'cliente_id'),
+    )
+
+class VendaItem(Base):
+    __tablename__ = "venda_itens"
+    
+    id = Column(IdType, primary_key=True, default=lambda: str(uuid.uuid4()))
+    venda_id = Column(IdType, ForeignKey("vendas.id"), nullable=False)
+    posicao = Column(Integer, nullable=False, default=0)  # order of the item in the sale
+    tipo = Column(String(20), nullable=False)  # "produto" ou "servico"
+    item_id = Column(String(36), nullable=False)  # Produto.id or Servico.id
+    nome = Column(String(200), nullable=False)
+    quantidade = Column(Float, nullable=False)
+    preco_unitario = Column(Float, nullable=False)
+    desconto = Column(Float, default=0.0)
+    total = Column(Float, nullable=False)
+    
+    # Multi-tenant
+    tenant_id = Column(IdType, ForeignKey("tenants.id"), nullable=False)
+    
+    # Relationships
+    venda = relationship("Venda", back_populates="itens_venda")
+    
+    # Indexes
+    __table_args__ = (
+        Index('idx_venda_item_venda', 'venda_id', 'posicao'),
+        Index('idx_venda_item_tenant_item', 'tenant_id', 'tipo', 'item_id'),
+    )
+
+class VendaDiaria(Base):
+    """Daily sales rollup, maintained by create_venda (see rollups.py)"""
+    __tablename__ = "vendas_diarias"
+    
+    id = Column(IdType, primary_key=True, default=lambda: str(uuid.uuid4()))
+    dia = Column(Date, nullable=False)  # UTC day of Venda.created_at
+    forma_pagamento = Column(String(50), nullable=False)
+    total_bruto = Column(Float, nullable=False, default=0.0)  # sum of Venda.subtotal
+    desconto = Column(Float, nullable=False, default=0.0)  # sum of Venda.desconto_total
+    quantidade = Column(Integer, nullable=False, default=0)  # number of sales
+    
+    # Multi-tenant
+    tenant_id = Column(IdType, ForeignKey("tenants.id"), nullable=False)
+    vendedor_id = Column(IdType, ForeignKey("users.id"), nullable=False)
+    
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    
+    # Indexes
+    __table_args__ = (
+        Index('idx_venda_diaria_chave', 'tenant_id', 'dia', 'forma_pagamento', 'vendedor_id', unique=True),
+    )
+
+class ProdutoDiario(Base):
+    """Daily per-product sales rollup, maintained by create_venda (see rollups.py)"""
+    __tablename__ = "produtos_diarios"
+    
+    id = Column(IdType, primary_key=True, default=lambda: str(uuid.uuid4()))
+    dia = Column(Date, nullable=False)  # UTC day of Venda.created_at
+    produto_id = Column(String(36), nullable=False)  # VendaItem.item_id of the "produto" items
+    nome = Column(String(200), nullable=False)  # name in the latest sale of the day
+    quantidade = Column(Float, nullable=False, default=0.0)  # units sold
+    total = Column(Float, nullable=False, default=0.0)  # sum of VendaItem.total
+    custo = Column(Float, nullable=False, default=0.0)  # units x Produto.custo at sale time
+    
+    # Multi-tenant
+    tenant_id = Column(IdType, ForeignKey("tenants.id"), nullable=False)
+    
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    
+    # Indexes
+    __table_args__ = (
+        Index('idx_produto_diario_chave', 'tenant_id', 'dia', 'produto_id', unique=True),
+    )
 
 class Agendamento(Base):
     __tablename__ = "agendamentos"
@@ -202,13 +360,30 @@ class Agendamento(Base):
     # Multi-tenant
     tenant_id = Column(IdType, ForeignKey("tenants.id"), nullable=False)
     
-    created_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc))
-    updated_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     
     # Relationships
     tenant = relationship("Tenant", back_populates="agendamentos")
     cliente = relationship("Cliente", back_populates="agendamentos")
     servico = relationship("Servico")
+    
+    # Indexes (keyset pagination: tenant_id + sort column + id)
+    __table_args__ = (
+        Index('idx_agendamento_tenant_created', 'tenant_id', 'created_at', 'id'),
+        Index('idx_agendamento_tenant_data', 'tenant_id', 'data_hora', 'id'),
+    )
+
+def data_notificacao(data_vencimento: Optional[datetime], dias_antecedencia: Optional[int]) -> Optional[datetime]:
+    """When the notification window of a vencimento opens."""
+    if data_vencimento is None:
+        return None
+    return data_vencimento - timedelta(days=dias_antecedencia or 0)
+
+def _notificar_em(context) -> Optional[datetime]:
+    # Column default, so Core bulk inserts fill it in as well
+    params = context.get_current_parameters()
+    return data_notificacao(params.get("data_vencimento"), params.get("dias_antecedencia"))
 
 class Vencimento(Base):
     __tablename__ = "vencimentos"
@@ -222,24 +397,133 @@ class Vencimento(Base):
     notificado_email = Column(Boolean, default=False)
     email_notificacao = Column(String(100))
     dias_antecedencia = Column(Integer, default=30)  # dias para notificar antes do vencimento
+    notificar_em = Column(DateTime(timezone=True), default=_notificar_em)  # data_vencimento - dias_antecedencia
     
     # Multi-tenant
     tenant_id = Column(IdType, ForeignKey("tenants.id"), nullable=False)
     
-    created_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc))
-    updated_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     
     # Relationships
     tenant = relationship("Tenant")
+    
+    # Indexes (keyset pagination: tenant_id + sort column + id)
+    __table_args__ = (
+        Index('idx_vencimento_tenant_created', 'tenant_id', 'created_at', 'id'),
+        Index('idx_vencimento_tenant_data', 'tenant_id', 'data_vencimento', 'id'),
+        Index('idx_vencimento_notificacao', 'status', 'notificado_email', 'notificar_em', 'id'),
+    )
+
+@event.listens_for(Vencimento, "before_update")
+def _atualizar_notificar_em(mapper, connection, target):
+    target.notificar_em = data_notificacao(target.data_vencimento, target.dias_antecedencia)
+
+class EmailOutbox(Base):
+    """Outgoing email queue, drained by the background worker (see outbox.py)"""
+    __tablename__ = "email_outbox"
+
+    id = Column(IdType, primary_key=True, default=lambda: str(uuid.uuid4()))
+    destinatario = Column(String(255), nullable=False)
+    assunto = Column(String(255), nullable=False)
+    conteudo_html = Column(Text, nullable=False)
+    status = Column(String(20), nullable=False, default="pendente")  # pendente, enviando, enviado, falhou
+    tentativas = Column(Integer, nullable=False, default=0)
+    proxima_tentativa = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    lote = Column(String(36))  # claim token of the worker currently sending it
+    ultimo_erro = Column(Text)
+    enviado_em = Column(DateTime(timezone=True))
+
+    # Multi-tenant (null for platform emails)
+    tenant_id = Column(IdType, ForeignKey("tenants.id"), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+    # Indexes (worker scan: due rows per status)
+    __table_args__ = (
+        Index('idx_email_outbox_status_proxima', 'status', 'proxima_tentativa'),
+        Index('idx_email_outbox_lote', 'lote'),
+    )
+
+class CatalogoVersao(Base):
+    """Change counter of a tenant's catalog resource, bumped by its write routes (see versoes.py)"""
+    __tablename__ = "catalogo_versoes"
+
+    id = Column(IdType, primary_key=True, default=lambda: str(uuid.uuid4()))
+    recurso = Column(String(20), nullable=False)  # clientes, produtos, servicos
+    versao = Column(Integer, nullable=False, default=0)
+
+    # Multi-tenant
+    tenant_id = Column(IdType, ForeignKey("tenants.id"), nullable=False)
+
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+
+    # Indexes
+    __table_args__ = (
+        Index('idx_catalogo_versao_chave', 'tenant_id', 'recurso', unique=True),
+    )
 
 # Database dependency
-def get_db() -> Generator[Session, None, None]:
+def get_sync_db() -> Generator[Session, None, None]:
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
-# Create tables
-def create_tables():
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+async def get_async_db() -> AsyncGenerator[Any, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+get_db = get_async_db if DB_ASYNC_MODE else get_sync_db
+
+async def run_db(db, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run ``fn(session, *args, **kwargs)`` without blocking the event loop.
+
+    ``db`` is the request session from get_db: an AsyncSession in async mode
+    (``fn`` runs through ``run_sync``, its queries awaited by the async driver)
+    or a plain Session otherwise (``fn`` runs in the threadpool).
+    """
+    if DB_ASYNC_MODE:
+        return await db.run_sync(fn, *args, **kwargs)
+    from starlette.concurrency import run_in_threadpool
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
+def with_db(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    """Turn a sync route taking ``db: Session`` into an async one using run_db.
+
+    The route body keeps the ordinary Session API; FastAPI still sees the
+    original signature (dependencies included) through ``functools.wraps``.
+    """
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        db = kwargs.pop("db")
+        return await run_db(db, lambda session: endpoint(*args, db=session, **kwargs))
+    return wrapper
+
+# Schema migrations (alembic, see migrations/)
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")
+BASELINE_REVISION = "0001"
+# Run migrate_database() when the API starts; disable when migrations run as a deploy step
+DB_AUTO_MIGRATE = os.environ.get('DB_AUTO_MIGRATE', 'true').lower() in ('1', 'true', 'yes')
+
+def migrate_database():
+    """Upgrade the database to the latest migration (alembic upgrade head).
+
+    Databases created by the old ``Base.metadata.create_all`` bootstrap have
+    tables but no alembic_version; they are stamped at the baseline first and
+    the later revisions skip the objects they already contain.
+    """
+    from alembic import command
+    from alembic.config import Config
+    from sqlalchemy import inspect
+
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("script_location", os.path.join(os.path.dirname(ALEMBIC_INI), "migrations"))
+    config.attributes["configure_logger"] = False
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        tables = inspect(connection).get_table_names()
+        if "tenants" in tables and "alembic_version" not in tables:
+            command.stamp(config, BASELINE_REVISION)
+        command.upgrade(config, "head")
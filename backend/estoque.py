@@ -0,0 +1,72 @@
+import os
+from collections import defaultdict
+from typing import Dict, Iterable, List
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import Session
+
+from database import Produto
+
+# Stock is decremented with set-based UPDATEs (estoque_atual = estoque_atual - q)
+# so concurrent sales never overwrite each other's decrement. With
+# ESTOQUE_REJEITAR_INSUFICIENTE (or VendaCreate.rejeitar_sem_estoque) a sale is
+# refused when a product does not have enough stock; the check is part of the
+# UPDATE's WHERE clause, so it is atomic as well.
+
+ESTOQUE_REJEITAR_INSUFICIENTE = os.environ.get('ESTOQUE_REJEITAR_INSUFICIENTE', 'false').lower() in ('1', 'true', 'yes')
+
+
+def quantidades_por_produto(itens: Iterable) -> Dict[str, int]:
+    """Units per product id of a cart (ItemVenda-like objects); services are skipped."""
+    quantidades = defaultdict(int)
+    for item in itens:
+        if item.tipo == "produto":
+            quantidades[str(item.item_id)] += int(item.quantidade)
+    return dict(quantidades)
+
+
+def baixar_estoque(db: Session, tenant_id, quantidades: Dict[str, int], rejeitar_insuficiente: bool = False) -> List[str]:
+    """Decrement the stock of every product in ``quantidades`` in the caller's transaction.
+
+    Returns the ids of the products without enough stock; when
+    ``rejeitar_insuficiente`` is set and the list is not empty nothing must be
+    committed (the caller rolls back). Unknown product ids are ignored.
+    """
+    if not quantidades:
+        return []
+    # Fixed order, so two sales locking the same products cannot deadlock
+    produto_ids = sorted(quantidades)
+
+    if not rejeitar_insuficiente:
+        # Core statement (not ORM): executemany sends every product in one call
+        produtos = Produto.__table__
+        db.execute(
+            update(produtos)
+            .where(produtos.c.id == bindparam("produto_id"), produtos.c.tenant_id == tenant_id)
+            .values(estoque_atual=produtos.c.estoque_atual - bindparam("quantidade")),
+            [{"produto_id": produto_id, "quantidade": quantidades[produto_id]} for produto_id in produto_ids],
+        )
+        return []
+
+    sem_estoque = []
+    for produto_id in produto_ids:
+        quantidade = quantidades[produto_id]
+        result = db.execute(
+            update(Produto)
+            .where(
+                Produto.id == produto_id,
+                Produto.tenant_id == tenant_id,
+                Produto.estoque_atual >= quantidade,
+            )
+            .values(estoque_atual=Produto.estoque_atual - quantidade)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            sem_estoque.append(produto_id)
+
+    if sem_estoque:
+        # Either out of stock or not a product of this tenant; only the former rejects the sale
+        existentes = db.query(Produto.id).filter(Produto.id.in_(sem_estoque), Produto.tenant_id == tenant_id).all()
+        existentes = {str(produto_id) for produto_id, in existentes}
+        sem_estoque = [produto_id for produto_id in sem_estoque if produto_id in existentes]
+    return sem_estoque
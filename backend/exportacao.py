@@ -0,0 +1,98 @@
+import csv
+import io
+import json
+import os
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import select
+
+from database import Cliente, Produto, SessionLocal, Venda, VendaItem
+
+# Streaming export of a tenant's vendas / clientes / produtos as CSV or NDJSON.
+#
+# Rows are read with yield_per (a server-side cursor on PostgreSQL) in
+# EXPORT_BATCH_SIZE partitions and written out one partition at a time, so
+# memory stays constant whatever the size of the tenant. The generator owns its
+# own session: request-scoped sessions are closed before a streamed body ends.
+
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', '1000'))
+FORMATOS = ("csv", "ndjson")
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+RECURSOS = {
+    "clientes": (Cliente, ["id", "nome", "email", "telefone", "cpf_cnpj", "endereco", "anamnese", "created_at"]),
+    "produtos": (Produto, ["id", "codigo", "nome", "descricao", "categoria", "ncm", "custo", "preco",
+                           "estoque_atual", "estoque_minimo", "created_at"]),
+    "vendas": (Venda, ["id", "created_at", "cliente_id", "cliente_nome", "vendedor_id", "forma_pagamento",
+                       "subtotal", "desconto_total", "total", "emitir_nota", "status_nota", "nota_numero"]),
+}
+
+ITEM_COLUNAS = ["tipo", "item_id", "nome", "quantidade", "preco_unitario", "desconto", "total"]
+
+
+def _valor(valor: Any) -> Any:
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if valor is None or isinstance(valor, (bool, int, float, str)):
+        return valor
+    return str(valor)  # UUID
+
+
+def _celula(valor: Any) -> Any:
+    valor = _valor(valor)
+    if valor is None:
+        return ""
+    # Keep spreadsheets from evaluating user-provided text as a formula
+    if isinstance(valor, str) and valor[:1] in ("=", "+", "-", "@"):
+        return "'" + valor
+    return valor
+
+
+def _itens_por_venda(db, venda_ids: List[Any]) -> Dict[Any, List[Dict[str, Any]]]:
+    itens: Dict[Any, List[Dict[str, Any]]] = {venda_id: [] for venda_id in venda_ids}
+    rows = db.execute(
+        select(VendaItem.venda_id, *[getattr(VendaItem, coluna) for coluna in ITEM_COLUNAS])
+        .where(VendaItem.venda_id.in_(venda_ids))
+        .order_by(VendaItem.venda_id, VendaItem.posicao)
+    )
+    for venda_id, *valores in rows:
+        itens[venda_id].append(dict(zip(ITEM_COLUNAS, (_valor(valor) for valor in valores))))
+    return itens
+
+
+def exportar(tenant_id, recurso: str, formato: str, inicio: Optional[date] = None,
+             fim: Optional[date] = None, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+    """Rows of ``recurso`` created in the UTC days ``inicio``..``fim``, serialized per partition."""
+    model, colunas = RECURSOS[recurso]
+    stmt = select(*[getattr(model, coluna) for coluna in colunas]).where(model.tenant_id == tenant_id)
+    if inicio:
+        stmt = stmt.where(model.created_at >= datetime.combine(inicio, time.min, timezone.utc))
+    if fim:
+        stmt = stmt.where(model.created_at < datetime.combine(fim + timedelta(days=1), time.min, timezone.utc))
+    stmt = stmt.order_by(model.created_at, model.id).execution_options(yield_per=batch_size)
+
+    db = SessionLocal()
+    try:
+        if formato == "csv":
+            saida = io.StringIO()
+            writer = csv.writer(saida)
+            writer.writerow(colunas)
+            for partition in db.execute(stmt).partitions():
+                writer.writerows([_celula(valor) for valor in row] for row in partition)
+                yield saida.getvalue()
+                saida.seek(0)
+                saida.truncate()
+            yield saida.getvalue()
+            return
+
+        for partition in db.execute(stmt).partitions():
+            registros = [dict(zip(colunas, (_valor(valor) for valor in row))) for row in partition]
+            if recurso == "vendas":
+                # NDJSON sales carry their items, loaded with one query per partition
+                itens = _itens_por_venda(db, [row[0] for row in partition])
+                for registro, row in zip(registros, partition):
+                    registro["itens"] = itens[row[0]]
+            yield "".join(json.dumps(registro, ensure_ascii=False) + "\n" for registro in registros)
+    finally:
+        db.close()
@@ -0,0 +1,193 @@
+import csv
+import io
+import json
+import os
+import tempfile
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type
+
+from fastapi import HTTPException
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+# Bulk import of catalog data (clientes, produtos) from CSV or NDJSON.
+#
+# The upload is read as a stream, one record at a time, validated with the
+# same pydantic model as the single-record route and inserted with a Core
+# executemany every ``chunk_size`` valid rows (committed per chunk), so memory
+# stays bounded by the chunk and a 100k-row file costs ~100 statements instead
+# of 100k commits. Invalid rows are skipped and reported with their line number.
+# A column that must be unique per tenant (produtos.codigo) is checked against
+# the rest of the file and, with one query per chunk, against the database, so
+# a repeated code is reported on its row instead of failing the whole chunk.
+
+IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE', '1000'))
+IMPORT_MAX_CHUNK_SIZE = 10000
+IMPORT_MAX_ERROS = int(os.environ.get('IMPORT_MAX_ERROS', '1000'))  # errors listed in the report
+IMPORT_SPOOL_SIZE = 1024 * 1024  # bytes of an upload kept in memory before spilling to disk
+FORMATOS = ("csv", "ndjson")
+
+Registro = Tuple[int, Optional[Dict[str, Any]], Optional[str]]  # (line, record, parse error)
+
+
+def detectar_formato(content_type: Optional[str], filename: Optional[str] = None) -> Optional[str]:
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in ("text/csv", "application/csv"):
+        return "csv"
+    if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/x-jsonlines"):
+        return "ndjson"
+    if filename:
+        extensao = filename.rsplit(".", 1)[-1].lower()
+        if extensao == "csv":
+            return "csv"
+        if extensao in ("ndjson", "jsonl"):
+            return "ndjson"
+    return None
+
+
+def _texto(arquivo) -> io.TextIOWrapper:
+    # utf-8-sig drops the BOM spreadsheet exports often start with
+    return io.TextIOWrapper(arquivo, encoding="utf-8-sig", errors="replace", newline="")
+
+
+def ler_csv(arquivo) -> Iterator[Registro]:
+    """Records of a CSV file with a header row; ``;`` or ``,`` separated."""
+    texto = _texto(arquivo)
+    cabecalho = texto.readline()
+    if not cabecalho.strip():
+        return
+    delimitador = ";" if cabecalho.count(";") > cabecalho.count(",") else ","
+    campos = [campo.strip() for campo in next(csv.reader([cabecalho], delimiter=delimitador))]
+    leitor = csv.reader(texto, delimiter=delimitador)
+    while True:
+        try:
+            valores = next(leitor)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            # Malformed CSV (e.g. an unterminated quote) cannot be resynchronised
+            yield leitor.line_num + 1, None, f"invalid CSV: {e}"
+            return
+        if not any(valor.strip() for valor in valores):
+            continue
+        if len(valores) > len(campos):
+            yield leitor.line_num + 1, None, f"expected {len(campos)} columns, got {len(valores)}"
+            continue
+        # Empty cells are left out so the model defaults apply
+        registro = {campo: valor.strip() for campo, valor in zip(campos, valores) if valor.strip()}
+        yield leitor.line_num + 1, registro, None
+
+
+def ler_ndjson(arquivo) -> Iterator[Registro]:
+    """Records of a newline-delimited JSON file (one object per line)."""
+    for numero, linha in enumerate(_texto(arquivo), start=1):
+        if not linha.strip():
+            continue
+        try:
+            registro = json.loads(linha)
+        except ValueError as e:
+            yield numero, None, f"invalid JSON: {e}"
+            continue
+        if not isinstance(registro, dict):
+            yield numero, None, "expected a JSON object"
+            continue
+        yield numero, registro, None
+
+
+def ler_registros(arquivo, formato: str) -> Iterator[Registro]:
+    return ler_csv(arquivo) if formato == "csv" else ler_ndjson(arquivo)
+
+
+def _mensagens(erro: ValidationError) -> List[str]:
+    return [f"{'.'.join(str(parte) for parte in detalhe['loc']) or 'registro'}: {detalhe['msg']}" for detalhe in erro.errors()]
+
+
+def importar(db: Session, model, schema: Type[BaseModel], tenant_id, registros: Iterator[Registro],
+             chunk_size: int = IMPORT_CHUNK_SIZE, unico: Optional[str] = None) -> Dict[str, Any]:
+    """Validate ``registros`` with ``schema`` and bulk insert the valid ones into ``model``.
+
+    ``unico`` names a column whose non-null values must not repeat within the tenant.
+    """
+    tabela = model.__table__
+    resultado = {"total_linhas": 0, "importados": 0, "erros_total": 0, "erros": []}
+    lote: List[Dict[str, Any]] = []
+    linhas: List[int] = []
+    vistos = set()
+
+    def erro(linha: int, mensagens: List[str]):
+        resultado["erros_total"] += 1
+        if len(resultado["erros"]) < IMPORT_MAX_ERROS:
+            resultado["erros"].append({"linha": linha, "erros": mensagens})
+
+    def repetidos() -> set:
+        valores = {dados[unico] for dados in lote if dados[unico] is not None}
+        if not valores:
+            return set()
+        coluna = tabela.c[unico]
+        return set(db.scalars(select(coluna).where(tabela.c.tenant_id == tenant_id, coluna.in_(valores))))
+
+    def gravar():
+        if unico and lote:
+            existentes = repetidos()
+            if existentes:
+                validos = []
+                for linha, dados in zip(linhas, lote):
+                    if dados[unico] in existentes:
+                        erro(linha, [f"{unico}: already exists ({dados[unico]})"])
+                    else:
+                        validos.append(dados)
+                lote[:] = validos
+        if lote:
+            db.execute(insert(tabela), lote)
+            db.commit()
+            resultado["importados"] += len(lote)
+        lote.clear()
+        linhas.clear()
+
+    for linha, registro, falha in registros:
+        resultado["total_linhas"] += 1
+        if falha:
+            erro(linha, [falha])
+            continue
+        try:
+            dados = schema(**registro).model_dump()
+        except ValidationError as e:
+            erro(linha, _mensagens(e))
+            continue
+        if unico and dados[unico] is not None:
+            if dados[unico] in vistos:
+                erro(linha, [f"{unico}: repeated in the file ({dados[unico]})"])
+                continue
+            vistos.add(dados[unico])
+        agora = datetime.now(timezone.utc)
+        lote.append({**dados, "id": str(uuid.uuid4()), "tenant_id": tenant_id, "created_at": agora, "updated_at": agora})
+        linhas.append(linha)
+        if len(lote) >= chunk_size:
+            gravar()
+    gravar()
+    # Database conflicts are found when a chunk is written, after its other errors
+    resultado["erros"].sort(key=lambda item: item["linha"])
+    return resultado
+
+
+async def receber_arquivo(request) -> Tuple[Any, Optional[str]]:
+    """The uploaded file (multipart ``file`` field or the raw request body) and its detected format.
+
+    The raw body is spooled to a temporary file as it arrives (memory up to
+    IMPORT_SPOOL_SIZE, disk beyond), so it is parsed as a stream afterwards.
+    """
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="Missing file field")
+        return upload.file, detectar_formato(upload.content_type, upload.filename)
+
+    arquivo = tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_SIZE)
+    async for chunk in request.stream():
+        arquivo.write(chunk)
+    arquivo.seek(0)
+    return arquivo, detectar_formato(content_type)
@@ -0,0 +1,91 @@
+"""Backfill venda_itens from the legacy Venda.itens JSON column.
+
+Idempotent: only sales that have no venda_itens rows yet are migrated, in
+batches ordered by id. Run once after deploying the venda_itens table:
+
+    python migrate_venda_itens.py [--batch-size 1000]
+"""
+import argparse
+import json
+import logging
+import uuid
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv(Path(__file__).parent / '.env')
+
+from sqlalchemy import exists, insert
+from sqlalchemy.orm import Session
+
+from database import SessionLocal, Venda, VendaItem
+
+BATCH_SIZE = 1000
+
+logger = logging.getLogger(__name__)
+
+
+def itens_para_linhas(venda_id, tenant_id, itens) -> list:
+    """venda_itens rows (dicts) for a list of ItemVenda-like dicts."""
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "venda_id": venda_id,
+            "tenant_id": tenant_id,
+            "posicao": posicao,
+            "tipo": item["tipo"],
+            "item_id": str(item["item_id"]),
+            "nome": item["nome"],
+            "quantidade": item["quantidade"],
+            "preco_unitario": item["preco_unitario"],
+            "desconto": item.get("desconto") or 0.0,
+            "total": item["total"],
+        }
+        for posicao, item in enumerate(itens)
+    ]
+
+
+def backfill_venda_itens(db: Session, batch_size: int = BATCH_SIZE) -> int:
+    """Migrate every un-migrated sale, committing per batch. Returns the number of sales."""
+    migradas = 0
+    ultimo_id = None
+    while True:
+        query = db.query(Venda.id, Venda.tenant_id, Venda.itens).filter(
+            ~exists().where(VendaItem.venda_id == Venda.id)
+        )
+        if ultimo_id is not None:
+            query = query.filter(Venda.id > ultimo_id)
+        lote = query.order_by(Venda.id).limit(batch_size).all()
+        if not lote:
+            return migradas
+
+        linhas = []
+        for venda_id, tenant_id, itens_json in lote:
+            try:
+                itens = json.loads(itens_json or "[]")
+            except ValueError:
+                logger.warning("Venda %s has invalid itens JSON, skipped", venda_id)
+                continue
+            linhas.extend(itens_para_linhas(venda_id, tenant_id, itens))
+
+        if linhas:
+            db.execute(insert(VendaItem), linhas)
+        db.commit()
+        migradas += len(lote)
+        ultimo_id = lote[-1][0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill venda_itens from Venda.itens JSON")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        print(f"venda_itens backfilled for {backfill_venda_itens(db, args.batch_size)} sales")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""Guards used by the revisions after the baseline.
+
+Databases created before the migration tree existed were built with
+``Base.metadata.create_all`` and may already contain some of the objects a
+revision adds; migrate_database() stamps them at the baseline and these
+helpers make the following revisions skip what is already there.
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+def has_table(name: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def has_column(table: str, column: str) -> bool:
+    return any(c["name"] == column for c in sa.inspect(op.get_bind()).get_columns(table))
+
+
+def has_index(table: str, name: str) -> bool:
+    return any(i["name"] == name for i in sa.inspect(op.get_bind()).get_indexes(table))
+
+
+def create_index(name: str, table: str, columns, unique: bool = False):
+    if not has_index(table, name):
+        op.create_index(name, table, columns, unique=unique)
+
+
+def drop_index(name: str, table: str):
+    if has_index(table, name):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,160 @@
+"""baseline schema
+
+The schema as it was created by Base.metadata.create_all before migrations
+were introduced. Existing databases without an alembic_version table are
+stamped at this revision by migrate_database().
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from database import IdType
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _timestamps():
+    return [
+        sa.Column('created_at', sa.DateTime(timezone=True)),
+        sa.Column('updated_at', sa.DateTime(timezone=True)),
+    ]
+
+
+def upgrade():
+    op.create_table(
+        'tenants',
+        sa.Column('id', IdType, primary_key=True),
+        sa.Column('subdomain', sa.String(50), nullable=False),
+        sa.Column('company_name', sa.String(200), nullable=False),
+        sa.Column('cnpj', sa.String(20), unique=True),
+        sa.Column('razao_social', sa.String(200)),
+        sa.Column('nome_fantasia', sa.String(200)),
+        sa.Column('endereco', sa.Text),
+        sa.Column('telefone', sa.String(20)),
+        sa.Column('email', sa.String(100)),
+        sa.Column('plan', sa.String(20)),
+        sa.Column('is_active', sa.Boolean),
+        sa.Column('trial_ends_at', sa.DateTime(timezone=True)),
+        sa.Column('subscription_status', sa.String(20)),
+        sa.Column('stripe_customer_id', sa.String(100)),
+        sa.Column('usar_certificado', sa.Boolean),
+        sa.Column('certificado_config', sa.Text),
+        *_timestamps(),
+    )
+    op.create_index('ix_tenants_subdomain', 'tenants', ['subdomain'], unique=True)
+
+    op.create_table(
+        'users',
+        sa.Column('id', IdType, primary_key=True),
+        sa.Column('email', sa.String(100), nullable=False),
+        sa.Column('name', sa.String(100), nullable=False),
+        sa.Column('hashed_password', sa.String(200), nullable=False),
+        sa.Column('role', sa.String(20), nullable=False),
+        sa.Column('is_active', sa.Boolean),
+        sa.Column('tenant_id', IdType, sa.ForeignKey('tenants.id')),
+        sa.Column('reset_token', sa.String(200)),
+        sa.Column('reset_token_expires', sa.DateTime(timezone=True)),
+        *_timestamps(),
+    )
+    op.create_index('ix_users_email', 'users', ['email'])
+    op.create_index('idx_user_email_tenant', 'users', ['email', 'tenant_id'], unique=True)
+
+    op.create_table(
+        'clientes',
+        sa.Column('id', IdType, primary_key=True),
+        sa.Column('nome', sa.String(200), nullable=False),
+        sa.Column('email', sa.String(100)),
+        sa.Column('telefone', sa.String(20)),
+        sa.Column('cpf_cnpj', sa.String(20)),
+        sa.Column('endereco', sa.Text),
+        sa.Column('foto_url', sa.String(500)),
+        sa.Column('anamnese', sa.Text),
+        sa.Column('tenant_id', IdType, sa.ForeignKey('tenants.id'), nullable=False),
+        *_timestamps(),
+    )
+
+    op.create_table(
+        'produtos',
+        sa.Column('id', IdType, primary_key=True),
+        sa.Column('codigo', sa.String(50)),
+        sa.Column('nome', sa.String(200), nullable=False),
+        sa.Column('descricao', sa.Text),
+        sa.Column('categoria', sa.String(100)),
+        sa.Column('ncm', sa.String(20)),
+        sa.Column('custo', sa.Float),
+        sa.Column('preco', sa.Float, nullable=False),
+        sa.Column('estoque_atual', sa.Integer),
+        sa.Column('estoque_minimo', sa.Integer),
+        sa.Column('tenant_id', IdType, sa.ForeignKey('tenants.id'), nullable=False),
+        *_timestamps(),
+    )
+
+    op.create_table(
+        'servicos',
+        sa.Column('id', IdType, primary_key=True),
+        sa.Column('nome', sa.String(200), nullable=False),
+        sa.Column('descricao', sa.Text),
+        sa.Column('duracao_minutos', sa.Integer),
+        sa.Column('preco', sa.Float, nullable=False),
+        sa.Column('tributacao_iss', sa.Text),
+        sa.Column('tenant_id', IdType, sa.ForeignKey('tenants.id'), nullable=False),
+        *_timestamps(),
+    )
+
+    op.create_table(
+        'vendas',
+        sa.Column('id', IdType, primary_key=True),
+        sa.Column('cliente_id', IdType, sa.ForeignKey('clientes.id')),
+        sa.Column('cliente_nome', sa.String(200)),
+        sa.Column('itens', sa.Text, nullable=False),
+        sa.Column('subtotal', sa.Float, nullable=False),
+        sa.Column('desconto_total', sa.Float),
+        sa.Column('total', sa.Float, nullable=False),
+        sa.Column('forma_pagamento', sa.String(50), nullable=False),
+        sa.Column('emitir_nota', sa.Boolean),
+        sa.Column('status_nota', sa.String(50)),
+        sa.Column('nota_numero', sa.String(100)),
+        sa.Column('nota_xml', sa.Text),
+        sa.Column('nota_pdf_url', sa.String(500)),
+        sa.Column('tenant_id', IdType, sa.ForeignKey('tenants.id'), nullable=False),
+        sa.Column('vendedor_id', IdType, sa.ForeignKey('users.id'), nullable=False),
+        *_timestamps(),
+    )
+
+    op.create_table(
+        'agendamentos',
+        sa.Column('id', IdType, primary_key=True),
+        sa.Column('cliente_id', IdType, sa.ForeignKey('clientes.id'), nullable=False),
+        sa.Column('servico_id', IdType, sa.ForeignKey('servicos.id'), nullable=False),
+        sa.Column('data_hora', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('status', sa.String(20)),
+        sa.Column('observacoes', sa.Text),
+        sa.Column('tenant_id', IdType, sa.ForeignKey('tenants.id'), nullable=False),
+        *_timestamps(),
+    )
+
+    op.create_table(
+        'vencimentos',
+        sa.Column('id', IdType, primary_key=True),
+        sa.Column('tipo', sa.String(100), nullable=False),
+        sa.Column('descricao', sa.String(500)),
+        sa.Column('data_vencimento', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('valor', sa.Float),
+        sa.Column('status', sa.String(20)),
+        sa.Column('notificado_email', sa.Boolean),
+        sa.Column('email_notificacao', sa.String(100)),
+        sa.Column('dias_antecedencia', sa.Integer),
+        sa.Column('tenant_id', IdType, sa.ForeignKey('tenants.id'), nullable=False),
+        *_timestamps(),
+    )
+
+
+def downgrade():
+    for table in ('vencimentos', 'agendamentos', 'vendas', 'servicos', 'produtos', 'clientes', 'users', 'tenants'):
+        op.drop_table(table)
@@ -0,0 +1,100 @@
+"""token versions, venda_itens, vendas_diarias and email_outbox
+
+Tables created here on a database that already has sales are backfilled
+(see migrate_venda_itens.py and rollups.py).
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from database import IdType
+from migrations.helpers import has_column, has_table
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not has_column('users', 'token_version'):
+        with op.batch_alter_table('users') as batch_op:
+            batch_op.add_column(sa.Column('token_version', sa.Integer, nullable=False, server_default='0'))
+
+    backfill_itens = not has_table('venda_itens')
+    if backfill_itens:
+        op.create_table(
+            'venda_itens',
+            sa.Column('id', IdType, primary_key=True),
+            sa.Column('venda_id', IdType, sa.ForeignKey('vendas.id'), nullable=False),
+            sa.Column('posicao', sa.Integer, nullable=False),
+            sa.Column('tipo', sa.String(20), nullable=False),
+            sa.Column('item_id', sa.String(36), nullable=False),
+            sa.Column('nome', sa.String(200), nullable=False),
+            sa.Column('quantidade', sa.Float, nullable=False),
+            sa.Column('preco_unitario', sa.Float, nullable=False),
+            sa.Column('desconto', sa.Float),
+            sa.Column('total', sa.Float, nullable=False),
+            sa.Column('tenant_id', IdType, sa.ForeignKey('tenants.id'), nullable=False),
+        )
+        op.create_index('idx_venda_item_venda', 'venda_itens', ['venda_id', 'posicao'])
+        op.create_index('idx_venda_item_tenant_item', 'venda_itens', ['tenant_id', 'tipo', 'item_id'])
+
+    rebuild_rollup = not has_table('vendas_diarias')
+    if rebuild_rollup:
+        op.create_table(
+            'vendas_diarias',
+            sa.Column('id', IdType, primary_key=True),
+            sa.Column('dia', sa.Date, nullable=False),
+            sa.Column('forma_pagamento', sa.String(50), nullable=False),
+            sa.Column('total_bruto', sa.Float, nullable=False),
+            sa.Column('desconto', sa.Float, nullable=False),
+            sa.Column('quantidade', sa.Integer, nullable=False),
+            sa.Column('tenant_id', IdType, sa.ForeignKey('tenants.id'), nullable=False),
+            sa.Column('vendedor_id', IdType, sa.ForeignKey('users.id'), nullable=False),
+            sa.Column('updated_at', sa.DateTime(timezone=True)),
+        )
+        op.create_index('idx_venda_diaria_chave', 'vendas_diarias',
+                        ['tenant_id', 'dia', 'forma_pagamento', 'vendedor_id'], unique=True)
+
+    if not has_table('email_outbox'):
+        op.create_table(
+            'email_outbox',
+            sa.Column('id', IdType, primary_key=True),
+            sa.Column('destinatario', sa.String(255), nullable=False),
+            sa.Column('assunto', sa.String(255), nullable=False),
+            sa.Column('conteudo_html', sa.Text, nullable=False),
+            sa.Column('status', sa.String(20), nullable=False),
+            sa.Column('tentativas', sa.Integer, nullable=False),
+            sa.Column('proxima_tentativa', sa.DateTime(timezone=True), nullable=False),
+            sa.Column('lote', sa.String(36)),
+            sa.Column('ultimo_erro', sa.Text),
+            sa.Column('enviado_em', sa.DateTime(timezone=True)),
+            sa.Column('tenant_id', IdType, sa.ForeignKey('tenants.id')),
+            sa.Column('created_at', sa.DateTime(timezone=True)),
+        )
+        op.create_index('idx_email_outbox_status_proxima', 'email_outbox', ['status', 'proxima_tentativa'])
+        op.create_index('idx_email_outbox_lote', 'email_outbox', ['lote'])
+
+    if backfill_itens or rebuild_rollup:
+        from migrate_venda_itens import backfill_venda_itens
+        from rollups import rebuild_vendas_diarias
+
+        db = Session(bind=op.get_bind())
+        if backfill_itens:
+            backfill_venda_itens(db)
+        if rebuild_rollup:
+            rebuild_vendas_diarias(db)
+        db.flush()
+
+
+def downgrade():
+    op.drop_table('email_outbox')
+    op.drop_table('vendas_diarias')
+    op.drop_table('venda_itens')
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('token_version')
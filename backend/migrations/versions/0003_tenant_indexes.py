@@ -0,0 +1,45 @@
+"""tenant-scoped composite indexes
+
+Every tenant query filters on tenant_id first, so each hot filter/sort gets a
+(tenant_id, ...) index ending in id for keyset pagination.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from migrations.helpers import create_index, drop_index
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('idx_user_tenant', 'users', ['tenant_id', 'created_at']),
+    ('idx_cliente_tenant_created', 'clientes', ['tenant_id', 'created_at', 'id']),
+    ('idx_cliente_tenant_nome', 'clientes', ['tenant_id', 'nome', 'id']),
+    ('idx_produto_tenant_created', 'produtos', ['tenant_id', 'created_at', 'id']),
+    ('idx_produto_tenant_nome', 'produtos', ['tenant_id', 'nome', 'id']),
+    ('idx_produto_tenant_categoria', 'produtos', ['tenant_id', 'categoria']),
+    ('idx_produto_tenant_codigo', 'produtos', ['tenant_id', 'codigo']),
+    ('idx_servico_tenant_created', 'servicos', ['tenant_id', 'created_at', 'id']),
+    ('idx_servico_tenant_nome', 'servicos', ['tenant_id', 'nome', 'id']),
+    ('idx_venda_tenant_created', 'vendas', ['tenant_id', 'created_at', 'id']),
+    ('idx_venda_tenant_total', 'vendas', ['tenant_id', 'total', 'id']),
+    ('idx_venda_tenant_cliente', 'vendas', ['tenant_id', 'cliente_id']),
+    ('idx_agendamento_tenant_created', 'agendamentos', ['tenant_id', 'created_at', 'id']),
+    ('idx_agendamento_tenant_data', 'agendamentos', ['tenant_id', 'data_hora', 'id']),
+    ('idx_vencimento_tenant_created', 'vencimentos', ['tenant_id', 'created_at', 'id']),
+    ('idx_vencimento_tenant_data', 'vencimentos', ['tenant_id', 'data_vencimento', 'id']),
+    ('idx_vencimento_notificacao', 'vencimentos', ['status', 'notificado_email', 'data_vencimento', 'id']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        drop_index(name, table)
@@ -0,0 +1,37 @@
+"""catalog version counters
+
+Per tenant and resource (clientes, produtos, servicos) change counters behind
+the ETag of the catalog list routes. Missing rows read as version 0, so no
+backfill is needed.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from database import IdType
+from migrations.helpers import has_table
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not has_table('catalogo_versoes'):
+        op.create_table(
+            'catalogo_versoes',
+            sa.Column('id', IdType, primary_key=True),
+            sa.Column('recurso', sa.String(20), nullable=False),
+            sa.Column('versao', sa.Integer, nullable=False),
+            sa.Column('tenant_id', IdType, sa.ForeignKey('tenants.id'), nullable=False),
+            sa.Column('updated_at', sa.DateTime(timezone=True)),
+        )
+        op.create_index('idx_catalogo_versao_chave', 'catalogo_versoes', ['tenant_id', 'recurso'], unique=True)
+
+
+def downgrade():
+    op.drop_table('catalogo_versoes')
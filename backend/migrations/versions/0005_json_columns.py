@@ -0,0 +1,58 @@
+"""native JSON columns for servicos.tributacao_iss and tenants.certificado_config
+
+Both were JSON documents serialized into a Text column. Values that are not
+valid JSON (the API used to read them as null) are cleared first, then the
+column becomes JSONB on PostgreSQL and JSON (text queried with JSON1) on SQLite.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+from database import JsonType
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+COLUMNS = [('servicos', 'tributacao_iss'), ('tenants', 'certificado_config')]
+
+
+def _clear_invalid(table: str, column: str):
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(f"SELECT id, {column} FROM {table} WHERE {column} IS NOT NULL")).fetchall()
+    invalid = []
+    for row_id, value in rows:
+        try:
+            json.loads(value)
+        except (TypeError, ValueError):
+            invalid.append({"id": row_id})
+    if invalid:
+        bind.execute(sa.text(f"UPDATE {table} SET {column} = NULL WHERE id = :id"), invalid)
+
+
+def _is_json(table: str, column: str) -> bool:
+    tipo = next(c["type"] for c in sa.inspect(op.get_bind()).get_columns(table) if c["name"] == column)
+    return isinstance(tipo, sa.JSON)
+
+
+def upgrade():
+    for table, column in COLUMNS:
+        if _is_json(table, column):
+            continue
+        _clear_invalid(table, column)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(column, existing_type=sa.Text, type_=JsonType,
+                                  postgresql_using=f"{column}::jsonb")
+
+
+def downgrade():
+    for table, column in reversed(COLUMNS):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(column, existing_type=JsonType, type_=sa.Text,
+                                  postgresql_using=f"{column}::text")
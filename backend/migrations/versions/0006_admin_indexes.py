@@ -0,0 +1,58 @@
+"""indexes for the paginated super admin tenant and user listings
+
+Sort/filter indexes end in id for keyset pagination. The search matches a
+lowercased prefix (lower(col) LIKE 'abc%'), which PostgreSQL can only serve
+from lower(col) indexes with the pattern operator class; those are created on
+PostgreSQL only (SQLite answers the search by scanning the small tenants and
+users tables).
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+from migrations.helpers import create_index, drop_index
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('idx_tenant_created', 'tenants', ['created_at', 'id']),
+    ('idx_tenant_company_name', 'tenants', ['company_name', 'id']),
+    ('idx_tenant_status', 'tenants', ['subscription_status', 'created_at', 'id']),
+    ('idx_tenant_plan', 'tenants', ['plan', 'created_at', 'id']),
+    ('idx_tenant_active', 'tenants', ['is_active', 'created_at', 'id']),
+    ('idx_tenant_cnpj', 'tenants', ['cnpj']),
+    ('idx_tenant_email', 'tenants', ['email']),
+    ('idx_user_created', 'users', ['created_at', 'id']),
+    ('idx_user_name', 'users', ['name', 'id']),
+]
+
+# PostgreSQL: (name, table, expression) of the prefix search indexes
+SEARCH_INDEXES = [
+    ('idx_tenant_busca_subdomain', 'tenants', 'lower(subdomain) varchar_pattern_ops'),
+    ('idx_tenant_busca_company_name', 'tenants', 'lower(company_name) varchar_pattern_ops'),
+    ('idx_tenant_busca_cnpj', 'tenants', 'lower(cnpj) varchar_pattern_ops'),
+    ('idx_tenant_busca_email', 'tenants', 'lower(email) varchar_pattern_ops'),
+    ('idx_user_busca_email', 'users', 'lower(email) varchar_pattern_ops'),
+    ('idx_user_busca_name', 'users', 'lower(name) varchar_pattern_ops'),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        create_index(name, table, columns)
+    if op.get_bind().dialect.name == "postgresql":
+        for name, table, expression in SEARCH_INDEXES:
+            op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({expression})")
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        for name, _, _ in reversed(SEARCH_INDEXES):
+            op.execute(f"DROP INDEX IF EXISTS {name}")
+    for name, table, _ in reversed(INDEXES):
+        drop_index(name, table)
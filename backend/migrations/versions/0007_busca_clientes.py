@@ -0,0 +1,111 @@
+"""indexed cliente search (clientes.busca)
+
+clientes.busca holds the normalized nome/email/telefone/cpf_cnpj of the row
+(see normalizacao.documento_busca) and is backfilled here. The index behind
+/clientes/search depends on the database:
+
+- SQLite: the FTS5 table clientes_fts, kept in sync with clientes by
+  triggers. ``tenant`` is the tenant id without hyphens, a single token that
+  is cheap to intersect with the search terms; ``nome`` is stored unindexed
+  for ranking. Rows are located by their cliente_id phrase rather than by
+  rowid, since VACUUM may renumber the rowids of clientes (its primary key is
+  not an INTEGER).
+- PostgreSQL: a pg_trgm GIN index on busca, serving substring and similarity
+  matches. Creating the extension needs a role allowed to do so.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import has_column
+from normalizacao import documento_busca
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH = 1000
+
+_FTS_ROW = "{row}.busca, replace({row}.tenant_id, '-', ''), {row}.id, {row}.nome"
+
+SQLITE_UPGRADE = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS clientes_fts USING fts5(
+        busca, tenant, cliente_id, nome UNINDEXED,
+        tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4')""",
+    f"""CREATE TRIGGER IF NOT EXISTS clientes_fts_insert AFTER INSERT ON clientes BEGIN
+        INSERT INTO clientes_fts (busca, tenant, cliente_id, nome) VALUES ({_FTS_ROW.format(row='new')});
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS clientes_fts_delete AFTER DELETE ON clientes BEGIN
+        DELETE FROM clientes_fts WHERE clientes_fts MATCH 'cliente_id : "' || old.id || '"';
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS clientes_fts_update AFTER UPDATE OF busca, tenant_id, nome ON clientes BEGIN
+        DELETE FROM clientes_fts WHERE clientes_fts MATCH 'cliente_id : "' || old.id || '"';
+        INSERT INTO clientes_fts (busca, tenant, cliente_id, nome) VALUES ({_FTS_ROW.format(row='new')});
+    END""",
+    "DELETE FROM clientes_fts",
+    f"INSERT INTO clientes_fts (busca, tenant, cliente_id, nome) SELECT {_FTS_ROW.format(row='clientes')} FROM clientes",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS clientes_fts_update",
+    "DROP TRIGGER IF EXISTS clientes_fts_delete",
+    "DROP TRIGGER IF EXISTS clientes_fts_insert",
+    "DROP TABLE IF EXISTS clientes_fts",
+]
+
+POSTGRESQL_UPGRADE = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS idx_cliente_busca_trgm ON clientes USING gin (busca gin_trgm_ops)",
+]
+
+POSTGRESQL_DOWNGRADE = [
+    "DROP INDEX IF EXISTS idx_cliente_busca_trgm",
+]
+
+
+def _backfill():
+    bind = op.get_bind()
+    ultimo = ""
+    while True:
+        rows = bind.execute(sa.text(
+            "SELECT id, nome, email, telefone, cpf_cnpj FROM clientes "
+            "WHERE CAST(id AS VARCHAR(36)) > :ultimo ORDER BY CAST(id AS VARCHAR(36)) LIMIT :lote"
+        ), {"ultimo": ultimo, "lote": BACKFILL_BATCH}).fetchall()
+        if not rows:
+            return
+        bind.execute(
+            sa.text("UPDATE clientes SET busca = :busca WHERE id = :id"),
+            [{"id": row.id, "busca": documento_busca(row.nome, row.email, row.telefone, row.cpf_cnpj)} for row in rows],
+        )
+        ultimo = str(rows[-1].id)
+
+
+def upgrade():
+    if not has_column('clientes', 'busca'):
+        with op.batch_alter_table('clientes') as batch_op:
+            batch_op.add_column(sa.Column('busca', sa.Text))
+    _backfill()
+
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        for statement in SQLITE_UPGRADE:
+            op.execute(statement)
+    elif dialect == "postgresql":
+        for statement in POSTGRESQL_UPGRADE:
+            op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        for statement in SQLITE_DOWNGRADE:
+            op.execute(statement)
+    elif dialect == "postgresql":
+        for statement in POSTGRESQL_DOWNGRADE:
+            op.execute(statement)
+    with op.batch_alter_table('clientes') as batch_op:
+        batch_op.drop_column('busca')
@@ -0,0 +1,76 @@
+"""unique produto codigo per tenant
+
+The POS resolves scanned barcodes with /produtos/lookup, which needs
+(tenant_id, codigo) to identify one produto. Codes are trimmed and blank ones
+become NULL (NULLs never collide), then idx_produto_tenant_codigo becomes
+unique.
+
+If a tenant still has duplicated codes the upgrade stops and lists them
+(tenant_id, id, codigo), to be fixed by hand. With
+PRODUTO_CODIGO_DUPLICADOS=limpar the oldest produto of each code keeps it and
+the codigo of the others is cleared instead; every cleared row is logged.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17
+"""
+import logging
+import os
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import create_index, drop_index
+
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+INDEX = 'idx_produto_tenant_codigo'
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+
+def _resolve_duplicates():
+    bind = op.get_bind()
+    duplicates = bind.execute(sa.text(
+        "SELECT p.id, p.tenant_id, p.codigo FROM produtos p "
+        "JOIN (SELECT tenant_id, codigo FROM produtos WHERE codigo IS NOT NULL "
+        "      GROUP BY tenant_id, codigo HAVING COUNT(*) > 1) d "
+        "ON d.tenant_id = p.tenant_id AND d.codigo = p.codigo "
+        "ORDER BY p.tenant_id, p.codigo, p.created_at, p.id"
+    )).fetchall()
+    if not duplicates:
+        return
+
+    if os.environ.get('PRODUTO_CODIGO_DUPLICADOS', '').lower() != 'limpar':
+        rows = "\n".join(f"  tenant_id={row.tenant_id} id={row.id} codigo={row.codigo!r}" for row in duplicates)
+        raise RuntimeError(
+            f"{len(duplicates)} produtos share a codigo within their tenant:\n{rows}\n"
+            "Fix the codes by hand, or set PRODUTO_CODIGO_DUPLICADOS=limpar to keep "
+            "the code on the oldest produto and clear the others."
+        )
+
+    seen = set()
+    cleared = []
+    for row in duplicates:
+        key = (row.tenant_id, row.codigo)
+        if key in seen:
+            logger.warning("Clearing duplicated produto codigo: tenant_id=%s id=%s codigo=%r", row.tenant_id, row.id, row.codigo)
+            cleared.append({"id": row.id})
+        seen.add(key)
+    bind.execute(sa.text("UPDATE produtos SET codigo = NULL WHERE id = :id"), cleared)
+
+
+def upgrade():
+    op.execute("UPDATE produtos SET codigo = TRIM(codigo) WHERE codigo <> TRIM(codigo)")
+    op.execute("UPDATE produtos SET codigo = NULL WHERE codigo = ''")
+    _resolve_duplicates()
+    drop_index(INDEX, 'produtos')
+    create_index(INDEX, 'produtos', ['tenant_id', 'codigo'], unique=True)
+
+
+def downgrade():
+    drop_index(INDEX, 'produtos')
+    create_index(INDEX, 'produtos', ['tenant_id', 'codigo'])
@@ -0,0 +1,80 @@
+"""agendamentos.data_hora in UTC
+
+Until the agenda engine (agenda.py), data_hora was stored as sent by the
+agenda form: the salon's wall-clock time without an offset, kept as is by
+SQLite and read as UTC by PostgreSQL. The engine, the calendar and the
+dashboard now read data_hora as UTC, so the existing rows are converted from
+AGENDA_TIMEZONE: a 10:00 booking in America/Sao_Paulo becomes 13:00 UTC.
+
+Rows are rewritten in keyset batches. The revision must be applied together
+with the code that stores UTC; bookings made by that code are already UTC.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17
+"""
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+from agenda import AGENDA_TIMEZONE, para_utc
+from database import em_utc
+
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+BATCH = 1000
+
+agendamentos = sa.table(
+    'agendamentos',
+    sa.column('id', sa.String(36)),
+    sa.column('data_hora', sa.DateTime(timezone=True)),
+)
+
+
+def _parede(valor: datetime) -> datetime:
+    """The wall-clock time stored in ``valor``, whatever the driver returned."""
+    return em_utc(valor).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _para_utc(valor: datetime) -> datetime:
+    return para_utc(_parede(valor))
+
+
+def _para_local(valor: datetime) -> datetime:
+    return em_utc(valor).astimezone(AGENDA_TIMEZONE).replace(tzinfo=timezone.utc)
+
+
+def _converter(conversao):
+    bind = op.get_bind()
+    chave = sa.cast(agendamentos.c.id, sa.String(36))
+    atualizar = (
+        sa.update(agendamentos)
+        .where(agendamentos.c.id == sa.bindparam('b_id'))
+        .values(data_hora=sa.bindparam('b_data_hora'))
+    )
+    ultimo = ""
+    while True:
+        rows = bind.execute(
+            sa.select(agendamentos.c.id, agendamentos.c.data_hora)
+            .where(chave > ultimo)
+            .order_by(chave)
+            .limit(BATCH)
+        ).fetchall()
+        if not rows:
+            return
+        bind.execute(atualizar, [
+            {"b_id": row.id, "b_data_hora": conversao(row.data_hora)} for row in rows if row.data_hora is not None
+        ])
+        ultimo = str(rows[-1].id)
+
+
+def upgrade():
+    _converter(_para_utc)
+
+
+def downgrade():
+    _converter(_para_local)
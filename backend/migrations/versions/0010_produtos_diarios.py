@@ -0,0 +1,50 @@
+"""produtos_diarios rollup
+
+Daily per-product sales (units, revenue, cost at sale time) read by the
+dashboard and the products report instead of joining venda_itens with vendas
+over the whole history. Backfilled from venda_itens with the current
+Produto.custo (see rollups.rebuild_produtos_diarios).
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from database import IdType
+from migrations.helpers import has_table
+
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if has_table('produtos_diarios'):
+        return
+    op.create_table(
+        'produtos_diarios',
+        sa.Column('id', IdType, primary_key=True),
+        sa.Column('dia', sa.Date, nullable=False),
+        sa.Column('produto_id', sa.String(36), nullable=False),
+        sa.Column('nome', sa.String(200), nullable=False),
+        sa.Column('quantidade', sa.Float, nullable=False),
+        sa.Column('total', sa.Float, nullable=False),
+        sa.Column('custo', sa.Float, nullable=False),
+        sa.Column('tenant_id', IdType, sa.ForeignKey('tenants.id'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True)),
+    )
+    op.create_index('idx_produto_diario_chave', 'produtos_diarios', ['tenant_id', 'dia', 'produto_id'], unique=True)
+
+    from rollups import rebuild_produtos_diarios
+
+    db = Session(bind=op.get_bind())
+    rebuild_produtos_diarios(db)
+    db.flush()
+
+
+def downgrade():
+    op.drop_table('produtos_diarios')
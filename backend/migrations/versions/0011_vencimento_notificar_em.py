@@ -0,0 +1,74 @@
+"""vencimentos.notificar_em
+
+The vencimento sweep (notificacoes.varrer_vencimentos) read every unnotified
+vencimento due in the next MAX_DIAS_ANTECEDENCIA days and checked each row's
+dias_antecedencia in Python. notificar_em (data_vencimento minus
+dias_antecedencia) puts that window in the index: idx_vencimento_notificacao
+becomes (status, notificado_email, notificar_em, id) and the sweep reads only
+the rows whose window has opened.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from database import data_notificacao
+from migrations.helpers import create_index, drop_index, has_column
+
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH = 1000
+
+vencimentos = sa.table(
+    'vencimentos',
+    sa.column('id', sa.String(36)),
+    sa.column('data_vencimento', sa.DateTime(timezone=True)),
+    sa.column('dias_antecedencia', sa.Integer),
+    sa.column('notificar_em', sa.DateTime(timezone=True)),
+)
+
+
+def _backfill():
+    bind = op.get_bind()
+    chave = sa.cast(vencimentos.c.id, sa.String(36))
+    atualizar = (
+        sa.update(vencimentos)
+        .where(vencimentos.c.id == sa.bindparam('b_id'))
+        .values(notificar_em=sa.bindparam('b_notificar_em'))
+    )
+    ultimo = ""
+    while True:
+        rows = bind.execute(
+            sa.select(vencimentos.c.id, vencimentos.c.data_vencimento, vencimentos.c.dias_antecedencia)
+            .where(chave > ultimo)
+            .order_by(chave)
+            .limit(BACKFILL_BATCH)
+        ).fetchall()
+        if not rows:
+            return
+        bind.execute(atualizar, [
+            {"b_id": row.id, "b_notificar_em": data_notificacao(row.data_vencimento, row.dias_antecedencia)}
+            for row in rows
+        ])
+        ultimo = str(rows[-1].id)
+
+
+def upgrade():
+    if not has_column('vencimentos', 'notificar_em'):
+        with op.batch_alter_table('vencimentos') as batch_op:
+            batch_op.add_column(sa.Column('notificar_em', sa.DateTime(timezone=True)))
+    _backfill()
+    drop_index('idx_vencimento_notificacao', 'vencimentos')
+    create_index('idx_vencimento_notificacao', 'vencimentos', ['status', 'notificado_email', 'notificar_em', 'id'])
+
+
+def downgrade():
+    drop_index('idx_vencimento_notificacao', 'vencimentos')
+    with op.batch_alter_table('vencimentos') as batch_op:
+        batch_op.drop_column('notificar_em')
+    create_index('idx_vencimento_notificacao', 'vencimentos', ['status', 'notificado_email', 'data_vencimento', 'id'])
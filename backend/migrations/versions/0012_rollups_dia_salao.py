@@ -0,0 +1,35 @@
+"""vendas_diarias and produtos_diarios by salon day
+
+The rollups bucketed sales by UTC day, so a sale at 21:30 in
+America/Sao_Paulo counted on the next day while the agenda and
+agendamentos_hoje use the salon's day (AGENDA_TIMEZONE). Both rollups are
+rebuilt from vendas with the salon day (see rollups.dia_salao_sql).
+
+produtos_diarios is rebuilt from venda_itens, so the cost of past sales
+becomes the current Produto.custo, as in its first backfill (0010).
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-17
+"""
+from alembic import op
+from sqlalchemy.orm import Session
+
+revision = '0012'
+down_revision = '0011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    from rollups import rebuild_produtos_diarios, rebuild_vendas_diarias
+
+    db = Session(bind=op.get_bind())
+    rebuild_vendas_diarias(db)
+    rebuild_produtos_diarios(db)
+    db.flush()
+
+
+def downgrade():
+    # The UTC buckets are not restored: rows stay on the salon day
+    pass
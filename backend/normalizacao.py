@@ -0,0 +1,58 @@
+"""Text normalization for the cliente search.
+
+Both sides of the search go through the same rules: lowercase, accents
+removed ("João" -> "joao") and every run of punctuation turned into a single
+space. Phone numbers and CPF/CNPJ are additionally indexed as a single run of
+digits, so "123.456.789-09", "12345678909" and "123456" all find the same
+cliente.
+"""
+import re
+import unicodedata
+from typing import List, Optional
+
+_SEPARADORES = re.compile(r"[\W_]+")
+_NAO_DIGITOS = re.compile(r"\D+")
+_SO_NUMERO = re.compile(r"[\d\W_]+")
+
+
+def normalizar(texto: Optional[str]) -> str:
+    """``"Maria-José  D'Ávila"`` -> ``"maria jose d avila"``"""
+    if not texto:
+        return ""
+    decomposto = unicodedata.normalize("NFKD", texto)
+    sem_acento = "".join(c for c in decomposto if not unicodedata.combining(c))
+    return _SEPARADORES.sub(" ", sem_acento.lower()).strip()
+
+
+def digitos(texto: Optional[str]) -> str:
+    return _NAO_DIGITOS.sub("", texto or "")
+
+
+def documento_busca(nome: Optional[str], email: Optional[str], telefone: Optional[str], cpf_cnpj: Optional[str]) -> str:
+    """The normalized text indexed for a cliente (``Cliente.busca``)."""
+    partes = [normalizar(nome), normalizar(email)]
+    for numero in (telefone, cpf_cnpj):
+        partes.append(normalizar(numero))
+        partes.append(digitos(numero))
+    return " ".join(parte for parte in partes if parte)
+
+
+def termos_busca(q: Optional[str]) -> List[str]:
+    """Split a search box value into normalized terms.
+
+    A value made only of digits and punctuation is a phone or document number
+    and becomes one digits-only term; otherwise each word is normalized on its
+    own ("(11) 9876" -> ["119876"], "ana 123.4" -> ["ana", "1234"]).
+    """
+    q = (q or "").strip()
+    if not q:
+        return []
+    if _SO_NUMERO.fullmatch(q):
+        return [termo for termo in [digitos(q)] if termo]
+    termos = []
+    for palavra in q.split():
+        if _SO_NUMERO.fullmatch(palavra):
+            termos.append(digitos(palavra))
+        else:
+            termos.extend(normalizar(palavra).split())
+    return [termo for termo in termos if termo]
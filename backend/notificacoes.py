@@ -0,0 +1,220 @@
+"""Vencimento email notifications.
+
+``varrer_vencimentos`` finds every active, not yet notified vencimento of an
+active tenant whose ``dias_antecedencia`` window has opened, with one range
+scan on idx_vencimento_notificacao (status, notificado_email, notificar_em)
+read in keyset batches; ``notificar_em`` is data_vencimento minus
+dias_antecedencia, kept by the Vencimento model. Each batch is rendered,
+queued in the email outbox with one bulk INSERT and marked notified with one
+bulk UPDATE in the same transaction, so a message is queued exactly once.
+
+``VencimentoSweeper`` runs the sweep inside the API process every
+VENCIMENTO_SWEEP_INTERVAL seconds; it can also be run from cron:
+
+    python notificacoes.py
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv(Path(__file__).parent / '.env')
+
+from sqlalchemy import and_, or_, update
+from sqlalchemy.orm import Session
+
+from database import SessionLocal, Tenant, User, Vencimento, em_utc
+from outbox import enfileirar_emails
+
+VENCIMENTO_SWEEP_INTERVAL = float(os.environ.get('VENCIMENTO_SWEEP_INTERVAL', '3600'))  # seconds
+VENCIMENTO_SWEEP_BATCH_SIZE = int(os.environ.get('VENCIMENTO_SWEEP_BATCH_SIZE', '500'))
+VENCIMENTO_SWEEP_ENABLED = os.environ.get('VENCIMENTO_SWEEP_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+# Upper bound of dias_antecedencia; the sweep skips windows opened longer ago than this
+MAX_DIAS_ANTECEDENCIA = int(os.environ.get('MAX_DIAS_ANTECEDENCIA', '365'))
+
+logger = logging.getLogger(__name__)
+
+
+def render_notificacao_vencimento(vencimento: Vencimento, nome_destinatario: str,
+                                  agora: Optional[datetime] = None) -> Dict[str, str]:
+    """Subject and HTML body of the notification about ``vencimento``."""
+    agora = agora or datetime.now(timezone.utc)
+    dias_restantes = (em_utc(vencimento.data_vencimento) - agora).days
+
+    conteudo_html = f"""
+    <h2>🚨 Vencimento Próximo</h2>
+    <p>Olá {nome_destinatario},</p>
+    <p>Você tem um vencimento próximo que requer atenção:</p>
+
+    <div style="background-color: #f8f9fa; padding: 20px; border-radius: 8px; margin: 20px 0;">
+        <h3 style="color: #dc2626;">{vencimento.tipo}</h3>
+        <p><strong>Descrição:</strong> {vencimento.descricao or 'N/A'}</p>
+        <p><strong>Data de Vencimento:</strong> {vencimento.data_vencimento.strftime('%d/%m/%Y')}</p>
+        <p><strong>Valor:</strong> R$ {vencimento.valor or 0:,.2f}</p>
+        <p><strong>Dias restantes:</strong> {dias_restantes} dias</p>
+    </div>
+
+    <p>Não esqueça de renovar antes do vencimento para evitar interrupções nos serviços.</p>
+    <p>Em caso de dúvidas, entre em contato com o suporte.</p>
+    """
+    return {"assunto": f"Vencimento próximo: {vencimento.tipo}", "conteudo_html": conteudo_html}
+
+
+def _administradores(db: Session, tenant_ids) -> Dict[str, User]:
+    """First active admin of each tenant, used when a vencimento has no email_notificacao."""
+    administradores = {}
+    if not tenant_ids:
+        return administradores
+    rows = (
+        db.query(User)
+        .filter(User.tenant_id.in_(tenant_ids), User.role == "admin_empresa", User.is_active == True)
+        .order_by(User.tenant_id, User.created_at)
+    )
+    for user in rows:
+        administradores.setdefault(str(user.tenant_id), user)
+    return administradores
+
+
+def varrer_vencimentos(db: Session, agora: Optional[datetime] = None,
+                       batch_size: int = VENCIMENTO_SWEEP_BATCH_SIZE) -> Dict[str, int]:
+    """Queue notifications for every vencimento whose window is open. Commits per batch."""
+    agora = agora or datetime.now(timezone.utc)
+    abertura = agora - timedelta(days=MAX_DIAS_ANTECEDENCIA)
+    resultado = {"lidos": 0, "notificados": 0, "sem_destinatario": 0}
+    ultimo = None
+
+    while True:
+        query = (
+            db.query(Vencimento, Tenant.email, Tenant.company_name)
+            .join(Tenant, Tenant.id == Vencimento.tenant_id)
+            .filter(
+                Vencimento.status == "ativo",
+                Vencimento.notificado_email == False,
+                Vencimento.notificar_em >= abertura,
+                Vencimento.notificar_em <= agora,
+                Vencimento.data_vencimento >= agora,
+                Tenant.is_active == True,
+            )
+        )
+        if ultimo is not None:
+            notificar_em, vencimento_id = ultimo
+            query = query.filter(or_(
+                Vencimento.notificar_em > notificar_em,
+                and_(Vencimento.notificar_em == notificar_em, Vencimento.id > vencimento_id),
+            ))
+        lote = (
+            query.order_by(Vencimento.notificar_em, Vencimento.id)
+            .limit(batch_size)
+            .with_for_update(of=Vencimento, skip_locked=True)
+            .all()
+        )
+        if not lote:
+            return resultado
+        resultado["lidos"] += len(lote)
+        ultimo = (lote[-1][0].notificar_em, lote[-1][0].id)
+
+        administradores = _administradores(
+            db, {vencimento.tenant_id for vencimento, _, _ in lote if not vencimento.email_notificacao}
+        )
+
+        mensagens, notificados = [], []
+        for vencimento, tenant_email, company_name in lote:
+            admin = administradores.get(str(vencimento.tenant_id))
+            destinatario = vencimento.email_notificacao or (admin.email if admin else tenant_email)
+            if not destinatario:
+                resultado["sem_destinatario"] += 1
+                continue
+            email = render_notificacao_vencimento(vencimento, admin.name if admin else company_name, agora)
+            mensagens.append({"destinatario": destinatario, "tenant_id": vencimento.tenant_id, **email})
+            notificados.append(vencimento.id)
+
+        if notificados:
+            enfileirar_emails(db, mensagens)
+            db.execute(
+                update(Vencimento)
+                .where(Vencimento.id.in_(notificados))
+                .values(notificado_email=True)
+                .execution_options(synchronize_session=False)
+            )
+        db.commit()
+        resultado["notificados"] += len(notificados)
+
+        if len(lote) < batch_size:
+            return resultado
+
+
+class VencimentoSweeper:
+    """Background task running varrer_vencimentos every ``interval`` seconds."""
+
+    def __init__(self, interval: float = VENCIMENTO_SWEEP_INTERVAL, on_notify=None):
+        self.interval = interval
+        self.on_notify = on_notify  # called after a sweep queued emails (wakes the outbox worker)
+        self._task: Optional[asyncio.Task] = None
+        self.execucoes = 0
+        self.notificados = 0
+        self.ultima_execucao: Optional[datetime] = None
+        self.ultimo_erro: Optional[str] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                resultado = await asyncio.to_thread(self._executar)
+                self.execucoes += 1
+                self.notificados += resultado["notificados"]
+                self.ultima_execucao = datetime.now(timezone.utc)
+                if resultado["notificados"] and self.on_notify:
+                    self.on_notify()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("Vencimento sweep failed")
+                self.ultimo_erro = str(e)
+            await asyncio.sleep(self.interval)
+
+    def _executar(self) -> Dict[str, int]:
+        db = SessionLocal()
+        try:
+            return varrer_vencimentos(db)
+        finally:
+            db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None,
+            "interval_seconds": self.interval,
+            "runs": self.execucoes,
+            "notified": self.notificados,
+            "last_run": self.ultima_execucao.isoformat() if self.ultima_execucao else None,
+            "last_error": self.ultimo_erro,
+        }
+
+
+def main():
+    db = SessionLocal()
+    try:
+        resultado = varrer_vencimentos(db)
+        print(f"vencimentos notified: {resultado['notificados']} (scanned {resultado['lidos']})")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""Durable outbox for outgoing email.
+
+Routes call ``enfileirar_email`` inside their own transaction, so the message
+is committed together with the change that triggered it and the response
+never waits on the mail provider. ``OutboxWorker`` runs inside the API process
+and drains the table in batches:
+
+* a batch of due rows is claimed with one UPDATE (status ``enviando``, a claim
+  token in ``lote`` and a lease in ``proxima_tentativa``), so several worker
+  processes never send the same message; rows of a crashed worker become due
+  again when the lease expires;
+* every claimed message goes through the configured transport;
+* sent rows are marked in one UPDATE, failed rows are rescheduled with
+  exponential backoff until OUTBOX_MAX_ATTEMPTS, then marked ``falhou``.
+
+The transport is chosen by EMAIL_TRANSPORT: ``resend`` (default when
+RESEND_API_KEY is set), ``log`` (prints, default otherwise) or ``stub``
+(keeps messages in memory, for tests).
+"""
+import asyncio
+import logging
+import os
+import threading
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func, insert, or_, update
+from sqlalchemy.orm import Session
+
+from database import EmailOutbox, SessionLocal
+
+OUTBOX_BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', '50'))
+OUTBOX_POLL_INTERVAL = float(os.environ.get('OUTBOX_POLL_INTERVAL', '5'))  # seconds
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', '8'))
+OUTBOX_BACKOFF_BASE = float(os.environ.get('OUTBOX_BACKOFF_BASE', '30'))  # seconds, doubled per attempt
+OUTBOX_BACKOFF_MAX = float(os.environ.get('OUTBOX_BACKOFF_MAX', '3600'))
+OUTBOX_LEASE = float(os.environ.get('OUTBOX_LEASE', '300'))  # seconds a claimed batch stays reserved
+OUTBOX_WORKER_ENABLED = os.environ.get('OUTBOX_WORKER_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+EMAIL_FROM = os.environ.get('EMAIL_FROM', 'ERP Sistema <noreply@sistema.com>')
+
+logger = logging.getLogger(__name__)
+
+
+# Transports
+
+class ResendTransport:
+    def __init__(self, api_key: str):
+        import resend
+        resend.api_key = api_key
+        self._resend = resend
+
+    def send(self, destinatario: str, assunto: str, conteudo_html: str):
+        self._resend.Emails.send({
+            "from": EMAIL_FROM,
+            "to": [destinatario],
+            "subject": assunto,
+            "html": conteudo_html,
+        })
+
+
+class LogTransport:
+    def send(self, destinatario: str, assunto: str, conteudo_html: str):
+        print(f"Email simulation - To: {destinatario}, Subject: {assunto}")
+
+
+@dataclass
+class EmailEnviado:
+    destinatario: str
+    assunto: str
+    conteudo_html: str
+
+
+class StubTransport:
+    """Keeps sent messages in ``enviados``; ``falhas`` makes the next N sends raise."""
+
+    def __init__(self):
+        self.enviados: List[EmailEnviado] = []
+        self.falhas = 0
+        self._lock = threading.Lock()
+
+    def send(self, destinatario: str, assunto: str, conteudo_html: str):
+        with self._lock:
+            if self.falhas > 0:
+                self.falhas -= 1
+                raise RuntimeError("stub transport failure")
+            self.enviados.append(EmailEnviado(destinatario, assunto, conteudo_html))
+
+
+def transport_from_env():
+    nome = os.environ.get('EMAIL_TRANSPORT')
+    api_key = os.environ.get('RESEND_API_KEY')
+    if not nome:
+        nome = "resend" if api_key else "log"
+    if nome == "resend":
+        if not api_key:
+            raise ValueError("EMAIL_TRANSPORT=resend requires RESEND_API_KEY")
+        return ResendTransport(api_key)
+    if nome == "log":
+        return LogTransport()
+    if nome == "stub":
+        return StubTransport()
+    raise ValueError(f"Unknown EMAIL_TRANSPORT: {nome}")
+
+
+_transport = None
+
+
+def get_transport():
+    global _transport
+    if _transport is None:
+        _transport = transport_from_env()
+    return _transport
+
+
+def set_transport(transport):
+    """Replace the transport (tests, or wiring another provider)."""
+    global _transport
+    _transport = transport
+
+
+# Queue
+
+def enfileirar_email(db: Session, destinatario: str, assunto: str, conteudo_html: str, tenant_id=None) -> EmailOutbox:
+    """Queue an email in the caller's transaction. The caller commits."""
+    mensagem = EmailOutbox(
+        destinatario=destinatario,
+        assunto=assunto,
+        conteudo_html=conteudo_html,
+        tenant_id=tenant_id,
+    )
+    db.add(mensagem)
+    return mensagem
+
+
+def enfileirar_emails(db: Session, mensagens: List[Dict[str, Any]]) -> int:
+    """Queue many emails with one bulk INSERT. Each dict has destinatario,
+    assunto, conteudo_html and optionally tenant_id. The caller commits."""
+    if not mensagens:
+        return 0
+    agora = datetime.now(timezone.utc)
+    db.execute(insert(EmailOutbox), [
+        {
+            "id": str(uuid.uuid4()),
+            "destinatario": mensagem["destinatario"],
+            "assunto": mensagem["assunto"],
+            "conteudo_html": mensagem["conteudo_html"],
+            "tenant_id": mensagem.get("tenant_id"),
+            "status": "pendente",
+            "tentativas": 0,
+            "proxima_tentativa": agora,
+            "created_at": agora,
+        }
+        for mensagem in mensagens
+    ])
+    return len(mensagens)
+
+
+def backoff(tentativas: int) -> timedelta:
+    """Delay before retrying a message that failed ``tentativas`` times."""
+    return timedelta(seconds=min(OUTBOX_BACKOFF_BASE * 2 ** (tentativas - 1), OUTBOX_BACKOFF_MAX))
+
+
+def reservar_lote(db: Session, batch_size: int = OUTBOX_BATCH_SIZE) -> List[EmailOutbox]:
+    """Claim up to ``batch_size`` due messages for this worker and commit the claim."""
+    agora = datetime.now(timezone.utc)
+    devidos = (
+        db.query(EmailOutbox.id)
+        .filter(
+            or_(EmailOutbox.status == "pendente", EmailOutbox.status == "enviando"),
+            EmailOutbox.proxima_tentativa <= agora,
+        )
+        .order_by(EmailOutbox.proxima_tentativa)
+        .limit(batch_size)
+    )
+    lote = str(uuid.uuid4())
+    # Re-checking the due condition makes the claim safe against a concurrent worker
+    db.execute(
+        update(EmailOutbox)
+        .where(
+            EmailOutbox.id.in_(devidos.scalar_subquery()),
+            or_(EmailOutbox.status == "pendente", EmailOutbox.status == "enviando"),
+            EmailOutbox.proxima_tentativa <= agora,
+        )
+        .values(
+            status="enviando",
+            lote=lote,
+            tentativas=EmailOutbox.tentativas + 1,
+            proxima_tentativa=agora + timedelta(seconds=OUTBOX_LEASE),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return db.query(EmailOutbox).filter(EmailOutbox.lote == lote).all()
+
+
+def processar_lote(db: Session, transport=None, batch_size: int = OUTBOX_BATCH_SIZE) -> Dict[str, int]:
+    """Send one batch. Returns the number of messages sent, retried and failed."""
+    transport = transport or get_transport()
+    mensagens = reservar_lote(db, batch_size)
+    enviados, erros = [], []
+    for mensagem in mensagens:
+        try:
+            transport.send(mensagem.destinatario, mensagem.assunto, mensagem.conteudo_html)
+            enviados.append(mensagem.id)
+        except Exception as e:
+            logger.warning("Email %s to %s failed (attempt %s): %s", mensagem.id, mensagem.destinatario, mensagem.tentativas, e)
+            erros.append((mensagem, str(e)))
+
+    agora = datetime.now(timezone.utc)
+    if enviados:
+        db.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id.in_(enviados))
+            .values(status="enviado", enviado_em=agora, lote=None, ultimo_erro=None)
+            .execution_options(synchronize_session=False)
+        )
+    falhou = 0
+    for mensagem, erro in erros:
+        mensagem.lote = None
+        mensagem.ultimo_erro = erro[:1000]
+        if mensagem.tentativas >= OUTBOX_MAX_ATTEMPTS:
+            mensagem.status = "falhou"
+            falhou += 1
+        else:
+            mensagem.status = "pendente"
+            mensagem.proxima_tentativa = agora + backoff(mensagem.tentativas)
+    db.commit()
+    return {"enviados": len(enviados), "reagendados": len(erros) - falhou, "falhou": falhou}
+
+
+def drenar(db: Session, transport=None, batch_size: int = OUTBOX_BATCH_SIZE) -> Dict[str, int]:
+    """Process batches until no message is due."""
+    total = {"enviados": 0, "reagendados": 0, "falhou": 0}
+    while True:
+        resultado = processar_lote(db, transport, batch_size)
+        for chave, valor in resultado.items():
+            total[chave] += valor
+        if sum(resultado.values()) < batch_size:
+            return total
+
+
+def contagem_por_status(db: Session) -> Dict[str, int]:
+    return dict(db.query(EmailOutbox.status, func.count(EmailOutbox.id)).group_by(EmailOutbox.status).all())
+
+
+# Worker
+
+class OutboxWorker:
+    """Background task draining the outbox every OUTBOX_POLL_INTERVAL seconds.
+
+    ``notify`` wakes it right away; routes call it after committing a message
+    so emails go out immediately rather than on the next poll.
+    """
+
+    def __init__(self, poll_interval: float = OUTBOX_POLL_INTERVAL):
+        self.poll_interval = poll_interval
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._lock = threading.Lock()
+        self.ciclos = 0
+        self.enviados = 0
+        self.reagendados = 0
+        self.falhou = 0
+        self.ultimo_erro: Optional[str] = None
+
+    def start(self):
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = self._loop.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def notify(self):
+        """Wake the worker; safe to call from any thread."""
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _run(self):
+        while True:
+            try:
+                resultado = await asyncio.to_thread(self._ciclo)
+                with self._lock:
+                    self.ciclos += 1
+                    self.enviados += resultado["enviados"]
+                    self.reagendados += resultado["reagendados"]
+                    self.falhou += resultado["falhou"]
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("Outbox worker cycle failed")
+                self.ultimo_erro = str(e)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def _ciclo(self) -> Dict[str, int]:
+        db = SessionLocal()
+        try:
+            return drenar(db)
+        finally:
+            db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "running": self._task is not None,
+                "poll_interval_seconds": self.poll_interval,
+                "cycles": self.ciclos,
+                "sent": self.enviados,
+                "retried": self.reagendados,
+                "failed": self.falhou,
+                "last_error": self.ultimo_erro,
+            }
+
+
+outbox_worker = OutboxWorker()
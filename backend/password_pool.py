@@ -0,0 +1,90 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+# Dedicated thread pool for bcrypt work.
+#
+# bcrypt is deliberately slow (tens of ms per hash) and releases the GIL, so
+# running it on the event loop stalls every other request on the worker while
+# running it in a small pool of its own keeps POS traffic flowing during login
+# bursts. The pool is bounded by PASSWORD_HASH_CONCURRENCY threads and at most
+# PASSWORD_QUEUE_LIMIT waiting jobs; beyond that callers get PasswordPoolBusy.
+
+PASSWORD_HASH_CONCURRENCY = int(os.environ.get('PASSWORD_HASH_CONCURRENCY', str(min(4, os.cpu_count() or 1))))
+PASSWORD_QUEUE_LIMIT = int(os.environ.get('PASSWORD_QUEUE_LIMIT', '256'))
+
+
+class PasswordPoolBusy(Exception):
+    """Raised when the password pool queue is full"""
+
+
+class PasswordPool:
+    def __init__(self, max_workers: int, queue_limit: int):
+        self.max_workers = max_workers
+        self.queue_limit = queue_limit
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._cancelled = 0
+        self._max_queue_depth = 0
+        self._total_wait = 0.0
+        self._total_run = 0.0
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        with self._lock:
+            if self._queued >= self.queue_limit:
+                self._rejected += 1
+                raise PasswordPoolBusy()
+            self._queued += 1
+            self._max_queue_depth = max(self._max_queue_depth, self._queued)
+        submitted = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                self._total_wait += started - submitted
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._completed += 1
+                    self._total_run += time.perf_counter() - started
+
+        future = self._executor.submit(job)
+        future.add_done_callback(self._discard_cancelled)
+        # Cancelling the awaiting request cancels the job if it has not started
+        return await asyncio.wrap_future(future)
+
+    def _discard_cancelled(self, future):
+        # A job cancelled while waiting never runs, so it leaves the queue here
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+                self._cancelled += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "queue_limit": self.queue_limit,
+                "queue_depth": self._queued,
+                "running": self._running,
+                "max_queue_depth": self._max_queue_depth,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "cancelled": self._cancelled,
+                "avg_wait_ms": (self._total_wait / self._completed * 1000) if self._completed else 0.0,
+                "avg_run_ms": (self._total_run / self._completed * 1000) if self._completed else 0.0,
+            }
+
+
+password_pool = PasswordPool(PASSWORD_HASH_CONCURRENCY, PASSWORD_QUEUE_LIMIT)
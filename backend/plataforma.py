@@ -0,0 +1,97 @@
+"""Super admin (platform) dashboard.
+
+Tenant counts, the user count and the monthly recurring revenue come from a
+single conditional-aggregation query over ``tenants``. Revenue is the sum of
+the plan prices (PLAN_PRICES) of the paying tenants: active and with an
+``active`` subscription (trials pay nothing). The result is kept as a
+snapshot for SUPER_ADMIN_DASHBOARD_TTL seconds. Creating a tenant or
+toggling its status drops the snapshot, so the console does not rescan the
+table on every load.
+"""
+import os
+import threading
+from typing import Any, Dict
+
+from sqlalchemy import and_, case, func, select
+from sqlalchemy.orm import Session
+
+from auth_cache import TTLCache
+from database import Tenant, User
+
+SUPER_ADMIN_DASHBOARD_TTL = float(os.environ.get('SUPER_ADMIN_DASHBOARD_TTL', '30'))  # seconds
+RECENT_SIGNUPS_LIMIT = 5
+
+
+def _precos(valor: str) -> Dict[str, float]:
+    """``basic=49.90,premium=89.90`` -> {"basic": 49.9, "premium": 89.9}"""
+    precos = {}
+    for par in valor.split(","):
+        if "=" in par:
+            plano, preco = par.split("=", 1)
+            precos[plano.strip()] = float(preco)
+    return precos
+
+
+# Monthly price of each plan
+PLAN_PRICES = _precos(os.environ.get('PLAN_PRICES', 'basic=49.90,premium=89.90,enterprise=199.90'))
+
+_SNAPSHOT = "snapshot"
+snapshot_cache = TTLCache(1, SUPER_ADMIN_DASHBOARD_TTL)
+# Bumped by every invalidation; a snapshot computed across one is not stored
+_geracao = 0
+_geracao_lock = threading.Lock()
+
+
+def resumo_plataforma(db: Session) -> Dict[str, Any]:
+    ativo = Tenant.is_active == True
+    pagante = and_(ativo, Tenant.subscription_status == "active")
+    preco = case(PLAN_PRICES, value=Tenant.plan, else_=0.0) if PLAN_PRICES else 0.0
+    total_users = select(func.count(User.id)).where(User.role != "super_admin").scalar_subquery()
+
+    total, ativos, trial, suspensos, receita, usuarios = db.query(
+        func.count(Tenant.id),
+        func.coalesce(func.sum(case((ativo, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((Tenant.subscription_status == "trial", 1), else_=0)), 0),
+        func.coalesce(func.sum(case((Tenant.is_active == False, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((pagante, preco), else_=0.0)), 0.0),
+        total_users,
+    ).one()
+
+    recentes = (
+        db.query(Tenant.company_name, Tenant.subdomain, Tenant.created_at, Tenant.plan)
+        .order_by(Tenant.created_at.desc())
+        .limit(RECENT_SIGNUPS_LIMIT)
+        .all()
+    )
+    return {
+        "total_tenants": int(total),
+        "active_tenants": int(ativos),
+        "trial_tenants": int(trial),
+        "suspended_tenants": int(suspensos),
+        "total_users": int(usuarios or 0),
+        "monthly_revenue": round(float(receita), 2),
+        "recent_signups": [
+            {"company_name": company_name, "subdomain": subdomain, "created_at": created_at.isoformat(), "plan": plan}
+            for company_name, subdomain, created_at, plan in recentes
+        ],
+    }
+
+
+def dashboard_plataforma(db: Session) -> Dict[str, Any]:
+    """The cached snapshot, recomputed when missing or expired."""
+    snapshot = snapshot_cache.get(_SNAPSHOT)
+    if snapshot is None:
+        geracao = _geracao
+        snapshot = resumo_plataforma(db)
+        with _geracao_lock:
+            if geracao == _geracao:
+                snapshot_cache.set(_SNAPSHOT, snapshot)
+    return snapshot
+
+
+def invalidar_dashboard_plataforma():
+    """Drop the snapshot; call after committing a change to a tenant."""
+    global _geracao
+    with _geracao_lock:
+        _geracao += 1
+        snapshot_cache.invalidate(_SNAPSHOT)
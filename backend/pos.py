@@ -0,0 +1,51 @@
+"""Bootstrap payload of the POS screen.
+
+One request returns everything the POS needs to start: the product catalog
+with stock, the services with prices and an id/name index of the clients,
+each read as plain columns in name order. The rendered JSON is cached per
+tenant under the catalog ETag (see versoes.py): any write to the three
+resources changes the ETag, so a cached body is never served stale, and
+tenants whose catalog did not change skip the three queries altogether.
+"""
+import os
+from typing import Optional
+
+import orjson
+from sqlalchemy.orm import Session
+
+from auth_cache import TTLCache
+from database import Cliente, Produto, Servico
+from serializacao import ORJSON_OPTIONS, colunas, registros
+
+POS_BOOTSTRAP_CACHE_SIZE = int(os.environ.get('POS_BOOTSTRAP_CACHE_SIZE', '256'))  # tenants
+POS_BOOTSTRAP_CACHE_TTL = float(os.environ.get('POS_BOOTSTRAP_CACHE_TTL', '600'))  # seconds
+
+PRODUTO_CAMPOS = ["id", "codigo", "nome", "descricao", "categoria", "preco", "estoque_atual"]
+SERVICO_CAMPOS = ["id", "nome", "descricao", "duracao_minutos", "preco"]
+CLIENTE_CAMPOS = ["id", "nome"]
+
+# tenant id -> (etag, rendered body)
+bootstrap_cache = TTLCache(POS_BOOTSTRAP_CACHE_SIZE, POS_BOOTSTRAP_CACHE_TTL)
+
+
+def montar_bootstrap(db: Session, tenant_id) -> bytes:
+    def ler(model, campos):
+        rows = db.query(*colunas(model, campos)).filter(model.tenant_id == tenant_id).order_by(model.nome, model.id)
+        return registros(rows, campos)
+
+    return orjson.dumps({
+        "produtos": ler(Produto, PRODUTO_CAMPOS),
+        "servicos": ler(Servico, SERVICO_CAMPOS),
+        "clientes": ler(Cliente, CLIENTE_CAMPOS),
+    }, option=ORJSON_OPTIONS)
+
+
+def bootstrap_pos(db: Session, tenant_id, etag: str) -> bytes:
+    """The POS payload of ``tenant_id`` at catalog version ``etag``, from the cache when possible."""
+    chave = str(tenant_id)
+    cached: Optional[tuple] = bootstrap_cache.get(chave)
+    if cached and cached[0] == etag:
+        return cached[1]
+    corpo = montar_bootstrap(db, tenant_id)
+    bootstrap_cache.set(chave, (etag, corpo))
+    return corpo
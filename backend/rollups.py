@@ -0,0 +1,272 @@
+"""Daily sales rollups: vendas_diarias and, per product, produtos_diarios.
+
+create_venda calls ``registrar_venda`` in its own transaction, so the rollups
+are always in step with ``vendas``. Sales are bucketed by the salon's day
+(AGENDA_TIMEZONE), like the agenda and the dashboard's agendamentos_hoje. produtos_diarios keeps the cost of the
+units at sale time; the dashboard reads revenue, cost and the best-selling
+products from these rows instead of joining venda_itens with vendas. To
+backfill or repair them from the existing sales run:
+
+    python rollups.py [--tenant TENANT_ID]
+"""
+import argparse
+import uuid
+from datetime import date, datetime, timezone
+from typing import Optional
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv(Path(__file__).parent / '.env')
+
+from sqlalchemy import and_, cast, func, insert, select
+from sqlalchemy.orm import Session
+
+from agenda import AGENDA_TIMEZONE
+from database import Produto, ProdutoDiario, SessionLocal, Venda, VendaDiaria, VendaItem, em_utc
+
+REBUILD_CHUNK_SIZE = 1000
+
+
+def dia_salao(valor: datetime) -> date:
+    """The salon day (AGENDA_TIMEZONE) of a stored UTC datetime."""
+    return em_utc(valor).astimezone(AGENDA_TIMEZONE).date()
+
+
+def _dia_salao_sqlite(valor: Optional[str]) -> Optional[str]:
+    return dia_salao(datetime.fromisoformat(valor)).isoformat() if valor else None
+
+
+def dia_salao_sql(db: Session, column):
+    """SQL expression for the salon day of a DateTime column (UTC on other dialects)."""
+    dialect = db.bind.dialect.name
+    if dialect == "postgresql":
+        return func.date(func.timezone(AGENDA_TIMEZONE.key, column))
+    if dialect == "sqlite":
+        # SQLite has no time zone database: the conversion runs in Python
+        db.connection().connection.create_function("dia_salao", 1, _dia_salao_sqlite, deterministic=True)
+        return func.dia_salao(column)
+    return func.date(column)
+
+
+def _upsert(db: Session):
+    if db.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as upsert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as upsert
+    return upsert
+
+
+def registrar_venda(db: Session, venda: Venda):
+    """Add ``venda`` to its (tenant, day, payment method, seller) rollup row
+    and its products to their (tenant, day, product) rows.
+
+    Uses atomic upserts so concurrent sales on the same day never lose an
+    increment. Must run in the same transaction that inserts the sale.
+    """
+    created_at = venda.created_at or datetime.now(timezone.utc)
+    valores = {
+        "tenant_id": venda.tenant_id,
+        "dia": dia_salao(created_at),
+        "forma_pagamento": venda.forma_pagamento,
+        "vendedor_id": venda.vendedor_id,
+    }
+    bruto = venda.subtotal or 0.0
+    desconto = venda.desconto_total or 0.0
+
+    registrar_produtos(db, venda.tenant_id, valores["dia"], venda.itens_venda)
+
+    if db.bind.dialect.name in ("sqlite", "postgresql"):
+        stmt = _upsert(db)(VendaDiaria).values(
+            **valores, total_bruto=bruto, desconto=desconto, quantidade=1,
+            updated_at=datetime.now(timezone.utc),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["tenant_id", "dia", "forma_pagamento", "vendedor_id"],
+            set_={
+                "total_bruto": VendaDiaria.total_bruto + stmt.excluded.total_bruto,
+                "desconto": VendaDiaria.desconto + stmt.excluded.desconto,
+                "quantidade": VendaDiaria.quantidade + 1,
+                "updated_at": stmt.excluded.updated_at,
+            },
+        )
+        db.execute(stmt)
+        return
+
+    # Generic dialects: increment, inserting the row on the first sale of the day
+    atualizados = db.query(VendaDiaria).filter_by(**valores).update({
+        VendaDiaria.total_bruto: VendaDiaria.total_bruto + bruto,
+        VendaDiaria.desconto: VendaDiaria.desconto + desconto,
+        VendaDiaria.quantidade: VendaDiaria.quantidade + 1,
+    }, synchronize_session=False)
+    if not atualizados:
+        db.add(VendaDiaria(**valores, total_bruto=bruto, desconto=desconto, quantidade=1))
+
+
+def registrar_produtos(db: Session, tenant_id, dia: date, itens):
+    """Add the "produto" items of a sale (VendaItem-like objects) to produtos_diarios."""
+    por_produto = {}
+    for item in itens:
+        if item.tipo != "produto":
+            continue
+        linha = por_produto.setdefault(str(item.item_id), {"nome": item.nome, "quantidade": 0.0, "total": 0.0})
+        linha["quantidade"] += item.quantidade or 0.0
+        linha["total"] += item.total or 0.0
+    if not por_produto:
+        return
+
+    custos = {
+        str(produto_id): custo or 0.0
+        for produto_id, custo in db.query(Produto.id, Produto.custo)
+        .filter(Produto.tenant_id == tenant_id, Produto.id.in_(list(por_produto)))
+    }
+    agora = datetime.now(timezone.utc)
+    # Fixed order, so two sales of the same products cannot deadlock
+    linhas = [
+        {
+            "id": str(uuid.uuid4()), "tenant_id": tenant_id, "dia": dia, "produto_id": produto_id,
+            "nome": linha["nome"], "quantidade": linha["quantidade"], "total": linha["total"],
+            "custo": linha["quantidade"] * custos.get(produto_id, 0.0), "updated_at": agora,
+        }
+        for produto_id, linha in sorted(por_produto.items())
+    ]
+
+    if db.bind.dialect.name in ("sqlite", "postgresql"):
+        stmt = _upsert(db)(ProdutoDiario)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["tenant_id", "dia", "produto_id"],
+            set_={
+                "nome": stmt.excluded.nome,
+                "quantidade": ProdutoDiario.quantidade + stmt.excluded.quantidade,
+                "total": ProdutoDiario.total + stmt.excluded.total,
+                "custo": ProdutoDiario.custo + stmt.excluded.custo,
+                "updated_at": stmt.excluded.updated_at,
+            },
+        )
+        db.execute(stmt, linhas)
+        return
+
+    # Generic dialects: increment, inserting the row on the first sale of the day
+    for linha in linhas:
+        atualizados = db.query(ProdutoDiario).filter_by(
+            tenant_id=tenant_id, dia=dia, produto_id=linha["produto_id"]
+        ).update({
+            ProdutoDiario.nome: linha["nome"],
+            ProdutoDiario.quantidade: ProdutoDiario.quantidade + linha["quantidade"],
+            ProdutoDiario.total: ProdutoDiario.total + linha["total"],
+            ProdutoDiario.custo: ProdutoDiario.custo + linha["custo"],
+        }, synchronize_session=False)
+        if not atualizados:
+            db.execute(insert(ProdutoDiario), [linha])
+
+
+def rebuild_vendas_diarias(db: Session, tenant_id=None) -> int:
+    """Recompute the rollup from ``vendas`` with a single GROUP BY query.
+
+    Returns the number of rollup rows written. The caller commits.
+    """
+    delete = db.query(VendaDiaria)
+    if tenant_id:
+        delete = delete.filter(VendaDiaria.tenant_id == tenant_id)
+    delete.delete(synchronize_session=False)
+
+    dia = dia_salao_sql(db, Venda.created_at)
+    origem = select(
+        Venda.tenant_id,
+        dia,
+        Venda.forma_pagamento,
+        Venda.vendedor_id,
+        func.sum(Venda.subtotal),
+        func.sum(func.coalesce(Venda.desconto_total, 0.0)),
+        func.count(Venda.id),
+    ).group_by(Venda.tenant_id, dia, Venda.forma_pagamento, Venda.vendedor_id)
+    if tenant_id:
+        origem = origem.where(Venda.tenant_id == tenant_id)
+
+    # The grouped result is small (days x payment methods x sellers), so it is
+    # fetched and bulk-inserted to keep the Python-side uuid primary keys
+    linhas = [
+        {
+            "id": str(uuid.uuid4()),
+            "tenant_id": row_tenant_id,
+            "dia": date.fromisoformat(dia_valor) if isinstance(dia_valor, str) else dia_valor,
+            "forma_pagamento": forma_pagamento,
+            "vendedor_id": vendedor_id,
+            "total_bruto": bruto or 0.0,
+            "desconto": desconto or 0.0,
+            "quantidade": quantidade,
+        }
+        for row_tenant_id, dia_valor, forma_pagamento, vendedor_id, bruto, desconto, quantidade in db.execute(origem)
+    ]
+    for inicio in range(0, len(linhas), REBUILD_CHUNK_SIZE):
+        db.execute(insert(VendaDiaria), linhas[inicio:inicio + REBUILD_CHUNK_SIZE])
+    return len(linhas)
+
+
+def rebuild_produtos_diarios(db: Session, tenant_id=None) -> int:
+    """Recompute produtos_diarios from venda_itens with a single GROUP BY query.
+
+    The cost at sale time of past sales is unknown, so it is taken from the
+    current Produto.custo. Returns the number of rows written; the caller commits.
+    """
+    delete = db.query(ProdutoDiario)
+    if tenant_id:
+        delete = delete.filter(ProdutoDiario.tenant_id == tenant_id)
+    delete.delete(synchronize_session=False)
+
+    dia = dia_salao_sql(db, Venda.created_at)
+    origem = (
+        select(
+            VendaItem.tenant_id,
+            dia,
+            VendaItem.item_id,
+            func.max(VendaItem.nome),
+            func.sum(VendaItem.quantidade),
+            func.sum(VendaItem.total),
+            func.sum(VendaItem.quantidade * func.coalesce(Produto.custo, 0.0)),
+        )
+        .join(Venda, Venda.id == VendaItem.venda_id)
+        .outerjoin(Produto, and_(Produto.id == cast(VendaItem.item_id, Produto.__table__.c.id.type),
+                                 Produto.tenant_id == VendaItem.tenant_id))
+        .where(VendaItem.tipo == "produto")
+        .group_by(VendaItem.tenant_id, dia, VendaItem.item_id)
+    )
+    if tenant_id:
+        origem = origem.where(VendaItem.tenant_id == tenant_id)
+
+    linhas = [
+        {
+            "id": str(uuid.uuid4()),
+            "tenant_id": row_tenant_id,
+            "dia": date.fromisoformat(dia_valor) if isinstance(dia_valor, str) else dia_valor,
+            "produto_id": produto_id,
+            "nome": nome,
+            "quantidade": quantidade or 0.0,
+            "total": total or 0.0,
+            "custo": custo or 0.0,
+        }
+        for row_tenant_id, dia_valor, produto_id, nome, quantidade, total, custo in db.execute(origem)
+    ]
+    for inicio in range(0, len(linhas), REBUILD_CHUNK_SIZE):
+        db.execute(insert(ProdutoDiario), linhas[inicio:inicio + REBUILD_CHUNK_SIZE])
+    return len(linhas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the vendas_diarias and produtos_diarios rollups from vendas")
+    parser.add_argument("--tenant", help="only rebuild this tenant id")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        linhas = rebuild_vendas_diarias(db, args.tenant)
+        produtos = rebuild_produtos_diarios(db, args.tenant)
+        db.commit()
+        print(f"vendas_diarias rebuilt: {linhas} rows")
+        print(f"produtos_diarios rebuilt: {produtos} rows")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
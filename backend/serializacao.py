@@ -0,0 +1,43 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import orjson
+from fastapi.responses import Response
+
+from pagination import NEXT_CURSOR_HEADER
+
+# Fast path for the list routes.
+#
+# A page is read as plain column tuples (no ORM identity map, no pydantic
+# model per row) and written to JSON bytes by orjson in one call. The routes
+# return the response object themselves, so FastAPI skips validating and
+# re-encoding the content against response_model (which then only documents
+# the shape). UUIDs are written as strings and datetimes in ISO format with a
+# ``Z``: every DateTime column holds UTC, and the naive values SQLite returns
+# for them are written as UTC too, so clients never read them as local time.
+
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+
+def colunas(model, campos: Sequence[str]) -> List[Any]:
+    """Columns of ``model`` named by ``campos``, for ``db.query(*colunas(...))``."""
+    return [getattr(model, campo) for campo in campos]
+
+
+def registros(rows: Iterable[Sequence[Any]], campos: Sequence[str]) -> List[Dict[str, Any]]:
+    return [dict(zip(campos, row)) for row in rows]
+
+
+def json_list_response(itens: List[Dict[str, Any]], next_cursor: Optional[str] = None,
+                       headers: Optional[Dict[str, str]] = None) -> FastJSONResponse:
+    # Headers set on an injected Response are not copied to a returned one
+    headers = dict(headers or {})
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    return FastJSONResponse(itens, headers=headers)
@@ -1,9 +1,10 @@
-from fastapi import FastAPI, APIRouter, Depends, HTTPException, status, Request
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, status, Request, Response, Query
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, EmailStr, Field
-from typing import List, Optional, Dict, Any
-from datetime import datetime, timezone, timedelta
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, EmailStr, Field, field_validator, model_validator
+from typing import List, Optional, Dict, Any, Union
+from datetime import date, datetime, time, timezone, timedelta
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 import os
@@ -11,7 +12,6 @@ import logging
 import uuid
 import secrets
 import json
-import resend
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -20,22 +20,39 @@ ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 # Import database AFTER loading env vars
+from sqlalchemy import exists, insert, or_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from database import get_db, create_tables, Tenant, User, Cliente, Produto, Servico, Venda, Agendamento, Vencimento, SessionLocal
-
-# Create tables
-create_tables()
+from database import DB_AUTO_MIGRATE, get_db, run_db, with_db, migrate_database, Tenant, User, Cliente, Produto, Servico, Venda, VendaItem, Agendamento, Vencimento, SessionLocal, em_utc
+from dashboard import AGRUPAMENTOS_RELATORIO, calcular_dashboard, resumo_vendas, serie_vendas, top_produtos
+from auth_cache import CurrentUser, Principal, TenantSnapshot, TokenState, invalidate_tenant, invalidate_user, principal_cache, principal_from_claims, token_claims
+from password_pool import PasswordPoolBusy, password_pool
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, like_prefix, paginate, prefix_search
+from serializacao import FastJSONResponse, colunas, json_list_response, registros
+from versoes import RECURSOS as RECURSOS_CATALOGO, cache_headers, catalogo_etag, etag_corresponde, incrementar_versao, not_modified
+from busca_clientes import BUSCA_LIMITE_MAX, BUSCA_LIMITE_PADRAO, buscar_clientes
+from pos import bootstrap_cache, bootstrap_pos
+from agenda import AGENDA_ABERTURA, AGENDA_CAPACIDADE, AGENDA_FECHAMENTO, AGENDA_INTERVALO_MINUTOS, AGENDA_MAX_DIAS, AGENDA_MAX_OCORRENCIAS, CALENDARIO_MAX_DIAS, calendario, duracao_servico, expandir_recorrencia, horario_ocupado, horarios_livres, ocorrencias_livres, ocupa_agenda, para_utc, reservar_agenda
+from plataforma import dashboard_plataforma, invalidar_dashboard_plataforma, snapshot_cache
+from rollups import registrar_venda
+from importacao import FORMATOS, IMPORT_CHUNK_SIZE, IMPORT_MAX_CHUNK_SIZE, importar, ler_registros, receber_arquivo
+from exportacao import MEDIA_TYPES, exportar
+from estoque import ESTOQUE_REJEITAR_INSUFICIENTE, baixar_estoque, quantidades_por_produto
+from outbox import contagem_por_status, enfileirar_email, outbox_worker, OUTBOX_WORKER_ENABLED
+from notificacoes import VENCIMENTO_SWEEP_ENABLED, VencimentoSweeper, render_notificacao_vencimento
+
+# Create or upgrade the schema
+if DB_AUTO_MIGRATE:
+    migrate_database()
 
 # Configuration
 SECRET_KEY = os.environ.get('JWT_SECRET', 'your-secret-key-here')
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 1440  # 24 hours
-RESEND_API_KEY = os.environ.get('RESEND_API_KEY')
+# Verify every token against the database instead of the in-memory version table
+AUTH_STRICT_MODE = os.environ.get('AUTH_STRICT_MODE', 'false').lower() in ('1', 'true', 'yes')
 FRONTEND_URL = os.environ.get('FRONTEND_URL', 'http://localhost:3000')
-
-# Setup Resend
-if RESEND_API_KEY:
-    resend.api_key = RESEND_API_KEY
+PRODUTO_LOOKUP_MAX = 500  # codes per batch lookup
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
@@ -50,8 +67,17 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
+@app.exception_handler(PasswordPoolBusy)
+async def password_pool_busy_handler(request: Request, exc: PasswordPoolBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many authentication requests, try again shortly"},
+        headers={"Retry-After": "1"}
+    )
+
 # Models
 class UserRole:
     SUPER_ADMIN = "super_admin"
@@ -140,6 +166,13 @@ class ProdutoCreate(BaseModel):
     estoque_atual: int = 0
     estoque_minimo: int = 0
 
+    @field_validator("codigo")
+    @classmethod
+    def normalizar_codigo(cls, codigo: Optional[str]) -> Optional[str]:
+        # Unique per tenant: scanners pad codes, and forms send "" for "no code"
+        codigo = (codigo or "").strip()
+        return codigo or None
+
 class ProdutoResponse(BaseModel):
     id: str
     codigo: Optional[str]
@@ -153,6 +186,13 @@ class ProdutoResponse(BaseModel):
     estoque_minimo: int
     created_at: datetime
 
+class ProdutoLookupRequest(BaseModel):
+    codigos: List[str] = Field(..., min_length=1, max_length=PRODUTO_LOOKUP_MAX)
+
+class ProdutoLookupResponse(BaseModel):
+    produtos: List[ProdutoResponse]  # in the order of the requested codes
+    nao_encontrados: List[str]
+
 class ServicoCreate(BaseModel):
     nome: str
     descricao: Optional[str] = None
@@ -184,6 +224,7 @@ class VendaCreate(BaseModel):
     itens: List[ItemVenda]
     forma_pagamento: str
     emitir_nota: bool = False
+    rejeitar_sem_estoque: Optional[bool] = None  # default: ESTOQUE_REJEITAR_INSUFICIENTE
 
 class VendaResponse(BaseModel):
     id: str
@@ -205,6 +246,47 @@ class AgendamentoCreate(BaseModel):
     status: str = "agendado"
     observacoes: Optional[str] = None
 
+    @field_validator("data_hora")
+    @classmethod
+    def data_hora_utc(cls, data_hora: datetime) -> datetime:
+        # Stored in UTC; the agenda form sends the salon's wall-clock time
+        return para_utc(data_hora)
+
+class Recorrencia(BaseModel):
+    frequencia: str = Field(..., pattern="^(semanal|quinzenal|mensal)$")
+    quantidade: Optional[int] = Field(None, ge=1, le=AGENDA_MAX_OCORRENCIAS)
+    ate: Optional[date] = None  # last day of the series (salon date)
+
+    @model_validator(mode="after")
+    def fim_da_serie(self):
+        if self.quantidade is None and self.ate is None:
+            raise ValueError("quantidade or ate is required")
+        return self
+
+class AgendamentoLote(BaseModel):
+    """A series of one cliente and servico: ``data_hora`` + ``recorrencia``, or explicit ``datas``"""
+    cliente_id: str
+    servico_id: str
+    data_hora: Optional[datetime] = None  # first occurrence of the recorrencia
+    recorrencia: Optional[Recorrencia] = None
+    datas: Optional[List[datetime]] = Field(None, min_length=1, max_length=AGENDA_MAX_OCORRENCIAS)
+    status: str = "agendado"
+    observacoes: Optional[str] = None
+    tudo_ou_nada: bool = False  # create nothing when an occurrence conflicts
+
+    @field_validator("datas")
+    @classmethod
+    def datas_utc(cls, datas: Optional[List[datetime]]) -> Optional[List[datetime]]:
+        return None if datas is None else [para_utc(data_hora) for data_hora in datas]
+
+    @model_validator(mode="after")
+    def uma_forma(self):
+        if (self.recorrencia is None) == (self.datas is None):
+            raise ValueError("Send either recorrencia (with data_hora) or datas")
+        if self.recorrencia is not None and self.data_hora is None:
+            raise ValueError("data_hora is required with recorrencia")
+        return self
+
 class AgendamentoResponse(BaseModel):
     id: str
     cliente_id: str
@@ -214,6 +296,42 @@ class AgendamentoResponse(BaseModel):
     observacoes: Optional[str]
     created_at: datetime
 
+class OcorrenciaLote(BaseModel):
+    data_hora: datetime
+    resultado: str  # criado, conflito; livre when tudo_ou_nada rejected the series
+    id: Optional[str] = None
+
+class AgendamentoLoteResponse(BaseModel):
+    criados: int
+    conflitos: int
+    ocorrencias: List[OcorrenciaLote]
+
+class DisponibilidadeDia(BaseModel):
+    data: date
+    horarios: List[datetime]  # free start times, UTC
+
+class Disponibilidade(BaseModel):
+    servico_id: str
+    duracao_minutos: int
+    capacidade: int
+    dias: List[DisponibilidadeDia]
+
+class AgendamentoCalendario(BaseModel):
+    id: str
+    data_hora: datetime
+    status: str
+    observacoes: Optional[str]
+    cliente_id: str
+    cliente_nome: Optional[str]
+    servico_id: str
+    servico_nome: Optional[str]
+    servico_preco: Optional[float]
+    duracao_minutos: Optional[int]
+
+class CalendarioDia(BaseModel):
+    data: date
+    agendamentos: List[AgendamentoCalendario]
+
 class Dashboard(BaseModel):
     total_vendas: float
     total_despesas: float
@@ -224,6 +342,13 @@ class Dashboard(BaseModel):
     vendas_periodo: List[Dict[str, Any]]
     top_produtos: List[Dict[str, Any]]
 
+class RelatorioVendas(BaseModel):
+    data_inicio: date
+    data_fim: date
+    total: float
+    quantidade: int
+    serie: List[Dict[str, Any]]
+
 class SuperAdminDashboard(BaseModel):
     total_tenants: int
     active_tenants: int
@@ -233,6 +358,16 @@ class SuperAdminDashboard(BaseModel):
     monthly_revenue: float
     recent_signups: List[Dict[str, Any]]
 
+class ImportacaoErro(BaseModel):
+    linha: int
+    erros: List[str]
+
+class ImportacaoResponse(BaseModel):
+    total_linhas: int
+    importados: int
+    erros_total: int
+    erros: List[ImportacaoErro]  # first IMPORT_MAX_ERROS rows only
+
 class VencimentoResponse(BaseModel):
     id: str
     tenant_id: str
@@ -244,12 +379,60 @@ class VencimentoResponse(BaseModel):
     notificado_email: bool
     created_at: datetime
 
+class PosProduto(BaseModel):
+    id: str
+    codigo: Optional[str]
+    nome: str
+    descricao: Optional[str]
+    categoria: Optional[str]
+    preco: float
+    estoque_atual: int
+
+class PosServico(BaseModel):
+    id: str
+    nome: str
+    descricao: Optional[str]
+    duracao_minutos: int
+    preco: float
+
+class PosCliente(BaseModel):
+    id: str
+    nome: str
+
+class PosBootstrap(BaseModel):
+    produtos: List[PosProduto]
+    servicos: List[PosServico]
+    clientes: List[PosCliente]
+
+# Sortable fields of the list routes; each one has a (tenant_id, column, id) index
+TENANT_SORTS = {"created_at": Tenant.created_at, "company_name": Tenant.company_name, "subdomain": Tenant.subdomain}
+USER_SORTS = {"created_at": User.created_at, "name": User.name}
+CLIENTE_SORTS = {"created_at": Cliente.created_at, "nome": Cliente.nome}
+PRODUTO_SORTS = {"created_at": Produto.created_at, "nome": Produto.nome}
+SERVICO_SORTS = {"created_at": Servico.created_at, "nome": Servico.nome}
+VENDA_SORTS = {"created_at": Venda.created_at, "total": Venda.total}
+AGENDAMENTO_SORTS = {"created_at": Agendamento.created_at, "data_hora": Agendamento.data_hora}
+VENCIMENTO_SORTS = {"created_at": Vencimento.created_at, "data_vencimento": Vencimento.data_vencimento}
+
+# Columns read by the list routes (serialized straight to JSON, see serializacao.py)
+TENANT_CAMPOS = list(TenantResponse.model_fields)
+USER_CAMPOS = list(UserResponse.model_fields)
+CLIENTE_CAMPOS = list(ClienteResponse.model_fields)
+PRODUTO_CAMPOS = list(ProdutoResponse.model_fields)
+SERVICO_CAMPOS = list(ServicoResponse.model_fields)
+VENDA_CAMPOS = [campo for campo in VendaResponse.model_fields if campo != "itens"]  # itens come from venda_itens
+ITEM_VENDA_CAMPOS = list(ItemVenda.model_fields)
+AGENDAMENTO_CAMPOS = list(AgendamentoResponse.model_fields)
+CALENDARIO_CAMPOS = list(AgendamentoCalendario.model_fields)
+VENCIMENTO_CAMPOS = list(VencimentoResponse.model_fields)
+
 # Helper functions
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+# bcrypt runs in the dedicated password pool, off the event loop
+async def verify_password(plain_password, hashed_password):
+    return await password_pool.run(pwd_context.verify, plain_password, hashed_password)
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+async def get_password_hash(password):
+    return await password_pool.run(pwd_context.hash, password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -261,60 +444,121 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def get_itens_por_venda(db: Session, venda_ids: list) -> Dict[Any, List[Dict[str, Any]]]:
+    """Items (ItemVenda-shaped dicts) of a page of sales, loaded from venda_itens with a single IN query"""
+    itens_por_venda: Dict[Any, List[Dict[str, Any]]] = {}
+    if not venda_ids:
+        return itens_por_venda
+    
+    itens = (
+        db.query(VendaItem.venda_id, *colunas(VendaItem, ITEM_VENDA_CAMPOS))
+        .filter(VendaItem.venda_id.in_(venda_ids))
+        .order_by(VendaItem.venda_id, VendaItem.posicao)
+    )
+    for venda_id, *valores in itens:
+        item = dict(zip(ITEM_VENDA_CAMPOS, valores))
+        item["desconto"] = item["desconto"] or 0.0
+        itens_por_venda.setdefault(venda_id, []).append(item)
+    return itens_por_venda
+
+async def importar_upload(request: Request, db: Session, model, schema, tenant_id, formato: Optional[str], chunk_size: int,
+                         unico: Optional[str] = None) -> ImportacaoResponse:
+    arquivo, formato_detectado = await receber_arquivo(request)
+    try:
+        formato = formato or formato_detectado
+        if formato not in FORMATOS:
+            raise HTTPException(status_code=400, detail="Unknown file format. Use formato=csv or formato=ndjson")
+        def _importar(db: Session):
+            try:
+                return importar(db, model, schema, tenant_id, ler_registros(arquivo, formato), chunk_size, unico)
+            finally:
+                # Chunks are committed as they go, so bump the version even after a failure
+                db.rollback()
+                incrementar_versao(db, tenant_id, model.__tablename__)
+                db.commit()
+        
+        resultado = await run_db(db, _importar)
+    finally:
+        arquivo.close()
+    return ImportacaoResponse(**resultado)
+
+def export_response(recurso: str, tenant_id, formato: str, data_inicio: Optional[date], data_fim: Optional[date]) -> StreamingResponse:
+    if data_inicio and data_fim and data_fim < data_inicio:
+        raise HTTPException(status_code=400, detail="data_fim must not be before data_inicio")
+    filename = f"{recurso}-{datetime.now(timezone.utc):%Y%m%d}.{'csv' if formato == 'csv' else 'ndjson'}"
+    return StreamingResponse(
+        exportar(tenant_id, recurso, formato, data_inicio, data_fim),
+        media_type=MEDIA_TYPES[formato],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 def generate_reset_token():
     return secrets.token_urlsafe(32)
 
-def send_email(to_email: str, subject: str, html_content: str):
-    if not RESEND_API_KEY:
-        print(f"Email simulation - To: {to_email}, Subject: {subject}")
-        return True
+def load_token_state(db: Session, user_id: str) -> Optional[TokenState]:
+    row = db.query(User.token_version, User.is_active, User.tenant_id, Tenant.is_active).outerjoin(
+        Tenant, Tenant.id == User.tenant_id
+    ).filter(User.id == user_id).first()
+    if row is None:
+        return None
     
-    try:
-        params = {
-            "from": "ERP Sistema <noreply@sistema.com>",
-            "to": [to_email],
-            "subject": subject,
-            "html": html_content,
-        }
-        email = resend.Emails.send(params)
-        return True
-    except Exception as e:
-        print(f"Error sending email: {e}")
-        return False
+    token_version, is_active, tenant_id, tenant_active = row
+    return TokenState(
+        token_version=token_version or 0,
+        is_active=bool(is_active),
+        tenant_id=tenant_id,
+        tenant_active=bool(tenant_active) if tenant_id else True
+    )
 
-# Dependency to get current user
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+def revoke_user_tokens(user: User):
+    """Invalidate every token issued to ``user`` (caller commits)"""
+    user.token_version = (user.token_version or 0) + 1
+
+# Dependency to get the authenticated user and tenant from the token claims
+async def get_current_principal(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)) -> Principal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
+        claims = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        user_id: str = claims.get("sub")
+        # Tokens issued before the claims format (sub=email) must log in again
+        if user_id is None or "ver" not in claims or "role" not in claims:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
+    # Revocation check: version table in memory, or the database in strict mode
+    state = None if AUTH_STRICT_MODE else principal_cache.get(user_id)
+    if state is None:
+        state = await run_db(db, load_token_state, user_id)
+        if state is None:
+            raise credentials_exception
+        principal_cache.set(user_id, state)
+    
+    if claims["ver"] != state.token_version:
         raise credentials_exception
     
-    if not user.is_active:
+    return principal_from_claims(claims, state)
+
+# Dependency to get current user
+async def get_current_user(principal: Principal = Depends(get_current_principal)) -> CurrentUser:
+    if not principal.user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     
-    return user
+    return principal.user
 
 # Dependency to get current tenant
-async def get_current_tenant(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_current_tenant(current_user: CurrentUser = Depends(get_current_user), principal: Principal = Depends(get_current_principal)) -> Optional[TenantSnapshot]:
     if current_user.role == UserRole.SUPER_ADMIN:
         return None
     
     if not current_user.tenant_id:
         raise HTTPException(status_code=400, detail="User not associated with any tenant")
     
-    tenant = db.query(Tenant).filter(Tenant.id == current_user.tenant_id).first()
+    tenant = principal.tenant
     if not tenant:
         raise HTTPException(status_code=400, detail="Tenant not found")
     
@@ -325,81 +569,108 @@ async def get_current_tenant(current_user: User = Depends(get_current_user), db:
 
 # Super Admin Routes
 @api_router.post("/super-admin/tenants", response_model=TenantResponse)
-async def create_tenant(tenant_data: TenantCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def create_tenant(tenant_data: TenantCreate, current_user: CurrentUser = Depends(get_current_user), db: Session = Depends(get_db)):
     if current_user.role != UserRole.SUPER_ADMIN:
         raise HTTPException(status_code=403, detail="Only super admin can create tenants")
     
-    # Check if subdomain exists
-    existing_tenant = db.query(Tenant).filter(Tenant.subdomain == tenant_data.subdomain).first()
-    if existing_tenant:
-        raise HTTPException(status_code=400, detail="Subdomain already exists")
-    
-    # Create tenant
-    tenant = Tenant(
-        subdomain=tenant_data.subdomain,
-        company_name=tenant_data.company_name,
-        cnpj=tenant_data.cnpj,
-        razao_social=tenant_data.razao_social,
-        plan=tenant_data.plan,
-        trial_ends_at=datetime.now(timezone.utc) + timedelta(days=30)
-    )
-    db.add(tenant)
-    db.flush()
-    
-    # Create admin user
-    hashed_password = get_password_hash(tenant_data.admin_password)
-    admin_user = User(
-        email=tenant_data.admin_email,
-        name=tenant_data.admin_name,
-        hashed_password=hashed_password,
-        role=UserRole.ADMIN_EMPRESA,
-        tenant_id=tenant.id
-    )
-    db.add(admin_user)
-    db.commit()
+    # Hash before touching the session: bcrypt runs in the password pool
+    hashed_password = await get_password_hash(tenant_data.admin_password)
     
-    # Send welcome email
-    welcome_html = f"""
-    <h1>Bem-vindo ao ERP Sistema!</h1>
-    <p>Olá {tenant_data.admin_name},</p>
-    <p>Sua conta foi criada com sucesso!</p>
-    <p><strong>Subdomínio:</strong> {tenant_data.subdomain}</p>
-    <p><strong>Email:</strong> {tenant_data.admin_email}</p>
-    <p><strong>URL de acesso:</strong> <a href="{FRONTEND_URL}">{FRONTEND_URL}</a></p>
-    <p>Você tem 30 dias de trial gratuito para testar todas as funcionalidades.</p>
-    """
-    send_email(tenant_data.admin_email, "Bem-vindo ao ERP Sistema", welcome_html)
-    
-    return TenantResponse(
-        id=str(tenant.id),
-        subdomain=tenant.subdomain,
-        company_name=tenant.company_name,
-        cnpj=tenant.cnpj,
-        is_active=tenant.is_active,
-        plan=tenant.plan,
-        subscription_status=tenant.subscription_status,
-        created_at=tenant.created_at
-    )
+    def _create_tenant(db: Session):
+        # Check if subdomain exists
+        existing_tenant = db.query(Tenant).filter(Tenant.subdomain == tenant_data.subdomain).first()
+        if existing_tenant:
+            raise HTTPException(status_code=400, detail="Subdomain already exists")
+        
+        # Create tenant
+        tenant = Tenant(
+            subdomain=tenant_data.subdomain,
+            company_name=tenant_data.company_name,
+            cnpj=tenant_data.cnpj,
+            razao_social=tenant_data.razao_social,
+            plan=tenant_data.plan,
+            trial_ends_at=datetime.now(timezone.utc) + timedelta(days=30)
+        )
+        db.add(tenant)
+        db.flush()
+        
+        # Create admin user
+        admin_user = User(
+            email=tenant_data.admin_email,
+            name=tenant_data.admin_name,
+            hashed_password=hashed_password,
+            role=UserRole.ADMIN_EMPRESA,
+            tenant_id=tenant.id
+        )
+        db.add(admin_user)
+        
+        # Queue welcome email
+        welcome_html = f"""
+        <h1>Bem-vindo ao ERP Sistema!</h1>
+        <p>Olá {tenant_data.admin_name},</p>
+        <p>Sua conta foi criada com sucesso!</p>
+        <p><strong>Subdomínio:</strong> {tenant_data.subdomain}</p>
+        <p><strong>Email:</strong> {tenant_data.admin_email}</p>
+        <p><strong>URL de acesso:</strong> <a href="{FRONTEND_URL}">{FRONTEND_URL}</a></p>
+        <p>Você tem 30 dias de trial gratuito para testar todas as funcionalidades.</p>
+        """
+        enfileirar_email(db, tenant_data.admin_email, "Bem-vindo ao ERP Sistema", welcome_html, tenant_id=tenant.id)
+        db.commit()
+        
+        return TenantResponse(
+            id=str(tenant.id),
+            subdomain=tenant.subdomain,
+            company_name=tenant.company_name,
+            cnpj=tenant.cnpj,
+            is_active=tenant.is_active,
+            plan=tenant.plan,
+            subscription_status=tenant.subscription_status,
+            created_at=tenant.created_at
+        )
+    
+    tenant_response = await run_db(db, _create_tenant)
+    invalidar_dashboard_plataforma()
+    outbox_worker.notify()
+    
+    return tenant_response
 
 @api_router.get("/super-admin/tenants", response_model=List[TenantResponse])
-async def get_all_tenants(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+@with_db
+def get_all_tenants(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: str = "created_at",
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    q: Optional[str] = None,
+    plan: Optional[str] = None,
+    subscription_status: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    current_user: CurrentUser = Depends(get_current_user), db: Session = Depends(get_db)
+):
+    """Tenants a page at a time; ``q`` matches the start of the subdomain, company name, CNPJ or an email"""
     if current_user.role != UserRole.SUPER_ADMIN:
         raise HTTPException(status_code=403, detail="Only super admin can view all tenants")
     
-    tenants = db.query(Tenant).all()
-    return [TenantResponse(
-        id=str(tenant.id),
-        subdomain=tenant.subdomain,
-        company_name=tenant.company_name,
-        cnpj=tenant.cnpj,
-        is_active=tenant.is_active,
-        plan=tenant.plan,
-        subscription_status=tenant.subscription_status,
-        created_at=tenant.created_at
-    ) for tenant in tenants]
+    query = db.query(*colunas(Tenant, TENANT_CAMPOS))
+    if q and q.strip():
+        # Contact email of the tenant or the login email of one of its users
+        query = query.filter(or_(
+            prefix_search(q, Tenant.subdomain, Tenant.company_name, Tenant.cnpj, Tenant.email),
+            exists().where(User.tenant_id == Tenant.id, prefix_search(q, User.email)),
+        ))
+    if plan:
+        query = query.filter(Tenant.plan == plan)
+    if subscription_status:
+        query = query.filter(Tenant.subscription_status == subscription_status)
+    if is_active is not None:
+        query = query.filter(Tenant.is_active == is_active)
+    
+    tenants, next_cursor = paginate(query, Tenant, TENANT_SORTS, sort, order, cursor, limit)
+    return json_list_response(registros(tenants, TENANT_CAMPOS), next_cursor)
 
 @api_router.put("/super-admin/tenants/{tenant_id}/toggle-status")
-async def toggle_tenant_status(tenant_id: str, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+@with_db
+def toggle_tenant_status(tenant_id: str, current_user: CurrentUser = Depends(get_current_user), db: Session = Depends(get_db)):
     if current_user.role != UserRole.SUPER_ADMIN:
         raise HTTPException(status_code=403, detail="Only super admin can toggle tenant status")
     
@@ -410,60 +681,64 @@ async def toggle_tenant_status(tenant_id: str, current_user: User = Depends(get_
     tenant.is_active = not tenant.is_active
     tenant.subscription_status = "active" if tenant.is_active else "suspended"
     db.commit()
+    invalidate_tenant(tenant.id)
+    invalidar_dashboard_plataforma()
     
     return {"message": f"Tenant {'activated' if tenant.is_active else 'suspended'} successfully"}
 
 @api_router.get("/super-admin/dashboard", response_model=SuperAdminDashboard)
-async def get_super_admin_dashboard(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+@with_db
+def get_super_admin_dashboard(current_user: CurrentUser = Depends(get_current_user), db: Session = Depends(get_db)):
     if current_user.role != UserRole.SUPER_ADMIN:
         raise HTTPException(status_code=403, detail="Only super admin can view admin dashboard")
     
-    total_tenants = db.query(Tenant).count()
-    active_tenants = db.query(Tenant).filter(Tenant.is_active == True).count()
-    trial_tenants = db.query(Tenant).filter(Tenant.subscription_status == "trial").count()
-    suspended_tenants = db.query(Tenant).filter(Tenant.is_active == False).count()
-    total_users = db.query(User).filter(User.role != UserRole.SUPER_ADMIN).count()
-    
-    recent_tenants = db.query(Tenant).order_by(Tenant.created_at.desc()).limit(5).all()
-    recent_signups = [
-        {
-            "company_name": tenant.company_name,
-            "subdomain": tenant.subdomain,
-            "created_at": tenant.created_at.isoformat(),
-            "plan": tenant.plan
-        }
-        for tenant in recent_tenants
-    ]
+    return build_super_admin_dashboard(db)
+
+def build_super_admin_dashboard(db: Session) -> SuperAdminDashboard:
+    # One aggregate query, served from a short-lived snapshot (see plataforma.py)
+    return SuperAdminDashboard(**dashboard_plataforma(db))
+
+@api_router.get("/super-admin/metrics")
+async def get_super_admin_metrics(current_user: CurrentUser = Depends(get_current_user), db: Session = Depends(get_db)):
+    if current_user.role != UserRole.SUPER_ADMIN:
+        raise HTTPException(status_code=403, detail="Only super admin can view metrics")
     
-    return SuperAdminDashboard(
-        total_tenants=total_tenants,
-        active_tenants=active_tenants,
-        trial_tenants=trial_tenants,
-        suspended_tenants=suspended_tenants,
-        total_users=total_users,
-        monthly_revenue=0.0,  # TODO: Calculate from Stripe
-        recent_signups=recent_signups
-    )
+    return {
+        "principal_cache": principal_cache.stats(),
+        "pos_bootstrap_cache": bootstrap_cache.stats(),
+        "super_admin_dashboard_cache": snapshot_cache.stats(),
+        "password_pool": password_pool.stats(),
+        "email_outbox": {**outbox_worker.stats(), "status": await run_db(db, contagem_por_status)},
+        "vencimento_sweeper": vencimento_sweeper.stats()
+    }
 
 # Authentication Routes
 @api_router.post("/auth/login", response_model=Token)
 async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
-    # Find user by email (and optionally subdomain for tenant users)
-    query = db.query(User).filter(User.email == user_credentials.email)
-    
-    if user_credentials.subdomain:
-        # Login for tenant user
-        tenant = db.query(Tenant).filter(Tenant.subdomain == user_credentials.subdomain).first()
-        if not tenant:
-            raise HTTPException(status_code=400, detail="Invalid subdomain")
-        query = query.filter(User.tenant_id == tenant.id)
-    else:
-        # Login for super admin (no tenant)
-        query = query.filter(User.tenant_id.is_(None))
+    def _find_user(db: Session):
+        # Find user by email (and optionally subdomain for tenant users)
+        query = db.query(User).filter(User.email == user_credentials.email)
+        
+        if user_credentials.subdomain:
+            # Login for tenant user
+            tenant = db.query(Tenant).filter(Tenant.subdomain == user_credentials.subdomain).first()
+            if not tenant:
+                raise HTTPException(status_code=400, detail="Invalid subdomain")
+            query = query.filter(User.tenant_id == tenant.id)
+        else:
+            # Login for super admin (no tenant)
+            query = query.filter(User.tenant_id.is_(None))
+        
+        user = query.first()
+        tenant_active = True
+        if user and user.tenant_id:
+            tenant = db.query(Tenant).filter(Tenant.id == user.tenant_id).first()
+            tenant_active = bool(tenant and tenant.is_active)
+        return user, tenant_active
     
-    user = query.first()
+    user, tenant_active = await run_db(db, _find_user)
     
-    if not user or not verify_password(user_credentials.password, user.hashed_password):
+    if not user or not await verify_password(user_credentials.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -473,14 +748,12 @@ async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Inactive user")
     
     # Check tenant status
-    if user.tenant_id:
-        tenant = db.query(Tenant).filter(Tenant.id == user.tenant_id).first()
-        if not tenant or not tenant.is_active:
-            raise HTTPException(status_code=403, detail="Account suspended")
+    if not tenant_active:
+        raise HTTPException(status_code=403, detail="Account suspended")
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data=token_claims(user), expires_delta=access_token_expires
     )
     
     user_response = UserResponse(
@@ -495,7 +768,8 @@ async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
     return Token(access_token=access_token, token_type="bearer", user=user_response)
 
 @api_router.post("/auth/forgot-password")
-async def forgot_password(request: PasswordResetRequest, db: Session = Depends(get_db)):
+@with_db
+def forgot_password(request: PasswordResetRequest, db: Session = Depends(get_db)):
     query = db.query(User).filter(User.email == request.email)
     
     if request.subdomain:
@@ -512,9 +786,8 @@ async def forgot_password(request: PasswordResetRequest, db: Session = Depends(g
     reset_token = generate_reset_token()
     user.reset_token = reset_token
     user.reset_token_expires = datetime.now(timezone.utc) + timedelta(hours=1)
-    db.commit()
     
-    # Send reset email
+    # Queue reset email
     reset_url = f"{FRONTEND_URL}/reset-password?token={reset_token}"
     reset_html = f"""
     <h1>Redefinir Senha</h1>
@@ -524,29 +797,44 @@ async def forgot_password(request: PasswordResetRequest, db: Session = Depends(g
     <p>Este link expira em 1 hora.</p>
     <p>Se você não solicitou esta redefinição, ignore este email.</p>
     """
-    send_email(user.email, "Redefinir Senha - ERP Sistema", reset_html)
+    enfileirar_email(db, user.email, "Redefinir Senha - ERP Sistema", reset_html, tenant_id=user.tenant_id)
+    db.commit()
+    outbox_worker.notify()
     
     return {"message": "If the email exists, a reset link has been sent"}
 
 @api_router.post("/auth/reset-password")
 async def reset_password(request: PasswordReset, db: Session = Depends(get_db)):
-    user = db.query(User).filter(
-        User.reset_token == request.token,
-        User.reset_token_expires > datetime.now(timezone.utc)
-    ).first()
+    def _find_user(db: Session):
+        return db.query(User).filter(
+            User.reset_token == request.token,
+            User.reset_token_expires > datetime.now(timezone.utc)
+        ).first()
     
-    if not user:
+    # Validate the token before spending a bcrypt round on the new password
+    if not await run_db(db, _find_user):
         raise HTTPException(status_code=400, detail="Invalid or expired reset token")
     
-    user.hashed_password = get_password_hash(request.new_password)
-    user.reset_token = None
-    user.reset_token_expires = None
-    db.commit()
+    hashed_password = await get_password_hash(request.new_password)
+    
+    def _reset(db: Session):
+        user = _find_user(db)
+        if not user:
+            raise HTTPException(status_code=400, detail="Invalid or expired reset token")
+        
+        user.hashed_password = hashed_password
+        user.reset_token = None
+        user.reset_token_expires = None
+        revoke_user_tokens(user)
+        db.commit()
+        return user.id
+    
+    invalidate_user(await run_db(db, _reset))
     
     return {"message": "Password reset successfully"}
 
 @api_router.get("/auth/me", response_model=UserResponse)
-async def get_me(current_user: User = Depends(get_current_user)):
+async def get_me(current_user: CurrentUser = Depends(get_current_user)):
     return UserResponse(
         id=str(current_user.id),
         email=current_user.email,
@@ -558,91 +846,120 @@ async def get_me(current_user: User = Depends(get_current_user)):
 
 # User Management Routes
 @api_router.post("/users", response_model=UserResponse)
-async def create_user(user_data: UserCreate, current_user: User = Depends(get_current_user), tenant: Tenant = Depends(get_current_tenant), db: Session = Depends(get_db)):
+async def create_user(user_data: UserCreate, current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant), db: Session = Depends(get_db)):
     if current_user.role not in [UserRole.SUPER_ADMIN, UserRole.ADMIN_EMPRESA]:
         raise HTTPException(status_code=403, detail="Only administrators can create users")
     
-    # Check if email already exists for this tenant
-    existing_user = db.query(User).filter(
-        User.email == user_data.email,
-        User.tenant_id == (tenant.id if tenant else None)
-    ).first()
-    if existing_user:
-        raise HTTPException(status_code=400, detail="Email already registered")
-    
-    hashed_password = get_password_hash(user_data.password)
-    user = User(
-        email=user_data.email,
-        name=user_data.name,
-        hashed_password=hashed_password,
-        role=user_data.role,
-        tenant_id=tenant.id if tenant else None
-    )
-    db.add(user)
-    db.commit()
-    db.refresh(user)
+    hashed_password = await get_password_hash(user_data.password)
     
-    return UserResponse(
-        id=str(user.id),
-        email=user.email,
-        name=user.name,
-        role=user.role,
-        tenant_id=str(user.tenant_id) if user.tenant_id else None,
-        is_active=user.is_active
-    )
+    def _create_user(db: Session):
+        # Check if email already exists for this tenant
+        existing_user = db.query(User).filter(
+            User.email == user_data.email,
+            User.tenant_id == (tenant.id if tenant else None)
+        ).first()
+        if existing_user:
+            raise HTTPException(status_code=400, detail="Email already registered")
+        
+        user = User(
+            email=user_data.email,
+            name=user_data.name,
+            hashed_password=hashed_password,
+            role=user_data.role,
+            tenant_id=tenant.id if tenant else None
+        )
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        
+        return UserResponse(
+            id=str(user.id),
+            email=user.email,
+            name=user.name,
+            role=user.role,
+            tenant_id=str(user.tenant_id) if user.tenant_id else None,
+            is_active=user.is_active
+        )
+    
+    return await run_db(db, _create_user)
 
 @api_router.get("/users", response_model=List[UserResponse])
-async def get_users(current_user: User = Depends(get_current_user), tenant: Tenant = Depends(get_current_tenant), db: Session = Depends(get_db)):
+@with_db
+def get_users(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: str = "created_at",
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    q: Optional[str] = None,
+    role: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    tenant_id: Optional[str] = None,
+    current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant), db: Session = Depends(get_db)
+):
+    """Users a page at a time; ``q`` matches the start of the name or email. Super admins see every tenant (or ``tenant_id``)"""
     if current_user.role not in [UserRole.SUPER_ADMIN, UserRole.ADMIN_EMPRESA]:
         raise HTTPException(status_code=403, detail="Only administrators can view users")
     
-    if current_user.role == UserRole.SUPER_ADMIN:
-        users = db.query(User).all()
-    else:
-        users = db.query(User).filter(User.tenant_id == tenant.id).all()
-    
-    return [UserResponse(
-        id=str(user.id),
-        email=user.email,
-        name=user.name,
-        role=user.role,
-        tenant_id=str(user.tenant_id) if user.tenant_id else None,
-        is_active=user.is_active
-    ) for user in users]
+    # created_at is read for the keyset cursor only
+    query = db.query(*colunas(User, USER_CAMPOS), User.created_at)
+    if current_user.role != UserRole.SUPER_ADMIN:
+        query = query.filter(User.tenant_id == tenant.id)
+    elif tenant_id:
+        query = query.filter(User.tenant_id == tenant_id)
+    if q and q.strip():
+        query = query.filter(prefix_search(q, User.name, User.email))
+    if role:
+        query = query.filter(User.role == role)
+    if is_active is not None:
+        query = query.filter(User.is_active == is_active)
+    
+    users, next_cursor = paginate(query, User, USER_SORTS, sort, order, cursor, limit)
+    return json_list_response(registros(users, USER_CAMPOS), next_cursor)
 
 @api_router.put("/users/{user_id}", response_model=UserResponse)
-async def update_user(user_id: str, user_data: UserCreate, current_user: User = Depends(get_current_user), tenant: Tenant = Depends(get_current_tenant), db: Session = Depends(get_db)):
+async def update_user(user_id: str, user_data: UserCreate, current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant), db: Session = Depends(get_db)):
     if current_user.role not in [UserRole.SUPER_ADMIN, UserRole.ADMIN_EMPRESA]:
         raise HTTPException(status_code=403, detail="Only administrators can update users")
     
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    # Check tenant access
-    if current_user.role != UserRole.SUPER_ADMIN and user.tenant_id != tenant.id:
-        raise HTTPException(status_code=403, detail="Cannot access user from different tenant")
+    hashed_password = await get_password_hash(user_data.password) if user_data.password else None
     
-    user.name = user_data.name
-    user.email = user_data.email
-    user.role = user_data.role
-    if user_data.password:
-        user.hashed_password = get_password_hash(user_data.password)
-    
-    db.commit()
-    db.refresh(user)
+    def _update_user(db: Session):
+        user = db.query(User).filter(User.id == user_id).first()
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        
+        # Check tenant access
+        if current_user.role != UserRole.SUPER_ADMIN and str(user.tenant_id) != str(tenant.id):
+            raise HTTPException(status_code=403, detail="Cannot access user from different tenant")
+        
+        # Identity, role or password changes invalidate the claims of issued tokens
+        if user.email != user_data.email or user.role != user_data.role or user_data.password:
+            revoke_user_tokens(user)
+        
+        user.name = user_data.name
+        user.email = user_data.email
+        user.role = user_data.role
+        if hashed_password:
+            user.hashed_password = hashed_password
+        
+        db.commit()
+        db.refresh(user)
+        invalidate_user(user.id)
+        
+        return UserResponse(
+            id=str(user.id),
+            email=user.email,
+            name=user.name,
+            role=user.role,
+            tenant_id=str(user.tenant_id) if user.tenant_id else None,
+            is_active=user.is_active
+        )
     
-    return UserResponse(
-        id=str(user.id),
-        email=user.email,
-        name=user.name,
-        role=user.role,
-        tenant_id=str(user.tenant_id) if user.tenant_id else None,
-        is_active=user.is_active
-    )
+    return await run_db(db, _update_user)
 
 @api_router.put("/users/{user_id}/toggle-status")
-async def toggle_user_status(user_id: str, current_user: User = Depends(get_current_user), tenant: Tenant = Depends(get_current_tenant), db: Session = Depends(get_db)):
+@with_db
+def toggle_user_status(user_id: str, current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant), db: Session = Depends(get_db)):
     if current_user.role not in [UserRole.SUPER_ADMIN, UserRole.ADMIN_EMPRESA]:
         raise HTTPException(status_code=403, detail="Only administrators can toggle user status")
     
@@ -651,20 +968,24 @@ async def toggle_user_status(user_id: str, current_user: User = Depends(get_curr
         raise HTTPException(status_code=404, detail="User not found")
     
     # Check tenant access
-    if current_user.role != UserRole.SUPER_ADMIN and user.tenant_id != tenant.id:
+    if current_user.role != UserRole.SUPER_ADMIN and str(user.tenant_id) != str(tenant.id):
         raise HTTPException(status_code=403, detail="Cannot access user from different tenant")
     
     # Cannot deactivate yourself
-    if user.id == current_user.id:
+    if str(user.id) == str(current_user.id):
         raise HTTPException(status_code=400, detail="Cannot deactivate yourself")
     
     user.is_active = not user.is_active
+    if not user.is_active:
+        revoke_user_tokens(user)
     db.commit()
+    invalidate_user(user.id)
     
     return {"message": f"User {'activated' if user.is_active else 'deactivated'} successfully"}
 
 @api_router.delete("/users/{user_id}")
-async def delete_user(user_id: str, current_user: User = Depends(get_current_user), tenant: Tenant = Depends(get_current_tenant), db: Session = Depends(get_db)):
+@with_db
+def delete_user(user_id: str, current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant), db: Session = Depends(get_db)):
     if current_user.role not in [UserRole.SUPER_ADMIN, UserRole.ADMIN_EMPRESA]:
         raise HTTPException(status_code=403, detail="Only administrators can delete users")
     
@@ -673,74 +994,79 @@ async def delete_user(user_id: str, current_user: User = Depends(get_current_use
         raise HTTPException(status_code=404, detail="User not found")
     
     # Check tenant access
-    if current_user.role != UserRole.SUPER_ADMIN and user.tenant_id != tenant.id:
+    if current_user.role != UserRole.SUPER_ADMIN and str(user.tenant_id) != str(tenant.id):
         raise HTTPException(status_code=403, detail="Cannot access user from different tenant")
     
     # Cannot delete yourself
-    if user.id == current_user.id:
+    if str(user.id) == str(current_user.id):
         raise HTTPException(status_code=400, detail="Cannot delete yourself")
     
+    deleted_user_id = user.id
     db.delete(user)
     db.commit()
+    invalidate_user(deleted_user_id)
     
     return {"message": "User deleted successfully"}
 
 # Dashboard Routes
-@api_router.get("/dashboard", response_model=Dashboard)
-async def get_dashboard(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+@api_router.get("/dashboard", response_model=Union[Dashboard, SuperAdminDashboard])
+@with_db
+def get_dashboard(
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    agrupamento: str = Query("dia", pattern="^(dia|semana|mes)$"),
+    current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant), db: Session = Depends(get_db)
+):
     # Super admin gets different dashboard
     if current_user.role == UserRole.SUPER_ADMIN:
         # Redirect to super admin dashboard
-        return await get_super_admin_dashboard(current_user, db)
-    
-    # Get tenant for regular users
-    if not current_user.tenant_id:
-        raise HTTPException(status_code=400, detail="User not associated with any tenant")
-    
-    tenant = db.query(Tenant).filter(Tenant.id == current_user.tenant_id).first()
-    if not tenant or not tenant.is_active:
-        raise HTTPException(status_code=403, detail="Tenant account suspended")
-    
-    # Calculate metrics for the tenant
-    vendas = db.query(Venda).filter(Venda.tenant_id == tenant.id).all()
-    produtos = db.query(Produto).filter(Produto.tenant_id == tenant.id).all()
-    
-    total_vendas = sum(venda.total for venda in vendas)
-    total_despesas = 0  # TODO: implement despesas
-    lucro = total_vendas - total_despesas
-    margem_lucro = (lucro / total_vendas * 100) if total_vendas > 0 else 0
-    itens_estoque = sum(produto.estoque_atual for produto in produtos)
-    agendamentos_hoje = 0  # TODO: implement agendamentos count
-    
-    # Sample data for charts
-    vendas_periodo = [
-        {"data": "2024-09-01", "valor": 1000},
-        {"data": "2024-09-02", "valor": 1500},
-        {"data": "2024-09-03", "valor": 2000},
-    ]
-    
-    top_produtos = [
-        {"nome": "Produto A", "vendas": 50},
-        {"nome": "Produto B", "vendas": 30},
-        {"nome": "Produto C", "vendas": 20},
-    ]
-    
-    return Dashboard(
-        total_vendas=total_vendas,
-        total_despesas=total_despesas,
-        lucro=lucro,
-        margem_lucro=margem_lucro,
-        itens_estoque=itens_estoque,
-        agendamentos_hoje=agendamentos_hoje,
-        vendas_periodo=vendas_periodo,
-        top_produtos=top_produtos
+        return build_super_admin_dashboard(db)
+    
+    # Metrics are aggregated in the database (see dashboard.py)
+    return Dashboard(**calcular_dashboard(db, tenant.id, data_inicio, data_fim, agrupamento))
+
+@api_router.get("/relatorios/vendas", response_model=RelatorioVendas)
+@with_db
+def get_relatorio_vendas(
+    data_inicio: date,
+    data_fim: date,
+    agrupamento: str = Query("dia", pattern="^(dia|semana|mes)$"),
+    agrupar_por: Optional[str] = None,
+    current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant), db: Session = Depends(get_db)
+):
+    """Sales report read from the vendas_diarias rollup"""
+    if agrupar_por and agrupar_por not in AGRUPAMENTOS_RELATORIO:
+        raise HTTPException(status_code=400, detail=f"Invalid agrupar_por. Use one of: {', '.join(AGRUPAMENTOS_RELATORIO)}")
+    if data_fim < data_inicio:
+        raise HTTPException(status_code=400, detail="data_fim must not be before data_inicio")
+    
+    resumo = resumo_vendas(db, tenant.id, data_inicio, data_fim)
+    return RelatorioVendas(
+        data_inicio=data_inicio,
+        data_fim=data_fim,
+        total=resumo["total"],
+        quantidade=resumo["quantidade"],
+        serie=serie_vendas(db, tenant.id, data_inicio, data_fim, agrupamento, agrupar_por)
     )
 
+@api_router.get("/relatorios/produtos", response_model=List[Dict[str, Any]])
+@with_db
+def get_relatorio_produtos(
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    limite: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant), db: Session = Depends(get_db)
+):
+    """Best-selling products of the period, read from the produtos_diarios rollup"""
+    return top_produtos(db, tenant.id, data_inicio, data_fim, limite)
+
 # Cliente Routes
 @api_router.post("/clientes", response_model=ClienteResponse)
-async def create_cliente(cliente_data: ClienteCreate, current_user: User = Depends(get_current_user), tenant: Tenant = Depends(get_current_tenant), db: Session = Depends(get_db)):
+@with_db
+def create_cliente(cliente_data: ClienteCreate, current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant), db: Session = Depends(get_db)):
     cliente = Cliente(**cliente_data.dict(), tenant_id=tenant.id)
     db.add(cliente)
+    incrementar_versao(db, tenant.id, "clientes")
     db.commit()
     db.refresh(cliente)
     
@@ -756,23 +1082,71 @@ async def create_cliente(cliente_data: ClienteCreate, current_user: User = Depen
         created_at=cliente.created_at
     )
 
+@api_router.post("/clientes/import", response_model=ImportacaoResponse)
+async def import_clientes(
+    request: Request,
+    formato: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    chunk_size: int = Query(IMPORT_CHUNK_SIZE, ge=1, le=IMPORT_MAX_CHUNK_SIZE),
+    current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant), db: Session = Depends(get_db)
+):
+    """Bulk import clientes from a CSV (header row) or NDJSON upload"""
+    return await importar_upload(request, db, Cliente, ClienteCreate, tenant.id, formato, chunk_size)
+
+@api_router.get("/clientes/export")
+async def export_clientes(
+    formato: str = Query("csv", pattern="^(csv|ndjson)$"),
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant)
+):
+    """Stream every cliente created in the period as CSV or NDJSON"""
+    return export_response("clientes", tenant.id, formato, data_inicio, data_fim)
+
+@api_router.get("/clientes/search", response_model=List[ClienteResponse])
+@with_db
+def search_clientes(
+    q: str = Query(..., max_length=200),
+    limit: int = Query(BUSCA_LIMITE_PADRAO, ge=1, le=BUSCA_LIMITE_MAX),
+    current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant), db: Session = Depends(get_db)
+):
+    """Autocomplete: best clientes for ``q`` by nome, email, telefone or CPF/CNPJ"""
+    clientes = buscar_clientes(db, tenant.id, q, limit, colunas(Cliente, CLIENTE_CAMPOS))
+    return json_list_response(registros(clientes, CLIENTE_CAMPOS))
+
 @api_router.get("/clientes", response_model=List[ClienteResponse])
-async def get_clientes(current_user: User = Depends(get_current_user), tenant: Tenant = Depends(get_current_tenant), db: Session = Depends(get_db)):
-    clientes = db.query(Cliente).filter(Cliente.tenant_id == tenant.id).all()
-    return [ClienteResponse(
-        id=str(cliente.id),
-        nome=cliente.nome,
-        email=cliente.email,
-        telefone=cliente.telefone,
-        cpf_cnpj=cliente.cpf_cnpj,
-        endereco=cliente.endereco,
-        foto_url=cliente.foto_url,
-        anamnese=cliente.anamnese,
-        created_at=cliente.created_at
-    ) for cliente in clientes]
+@with_db
+def get_clientes(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: str = "created_at",
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    nome: Optional[str] = None,
+    email: Optional[str] = None,
+    telefone: Optional[str] = None,
+    cpf_cnpj: Optional[str] = None,
+    current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant), db: Session = Depends(get_db)
+):
+    etag = catalogo_etag(db, request, tenant.id, "clientes")
+    if etag_corresponde(request, etag):
+        return not_modified(etag)
+    
+    query = db.query(*colunas(Cliente, CLIENTE_CAMPOS)).filter(Cliente.tenant_id == tenant.id)
+    if nome:
+        query = query.filter(Cliente.nome.ilike(like_prefix(nome), escape="\\"))
+    if email:
+        query = query.filter(Cliente.email == email)
+    if telefone:
+        query = query.filter(Cliente.telefone == telefone)
+    if cpf_cnpj:
+        query = query.filter(Cliente.cpf_cnpj == cpf_cnpj)
+    
+    clientes, next_cursor = paginate(query, Cliente, CLIENTE_SORTS, sort, order, cursor, limit)
+    return json_list_response(registros(clientes, CLIENTE_CAMPOS), next_cursor, cache_headers(etag))
 
 @api_router.put("/clientes/{cliente_id}", response_model=ClienteResponse)
-async def update_cliente(cliente_id: str, cliente_data: ClienteCreate, current_user: User = Depends(get_current_user), tenant: Tenant = Depends(get_current_tenant), db: Session = Depends(get_db)):
+@with_db
+def update_cliente(cliente_id: str, cliente_data: ClienteCreate, current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant), db: Session = Depends(get_db)):
     cliente = db.query(Cliente).filter(Cliente.id == cliente_id, Cliente.tenant_id == tenant.id).first()
     if not cliente:
         raise HTTPException(status_code=404, detail="Cliente not found")
@@ -780,6 +1154,7 @@ async def update_cliente(cliente_id: str, cliente_data: ClienteCreate, current_u
     for field, value in cliente_data.dict().items():
         setattr(cliente, field, value)
     
+    incrementar_versao(db, tenant.id, "clientes")
     db.commit()
     db.refresh(cliente)
     
@@ -796,22 +1171,34 @@ async def update_cliente(cliente_id: str, cliente_data: ClienteCreate, current_u
     )
 
 @api_router.delete("/clientes/{cliente_id}")
-async def delete_cliente(cliente_id: str, current_user: User = Depends(get_current_user), tenant: Tenant = Depends(get_current_tenant), db: Session = Depends(get_db)):
+@with_db
+def delete_cliente(cliente_id: str, current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant), db: Session = Depends(get_db)):
     cliente = db.query(Cliente).filter(Cliente.id == cliente_id, Cliente.tenant_id == tenant.id).first()
     if not cliente:
         raise HTTPException(status_code=404, detail="Cliente not found")
     
     db.delete(cliente)
+    incrementar_versao(db, tenant.id, "clientes")
     db.commit()
     
     return {"message": "Cliente deleted successfully"}
 
 # Produto Routes
+def commit_produto(db: Session):
+    # idx_produto_tenant_codigo is unique: a taken codigo fails the commit
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Produto codigo already in use")
+
 @api_router.post("/produtos", response_model=ProdutoResponse)
-async def create_produto(produto_data: ProdutoCreate, current_user: User = Depends(get_current_user), tenant: Tenant = Depends(get_current_tenant), db: Session = Depends(get_db)):
+@with_db
+def create_produto(produto_data: ProdutoCreate, current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant), db: Session = Depends(get_db)):
     produto = Produto(**produto_data.dict(), tenant_id=tenant.id)
     db.add(produto)
-    db.commit()
+    incrementar_versao(db, tenant.id, "produtos")
+    commit_produto(db)
     db.refresh(produto)
     
     return ProdutoResponse(
@@ -828,25 +1215,99 @@ async def create_produto(produto_data: ProdutoCreate, current_user: User = Depen
         created_at=produto.created_at
     )
 
+@api_router.post("/produtos/import", response_model=ImportacaoResponse)
+async def import_produtos(
+    request: Request,
+    formato: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    chunk_size: int = Query(IMPORT_CHUNK_SIZE, ge=1, le=IMPORT_MAX_CHUNK_SIZE),
+    current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant), db: Session = Depends(get_db)
+):
+    """Bulk import produtos from a CSV (header row) or NDJSON upload"""
+    return await importar_upload(request, db, Produto, ProdutoCreate, tenant.id, formato, chunk_size, unico="codigo")
+
+@api_router.get("/produtos/export")
+async def export_produtos(
+    formato: str = Query("csv", pattern="^(csv|ndjson)$"),
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant)
+):
+    """Stream every produto created in the period as CSV or NDJSON"""
+    return export_response("produtos", tenant.id, formato, data_inicio, data_fim)
+
+@api_router.get("/produtos/lookup", response_model=ProdutoResponse)
+@with_db
+def lookup_produto(
+    codigo: str = Query(..., min_length=1, max_length=50),
+    current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant), db: Session = Depends(get_db)
+):
+    """Produto with barcode/code ``codigo`` (POS scanner)"""
+    produto = (
+        db.query(*colunas(Produto, PRODUTO_CAMPOS))
+        .filter(Produto.tenant_id == tenant.id, Produto.codigo == codigo.strip())
+        .first()
+    )
+    if not produto:
+        raise HTTPException(status_code=404, detail="Produto not found")
+    return FastJSONResponse(registros([produto], PRODUTO_CAMPOS)[0])
+
+@api_router.post("/produtos/lookup", response_model=ProdutoLookupResponse)
+@with_db
+def lookup_produtos(lookup: ProdutoLookupRequest, current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant), db: Session = Depends(get_db)):
+    """Resolve many codes in one query; unknown codes are listed in nao_encontrados"""
+    codigos = list(dict.fromkeys(codigo.strip() for codigo in lookup.codigos if codigo.strip()))
+    rows = []
+    if codigos:
+        rows = (
+            db.query(*colunas(Produto, PRODUTO_CAMPOS))
+            .filter(Produto.tenant_id == tenant.id, Produto.codigo.in_(codigos))
+            .all()
+        )
+    por_codigo = {produto["codigo"]: produto for produto in registros(rows, PRODUTO_CAMPOS)}
+    return FastJSONResponse({
+        "produtos": [por_codigo[codigo] for codigo in codigos if codigo in por_codigo],
+        "nao_encontrados": [codigo for codigo in codigos if codigo not in por_codigo],
+    })
+
 @api_router.get("/produtos", response_model=List[ProdutoResponse])
-async def get_produtos(current_user: User = Depends(get_current_user), tenant: Tenant = Depends(get_current_tenant), db: Session = Depends(get_db)):
-    produtos = db.query(Produto).filter(Produto.tenant_id == tenant.id).all()
-    return [ProdutoResponse(
-        id=str(produto.id),
-        codigo=produto.codigo,
-        nome=produto.nome,
-        descricao=produto.descricao,
-        categoria=produto.categoria,
-        ncm=produto.ncm,
-        custo=produto.custo,
-        preco=produto.preco,
-        estoque_atual=produto.estoque_atual,
-        estoque_minimo=produto.estoque_minimo,
-        created_at=produto.created_at
-    ) for produto in produtos]
+@with_db
+def get_produtos(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: str = "created_at",
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    nome: Optional[str] = None,
+    codigo: Optional[str] = None,
+    categoria: Optional[str] = None,
+    estoque_baixo: Optional[bool] = None,
+    q: Optional[str] = None,
+    current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant), db: Session = Depends(get_db)
+):
+    """Produtos a page at a time; ``q`` matches the start of the nome, codigo or categoria"""
+    etag = catalogo_etag(db, request, tenant.id, "produtos")
+    if etag_corresponde(request, etag):
+        return not_modified(etag)
+    
+    query = db.query(*colunas(Produto, PRODUTO_CAMPOS)).filter(Produto.tenant_id == tenant.id)
+    if nome:
+        query = query.filter(Produto.nome.ilike(like_prefix(nome), escape="\\"))
+    if codigo:
+        query = query.filter(Produto.codigo == codigo)
+    if categoria:
+        query = query.filter(Produto.categoria == categoria)
+    if q and q.strip():
+        query = query.filter(prefix_search(q, Produto.nome, Produto.codigo, Produto.categoria))
+    if estoque_baixo is not None:
+        abaixo_minimo = Produto.estoque_atual <= Produto.estoque_minimo
+        query = query.filter(abaixo_minimo if estoque_baixo else ~abaixo_minimo)
+    
+    produtos, next_cursor = paginate(query, Produto, PRODUTO_SORTS, sort, order, cursor, limit)
+    return json_list_response(registros(produtos, PRODUTO_CAMPOS), next_cursor, cache_headers(etag))
 
 @api_router.put("/produtos/{produto_id}", response_model=ProdutoResponse)
-async def update_produto(produto_id: str, produto_data: ProdutoCreate, current_user: User = Depends(get_current_user), tenant: Tenant = Depends(get_current_tenant), db: Session = Depends(get_db)):
+@with_db
+def update_produto(produto_id: str, produto_data: ProdutoCreate, current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant), db: Session = Depends(get_db)):
     produto = db.query(Produto).filter(Produto.id == produto_id, Produto.tenant_id == tenant.id).first()
     if not produto:
         raise HTTPException(status_code=404, detail="Produto not found")
@@ -854,7 +1315,8 @@ async def update_produto(produto_id: str, produto_data: ProdutoCreate, current_u
     for field, value in produto_data.dict().items():
         setattr(produto, field, value)
     
-    db.commit()
+    incrementar_versao(db, tenant.id, "produtos")
+    commit_produto(db)
     db.refresh(produto)
     
     return ProdutoResponse(
@@ -872,115 +1334,113 @@ async def update_produto(produto_id: str, produto_data: ProdutoCreate, current_u
     )
 
 @api_router.delete("/produtos/{produto_id}")
-async def delete_produto(produto_id: str, current_user: User = Depends(get_current_user), tenant: Tenant = Depends(get_current_tenant), db: Session = Depends(get_db)):
+@with_db
+def delete_produto(produto_id: str, current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant), db: Session = Depends(get_db)):
     produto = db.query(Produto).filter(Produto.id == produto_id, Produto.tenant_id == tenant.id).first()
     if not produto:
         raise HTTPException(status_code=404, detail="Produto not found")
     
     db.delete(produto)
+    incrementar_versao(db, tenant.id, "produtos")
     db.commit()
     
     return {"message": "Produto deleted successfully"}
 
 # Servico Routes
 @api_router.post("/servicos", response_model=ServicoResponse)
-async def create_servico(servico_data: ServicoCreate, current_user: User = Depends(get_current_user), tenant: Tenant = Depends(get_current_tenant), db: Session = Depends(get_db)):
-    servico_dict = servico_data.dict()
-    if servico_dict['tributacao_iss']:
-        servico_dict['tributacao_iss'] = json.dumps(servico_dict['tributacao_iss'])
-    
-    servico = Servico(**servico_dict, tenant_id=tenant.id)
+@with_db
+def create_servico(servico_data: ServicoCreate, current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant), db: Session = Depends(get_db)):
+    servico = Servico(**servico_data.dict(), tenant_id=tenant.id)
     db.add(servico)
+    incrementar_versao(db, tenant.id, "servicos")
     db.commit()
     db.refresh(servico)
     
-    tributacao_iss = None
-    if servico.tributacao_iss:
-        try:
-            tributacao_iss = json.loads(servico.tributacao_iss)
-        except:
-            pass
-    
     return ServicoResponse(
         id=str(servico.id),
         nome=servico.nome,
         descricao=servico.descricao,
         duracao_minutos=servico.duracao_minutos,
         preco=servico.preco,
-        tributacao_iss=tributacao_iss,
+        tributacao_iss=servico.tributacao_iss,
         created_at=servico.created_at
     )
 
 @api_router.get("/servicos", response_model=List[ServicoResponse])
-async def get_servicos(current_user: User = Depends(get_current_user), tenant: Tenant = Depends(get_current_tenant), db: Session = Depends(get_db)):
-    servicos = db.query(Servico).filter(Servico.tenant_id == tenant.id).all()
-    result = []
-    for servico in servicos:
-        tributacao_iss = None
-        if servico.tributacao_iss:
-            try:
-                tributacao_iss = json.loads(servico.tributacao_iss)
-            except:
-                pass
-        
-        result.append(ServicoResponse(
-            id=str(servico.id),
-            nome=servico.nome,
-            descricao=servico.descricao,
-            duracao_minutos=servico.duracao_minutos,
-            preco=servico.preco,
-            tributacao_iss=tributacao_iss,
-            created_at=servico.created_at
-        ))
-    return result
+@with_db
+def get_servicos(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: str = "created_at",
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    nome: Optional[str] = None,
+    current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant), db: Session = Depends(get_db)
+):
+    etag = catalogo_etag(db, request, tenant.id, "servicos")
+    if etag_corresponde(request, etag):
+        return not_modified(etag)
+    
+    query = db.query(*colunas(Servico, SERVICO_CAMPOS)).filter(Servico.tenant_id == tenant.id)
+    if nome:
+        query = query.filter(Servico.nome.ilike(like_prefix(nome), escape="\\"))
+    
+    servicos, next_cursor = paginate(query, Servico, SERVICO_SORTS, sort, order, cursor, limit)
+    return json_list_response(registros(servicos, SERVICO_CAMPOS), next_cursor, cache_headers(etag))
 
 @api_router.put("/servicos/{servico_id}", response_model=ServicoResponse)
-async def update_servico(servico_id: str, servico_data: ServicoCreate, current_user: User = Depends(get_current_user), tenant: Tenant = Depends(get_current_tenant), db: Session = Depends(get_db)):
+@with_db
+def update_servico(servico_id: str, servico_data: ServicoCreate, current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant), db: Session = Depends(get_db)):
     servico = db.query(Servico).filter(Servico.id == servico_id, Servico.tenant_id == tenant.id).first()
     if not servico:
         raise HTTPException(status_code=404, detail="Servico not found")
     
-    servico_dict = servico_data.dict()
-    if servico_dict['tributacao_iss']:
-        servico_dict['tributacao_iss'] = json.dumps(servico_dict['tributacao_iss'])
-    
-    for field, value in servico_dict.items():
+    for field, value in servico_data.dict().items():
         setattr(servico, field, value)
     
+    incrementar_versao(db, tenant.id, "servicos")
     db.commit()
     db.refresh(servico)
     
-    tributacao_iss = None
-    if servico.tributacao_iss:
-        try:
-            tributacao_iss = json.loads(servico.tributacao_iss)
-        except:
-            pass
-    
     return ServicoResponse(
         id=str(servico.id),
         nome=servico.nome,
         descricao=servico.descricao,
         duracao_minutos=servico.duracao_minutos,
         preco=servico.preco,
-        tributacao_iss=tributacao_iss,
+        tributacao_iss=servico.tributacao_iss,
         created_at=servico.created_at
     )
 
 @api_router.delete("/servicos/{servico_id}")
-async def delete_servico(servico_id: str, current_user: User = Depends(get_current_user), tenant: Tenant = Depends(get_current_tenant), db: Session = Depends(get_db)):
+@with_db
+def delete_servico(servico_id: str, current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant), db: Session = Depends(get_db)):
     servico = db.query(Servico).filter(Servico.id == servico_id, Servico.tenant_id == tenant.id).first()
     if not servico:
         raise HTTPException(status_code=404, detail="Servico not found")
     
     db.delete(servico)
+    incrementar_versao(db, tenant.id, "servicos")
     db.commit()
     
     return {"message": "Servico deleted successfully"}
 
 # Venda Routes
 @api_router.post("/vendas", response_model=VendaResponse)
-async def create_venda(venda_data: VendaCreate, current_user: User = Depends(get_current_user), tenant: Tenant = Depends(get_current_tenant), db: Session = Depends(get_db)):
+@with_db
+def create_venda(venda_data: VendaCreate, current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant), db: Session = Depends(get_db)):
+    # Update product stock first: one set-based UPDATE per product, atomic against concurrent sales
+    rejeitar = ESTOQUE_REJEITAR_INSUFICIENTE if venda_data.rejeitar_sem_estoque is None else venda_data.rejeitar_sem_estoque
+    quantidades = quantidades_por_produto(venda_data.itens)
+    sem_estoque = baixar_estoque(db, tenant.id, quantidades, rejeitar)
+    if sem_estoque:
+        db.rollback()
+        nomes = sorted({item.nome for item in venda_data.itens if item.tipo == "produto" and str(item.item_id) in sem_estoque})
+        raise HTTPException(status_code=409, detail=f"Insufficient stock for: {', '.join(nomes)}")
+    if quantidades:
+        # Stock is part of the produtos catalog
+        incrementar_versao(db, tenant.id, "produtos")
+    
     # Calculate totals
     subtotal = sum(item.quantidade * item.preco_unitario - item.desconto for item in venda_data.itens)
     total = subtotal
@@ -994,36 +1454,36 @@ async def create_venda(venda_data: VendaCreate, current_user: User = Depends(get
         forma_pagamento=venda_data.forma_pagamento,
         emitir_nota=venda_data.emitir_nota,
         tenant_id=tenant.id,
-        vendedor_id=current_user.id
+        vendedor_id=current_user.id,
+        created_at=datetime.now(timezone.utc)
     )
+    venda.itens_venda = [
+        VendaItem(
+            posicao=posicao,
+            tipo=item.tipo,
+            item_id=item.item_id,
+            nome=item.nome,
+            quantidade=item.quantidade,
+            preco_unitario=item.preco_unitario,
+            desconto=item.desconto,
+            total=item.total,
+            tenant_id=tenant.id
+        )
+        for posicao, item in enumerate(venda_data.itens)
+    ]
     db.add(venda)
     
-    # Update product stock
-    for item in venda_data.itens:
-        if item.tipo == "produto":
-            produto = db.query(Produto).filter(
-                Produto.id == item.item_id,
-                Produto.tenant_id == tenant.id
-            ).first()
-            if produto:
-                produto.estoque_atual -= int(item.quantidade)
+    # Keep the daily rollup in the same transaction
+    registrar_venda(db, venda)
     
     db.commit()
     db.refresh(venda)
     
-    # Parse items back for response
-    itens_parsed = []
-    try:
-        itens_data = json.loads(venda.itens)
-        itens_parsed = [ItemVenda(**item) for item in itens_data]
-    except:
-        pass
-    
     return VendaResponse(
         id=str(venda.id),
         cliente_id=str(venda.cliente_id) if venda.cliente_id else None,
         cliente_nome=venda.cliente_nome,
-        itens=itens_parsed,
+        itens=list(venda_data.itens),
         subtotal=venda.subtotal,
         desconto_total=venda.desconto_total,
         total=venda.total,
@@ -1033,82 +1493,269 @@ async def create_venda(venda_data: VendaCreate, current_user: User = Depends(get
         created_at=venda.created_at
     )
 
+@api_router.get("/vendas/export")
+async def export_vendas(
+    formato: str = Query("csv", pattern="^(csv|ndjson)$"),
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant)
+):
+    """Stream every venda created in the period as CSV or NDJSON"""
+    return export_response("vendas", tenant.id, formato, data_inicio, data_fim)
+
 @api_router.get("/vendas", response_model=List[VendaResponse])
-async def get_vendas(current_user: User = Depends(get_current_user), tenant: Tenant = Depends(get_current_tenant), db: Session = Depends(get_db)):
-    vendas = db.query(Venda).filter(Venda.tenant_id == tenant.id).all()
-    result = []
-    for venda in vendas:
-        itens_parsed = []
-        try:
-            itens_data = json.loads(venda.itens)
-            itens_parsed = [ItemVenda(**item) for item in itens_data]
-        except:
-            pass
-        
-        result.append(VendaResponse(
-            id=str(venda.id),
-            cliente_id=str(venda.cliente_id) if venda.cliente_id else None,
-            cliente_nome=venda.cliente_nome,
-            itens=itens_parsed,
-            subtotal=venda.subtotal,
-            desconto_total=venda.desconto_total,
-            total=venda.total,
-            forma_pagamento=venda.forma_pagamento,
-            emitir_nota=venda.emitir_nota,
-            status_nota=venda.status_nota,
-            created_at=venda.created_at
-        ))
-    return result
+@with_db
+def get_vendas(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: str = "created_at",
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    cliente_id: Optional[str] = None,
+    vendedor_id: Optional[str] = None,
+    forma_pagamento: Optional[str] = None,
+    status_nota: Optional[str] = None,
+    data_inicio: Optional[datetime] = None,
+    data_fim: Optional[datetime] = None,
+    current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant), db: Session = Depends(get_db)
+):
+    query = db.query(*colunas(Venda, VENDA_CAMPOS)).filter(Venda.tenant_id == tenant.id)
+    if cliente_id:
+        query = query.filter(Venda.cliente_id == cliente_id)
+    if vendedor_id:
+        query = query.filter(Venda.vendedor_id == vendedor_id)
+    if forma_pagamento:
+        query = query.filter(Venda.forma_pagamento == forma_pagamento)
+    if status_nota:
+        query = query.filter(Venda.status_nota == status_nota)
+    if data_inicio:
+        query = query.filter(Venda.created_at >= data_inicio)
+    if data_fim:
+        query = query.filter(Venda.created_at < data_fim)
+    
+    vendas, next_cursor = paginate(query, Venda, VENDA_SORTS, sort, order, cursor, limit)
+    itens_por_venda = get_itens_por_venda(db, [venda.id for venda in vendas])
+    result = registros(vendas, VENDA_CAMPOS)
+    for venda in result:
+        venda["itens"] = itens_por_venda.get(venda["id"], [])
+    return json_list_response(result, next_cursor)
+
+# POS Routes
+@api_router.get("/pos/bootstrap", response_model=PosBootstrap)
+@with_db
+def get_pos_bootstrap(request: Request, current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant), db: Session = Depends(get_db)):
+    """Catalog with stock, services and the client index for the POS screen, in one request"""
+    etag = catalogo_etag(db, request, tenant.id, *RECURSOS_CATALOGO)
+    if etag_corresponde(request, etag):
+        return not_modified(etag)
+    return Response(content=bootstrap_pos(db, tenant.id, etag), media_type="application/json", headers=cache_headers(etag))
 
 # Agendamento Routes
-@api_router.post("/agendamentos", response_model=AgendamentoResponse)
-async def create_agendamento(agendamento_data: AgendamentoCreate, current_user: User = Depends(get_current_user), tenant: Tenant = Depends(get_current_tenant), db: Session = Depends(get_db)):
-    agendamento = Agendamento(**agendamento_data.dict(), tenant_id=tenant.id)
-    db.add(agendamento)
-    db.commit()
-    db.refresh(agendamento)
-    
+def verificar_horario(db: Session, tenant_id, agendamento_data: AgendamentoCreate, ignorar_id=None):
+    """404 for an unknown servico, 409 when the slot is full; holds the tenant's agenda until commit."""
+    duracao = duracao_servico(db, tenant_id, agendamento_data.servico_id)
+    if duracao is None:
+        raise HTTPException(status_code=404, detail="Servico not found")
+    if not ocupa_agenda(agendamento_data.status):
+        return
+    reservar_agenda(db, tenant_id)
+    if horario_ocupado(db, tenant_id, agendamento_data.data_hora, duracao, ignorar_id):
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Time slot not available")
+
+def agendamento_response(agendamento: Agendamento) -> AgendamentoResponse:
     return AgendamentoResponse(
         id=str(agendamento.id),
         cliente_id=str(agendamento.cliente_id),
         servico_id=str(agendamento.servico_id),
-        data_hora=agendamento.data_hora,
+        data_hora=em_utc(agendamento.data_hora),
         status=agendamento.status,
         observacoes=agendamento.observacoes,
-        created_at=agendamento.created_at
+        created_at=em_utc(agendamento.created_at)
     )
 
+@api_router.post("/agendamentos", response_model=AgendamentoResponse)
+@with_db
+def create_agendamento(agendamento_data: AgendamentoCreate, current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant), db: Session = Depends(get_db)):
+    verificar_horario(db, tenant.id, agendamento_data)
+    agendamento = Agendamento(**agendamento_data.dict(), tenant_id=tenant.id)
+    db.add(agendamento)
+    db.commit()
+    db.refresh(agendamento)
+    
+    return agendamento_response(agendamento)
+
+@api_router.post("/agendamentos/lote", response_model=AgendamentoLoteResponse)
+@with_db
+def create_agendamentos_lote(lote: AgendamentoLote, current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant), db: Session = Depends(get_db)):
+    """Books a series with one conflict check and one insert; free occurrences are created unless tudo_ou_nada"""
+    if lote.recorrencia:
+        inicios = expandir_recorrencia(lote.data_hora, lote.recorrencia.frequencia, lote.recorrencia.quantidade, lote.recorrencia.ate)
+    else:
+        inicios = lote.datas
+    if not inicios:
+        raise HTTPException(status_code=400, detail="The series has no occurrences")
+    if len(inicios) > AGENDA_MAX_OCORRENCIAS:
+        raise HTTPException(status_code=400, detail=f"At most {AGENDA_MAX_OCORRENCIAS} occurrences per series")
+    duracao = duracao_servico(db, tenant.id, lote.servico_id)
+    if duracao is None:
+        raise HTTPException(status_code=404, detail="Servico not found")
+    
+    if ocupa_agenda(lote.status):
+        reservar_agenda(db, tenant.id)
+        livres = ocorrencias_livres(db, tenant.id, inicios, duracao)
+    else:
+        livres = [True] * len(inicios)
+    criar = all(livres) or not lote.tudo_ou_nada
+    
+    agora = datetime.now(timezone.utc)
+    ocorrencias, linhas = [], []
+    for inicio, livre in zip(inicios, livres):
+        if not livre:
+            ocorrencias.append(OcorrenciaLote(data_hora=inicio, resultado="conflito"))
+        elif not criar:
+            ocorrencias.append(OcorrenciaLote(data_hora=inicio, resultado="livre"))
+        else:
+            agendamento_id = str(uuid.uuid4())
+            linhas.append({
+                "id": agendamento_id, "cliente_id": lote.cliente_id, "servico_id": lote.servico_id, "data_hora": inicio,
+                "status": lote.status, "observacoes": lote.observacoes, "tenant_id": tenant.id,
+                "created_at": agora, "updated_at": agora,
+            })
+            ocorrencias.append(OcorrenciaLote(data_hora=inicio, resultado="criado", id=agendamento_id))
+    if linhas:
+        db.execute(insert(Agendamento), linhas)
+        db.commit()
+    else:
+        db.rollback()
+    
+    return AgendamentoLoteResponse(criados=len(linhas), conflitos=livres.count(False), ocorrencias=ocorrencias)
+
+@api_router.put("/agendamentos/{agendamento_id}", response_model=AgendamentoResponse)
+@with_db
+def update_agendamento(agendamento_id: str, agendamento_data: AgendamentoCreate, current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant), db: Session = Depends(get_db)):
+    agendamento = db.query(Agendamento).filter(Agendamento.id == agendamento_id, Agendamento.tenant_id == tenant.id).first()
+    if not agendamento:
+        raise HTTPException(status_code=404, detail="Agendamento not found")
+    
+    verificar_horario(db, tenant.id, agendamento_data, ignorar_id=agendamento.id)
+    for field, value in agendamento_data.dict().items():
+        setattr(agendamento, field, value)
+    
+    db.commit()
+    db.refresh(agendamento)
+    
+    return agendamento_response(agendamento)
+
+@api_router.get("/agendamentos/disponibilidade", response_model=Disponibilidade)
+@with_db
+def get_disponibilidade(
+    servico_id: str,
+    data_inicio: date,
+    data_fim: Optional[date] = None,
+    abertura: time = AGENDA_ABERTURA,
+    fechamento: time = AGENDA_FECHAMENTO,
+    intervalo: int = Query(AGENDA_INTERVALO_MINUTOS, ge=5, le=240),
+    current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant), db: Session = Depends(get_db)
+):
+    """Free start times of the servico per day (salon hours, AGENDA_TIMEZONE)"""
+    data_fim = data_fim or data_inicio
+    if data_fim < data_inicio:
+        raise HTTPException(status_code=400, detail="data_fim must not be before data_inicio")
+    if (data_fim - data_inicio).days >= AGENDA_MAX_DIAS:
+        raise HTTPException(status_code=400, detail=f"At most {AGENDA_MAX_DIAS} days per query")
+    if fechamento <= abertura:
+        raise HTTPException(status_code=400, detail="fechamento must be after abertura")
+    duracao = duracao_servico(db, tenant.id, servico_id)
+    if duracao is None:
+        raise HTTPException(status_code=404, detail="Servico not found")
+    
+    dias = horarios_livres(db, tenant.id, duracao, data_inicio, data_fim, abertura, fechamento, intervalo)
+    return Disponibilidade(
+        servico_id=servico_id,
+        duracao_minutos=duracao,
+        capacidade=AGENDA_CAPACIDADE,
+        dias=[DisponibilidadeDia(data=dia, horarios=horarios) for dia, horarios in dias]
+    )
+
+@api_router.get("/agendamentos/calendario", response_model=List[CalendarioDia])
+@with_db
+def get_calendario(
+    data_inicio: date,
+    data_fim: Optional[date] = None,
+    status: Optional[str] = None,
+    current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant), db: Session = Depends(get_db)
+):
+    """Agendamentos per salon day (AGENDA_TIMEZONE) with cliente and servico names; a week by default"""
+    data_fim = data_fim or data_inicio + timedelta(days=6)
+    if data_fim < data_inicio:
+        raise HTTPException(status_code=400, detail="data_fim must not be before data_inicio")
+    if (data_fim - data_inicio).days >= CALENDARIO_MAX_DIAS:
+        raise HTTPException(status_code=400, detail=f"At most {CALENDARIO_MAX_DIAS} days per query")
+    
+    dias = calendario(db, tenant.id, data_inicio, data_fim, status)
+    return FastJSONResponse([
+        {"data": dia, "agendamentos": registros(agendamentos, CALENDARIO_CAMPOS)} for dia, agendamentos in dias
+    ])
+
 @api_router.get("/agendamentos", response_model=List[AgendamentoResponse])
-async def get_agendamentos(current_user: User = Depends(get_current_user), tenant: Tenant = Depends(get_current_tenant), db: Session = Depends(get_db)):
-    agendamentos = db.query(Agendamento).filter(Agendamento.tenant_id == tenant.id).all()
-    return [AgendamentoResponse(
-        id=str(agendamento.id),
-        cliente_id=str(agendamento.cliente_id),
-        servico_id=str(agendamento.servico_id),
-        data_hora=agendamento.data_hora,
-        status=agendamento.status,
-        observacoes=agendamento.observacoes,
-        created_at=agendamento.created_at
-    ) for agendamento in agendamentos]
+@with_db
+def get_agendamentos(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: Optional[str] = None,
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    cliente_id: Optional[str] = None,
+    servico_id: Optional[str] = None,
+    status: Optional[str] = None,
+    data_de: Optional[datetime] = Query(None, alias="from"),
+    data_ate: Optional[datetime] = Query(None, alias="to"),
+    current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant), db: Session = Depends(get_db)
+):
+    """``from``/``to`` bound data_hora (``[from, to)``, salon time when without offset) and make it the default sort"""
+    query = db.query(*colunas(Agendamento, AGENDAMENTO_CAMPOS)).filter(Agendamento.tenant_id == tenant.id)
+    if data_de:
+        query = query.filter(Agendamento.data_hora >= para_utc(data_de))
+    if data_ate:
+        query = query.filter(Agendamento.data_hora < para_utc(data_ate))
+    if sort is None:
+        sort = "data_hora" if data_de or data_ate else "created_at"
+    if cliente_id:
+        query = query.filter(Agendamento.cliente_id == cliente_id)
+    if servico_id:
+        query = query.filter(Agendamento.servico_id == servico_id)
+    if status:
+        query = query.filter(Agendamento.status == status)
+    
+    agendamentos, next_cursor = paginate(query, Agendamento, AGENDAMENTO_SORTS, sort, order, cursor, limit)
+    return json_list_response(registros(agendamentos, AGENDAMENTO_CAMPOS), next_cursor)
 
 # Vencimento Routes
 @api_router.get("/vencimentos", response_model=List[VencimentoResponse])
-async def get_vencimentos(current_user: User = Depends(get_current_user), tenant: Tenant = Depends(get_current_tenant), db: Session = Depends(get_db)):
-    vencimentos = db.query(Vencimento).filter(Vencimento.tenant_id == tenant.id).all()
-    return [VencimentoResponse(
-        id=str(vencimento.id),
-        tenant_id=str(vencimento.tenant_id),
-        tipo=vencimento.tipo,
-        descricao=vencimento.descricao,
-        data_vencimento=vencimento.data_vencimento,
-        valor=vencimento.valor,
-        status=vencimento.status,
-        notificado_email=vencimento.notificado_email,
-        created_at=vencimento.created_at
-    ) for vencimento in vencimentos]
+@with_db
+def get_vencimentos(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: str = "created_at",
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    tipo: Optional[str] = None,
+    status: Optional[str] = None,
+    notificado_email: Optional[bool] = None,
+    current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant), db: Session = Depends(get_db)
+):
+    query = db.query(*colunas(Vencimento, VENCIMENTO_CAMPOS)).filter(Vencimento.tenant_id == tenant.id)
+    if tipo:
+        query = query.filter(Vencimento.tipo == tipo)
+    if status:
+        query = query.filter(Vencimento.status == status)
+    if notificado_email is not None:
+        query = query.filter(Vencimento.notificado_email == notificado_email)
+    
+    vencimentos, next_cursor = paginate(query, Vencimento, VENCIMENTO_SORTS, sort, order, cursor, limit)
+    return json_list_response(registros(vencimentos, VENCIMENTO_CAMPOS), next_cursor)
 
 @api_router.get("/vencimentos/proximos")
-async def get_vencimentos_proximos(current_user: User = Depends(get_current_user), tenant: Tenant = Depends(get_current_tenant), db: Session = Depends(get_db)):
+@with_db
+def get_vencimentos_proximos(current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant), db: Session = Depends(get_db)):
     """Retorna vencimentos nos próximos 30 dias"""
     from datetime import datetime, timezone, timedelta
     
@@ -1135,7 +1782,8 @@ async def get_vencimentos_proximos(current_user: User = Depends(get_current_user
     ) for vencimento in vencimentos]
 
 @api_router.post("/vencimentos/{vencimento_id}/notificar")
-async def enviar_notificacao_vencimento(vencimento_id: str, current_user: User = Depends(get_current_user), tenant: Tenant = Depends(get_current_tenant), db: Session = Depends(get_db)):
+@with_db
+def enviar_notificacao_vencimento(vencimento_id: str, current_user: CurrentUser = Depends(get_current_user), tenant: TenantSnapshot = Depends(get_current_tenant), db: Session = Depends(get_db)):
     """Envia notificação por email sobre vencimento"""
     vencimento = db.query(Vencimento).filter(
         Vencimento.id == vencimento_id,
@@ -1145,42 +1793,16 @@ async def enviar_notificacao_vencimento(vencimento_id: str, current_user: User =
     if not vencimento:
         raise HTTPException(status_code=404, detail="Vencimento not found")
     
-    # Calcula dias até vencimento
-    hoje = datetime.now(timezone.utc)
-    dias_restantes = (vencimento.data_vencimento - hoje).days
-    
-    # Prepara email
     email_destino = vencimento.email_notificacao or current_user.email
-    assunto = f"Vencimento próximo: {vencimento.tipo}"
-    
-    conteudo_html = f"""
-    <h2>🚨 Vencimento Próximo</h2>
-    <p>Olá {current_user.name},</p>
-    <p>Você tem um vencimento próximo que requer atenção:</p>
-    
-    <div style="background-color: #f8f9fa; padding: 20px; border-radius: 8px; margin: 20px 0;">
-        <h3 style="color: #dc2626;">{vencimento.tipo}</h3>
-        <p><strong>Descrição:</strong> {vencimento.descricao or 'N/A'}</p>
-        <p><strong>Data de Vencimento:</strong> {vencimento.data_vencimento.strftime('%d/%m/%Y')}</p>
-        <p><strong>Valor:</strong> R$ {vencimento.valor:,.2f}</p>
-        <p><strong>Dias restantes:</strong> {dias_restantes} dias</p>
-    </div>
-    
-    <p>Não esqueça de renovar antes do vencimento para evitar interrupções nos serviços.</p>
-    <p>Em caso de dúvidas, entre em contato com o suporte.</p>
-    """
+    email = render_notificacao_vencimento(vencimento, current_user.name)
     
-    # Envia email
-    try:
-        send_email(email_destino, assunto, conteudo_html)
-        
-        # Marca como notificado
-        vencimento.notificado_email = True
-        db.commit()
-        
-        return {"message": "Notificação enviada com sucesso"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro ao enviar notificação: {str(e)}")
+    # Enfileira o email e marca como notificado na mesma transação
+    enfileirar_email(db, email_destino, email["assunto"], email["conteudo_html"], tenant_id=vencimento.tenant_id)
+    vencimento.notificado_email = True
+    db.commit()
+    outbox_worker.notify()
+    
+    return {"message": "Notificação enviada com sucesso"}
 
 # Include router
 app.include_router(api_router)
@@ -1192,6 +1814,8 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+vencimento_sweeper = VencimentoSweeper(on_notify=outbox_worker.notify)
+
 # Startup event to create super admin
 @app.on_event("startup")
 async def startup_event():
@@ -1208,7 +1832,7 @@ async def startup_event():
                 id=str(uuid.uuid4()),
                 email=os.environ.get('ADMIN_EMAIL', 'admin@sistema.com'),
                 name="Super Admin",
-                hashed_password=get_password_hash(os.environ.get('ADMIN_PASSWORD', 'admin123')),
+                hashed_password=await get_password_hash(os.environ.get('ADMIN_PASSWORD', 'admin123')),
                 role=UserRole.SUPER_ADMIN,
                 tenant_id=None
             )
@@ -1249,4 +1873,13 @@ async def startup_event():
                 db.commit()
                 logger.info("Sample vencimentos created")
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+    
+    if OUTBOX_WORKER_ENABLED:
+        outbox_worker.start()
+    if VENCIMENTO_SWEEP_ENABLED:
+        vencimento_sweeper.start()
+@app.on_event("shutdown")
+async def shutdown_event():
+    await vencimento_sweeper.stop()
+    await outbox_worker.stop()
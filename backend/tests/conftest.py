@@ -0,0 +1,74 @@
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Isolated SQLite database and in-process collaborators, set before server is imported
+os.environ["DATABASE_URL"] = os.environ.get("TEST_DATABASE_URL") or f"sqlite:///{tempfile.mkdtemp()}/test.db"
+os.environ["EMAIL_TRANSPORT"] = "stub"
+os.environ["OUTBOX_WORKER_ENABLED"] = "false"
+os.environ["VENCIMENTO_SWEEP_ENABLED"] = "false"
+sys.path.insert(0, str(BACKEND_DIR))
+
+import server  # noqa: E402
+from database import async_engine, engine  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+ADMIN_EMAIL = os.environ.get("ADMIN_EMAIL", "admin@sistema.com")
+ADMIN_PASSWORD = os.environ.get("ADMIN_PASSWORD", "admin123")
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(server.app) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def admin_headers(client):
+    r = client.post("/api/auth/login", json={"email": ADMIN_EMAIL, "password": ADMIN_PASSWORD})
+    assert r.status_code == 200, r.text
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def create_tenant(client, admin_headers, subdomain: str):
+    """Create a tenant through the API and return (tenant_id, auth headers of its admin)."""
+    email = f"admin@{subdomain}.com"
+    r = client.post("/api/super-admin/tenants", headers=admin_headers, json={
+        "subdomain": subdomain,
+        "company_name": subdomain.title(),
+        "admin_name": "Admin",
+        "admin_email": email,
+        "admin_password": "secret123",
+    })
+    assert r.status_code == 200, r.text
+    tenant_id = r.json()["id"]
+    r = client.post("/api/auth/login", json={"email": email, "password": "secret123", "subdomain": subdomain})
+    assert r.status_code == 200, r.text
+    return tenant_id, {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+@contextmanager
+def capture_selects():
+    """Collect the (statement, parameters) of every SELECT run inside the block."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and not executemany:
+            statements.append((statement, parameters))
+
+    # Routes run on the async engine in DB_ASYNC_MODE, scripts on the sync one
+    engines = [engine] + ([async_engine.sync_engine] if async_engine is not None else [])
+    for hooked in engines:
+        event.listen(hooked, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        for hooked in engines:
+            event.remove(hooked, "before_cursor_execute", before_cursor_execute)
@@ -0,0 +1,72 @@
+"""Paginated, searchable super admin tenant and user listings."""
+import pytest
+
+from conftest import create_tenant
+
+
+@pytest.fixture(scope="module")
+def tenants(client, admin_headers):
+    criados = {}
+    for subdomain in ("admlist-alfa", "admlist-beta", "admlist-gama"):
+        criados[subdomain] = create_tenant(client, admin_headers, subdomain)
+    client.put(f"/api/super-admin/tenants/{criados['admlist-gama'][0]}/toggle-status", headers=admin_headers)
+    return criados
+
+
+def _todas_paginas(client, headers, path):
+    itens, cursor = [], None
+    while True:
+        r = client.get(path + (f"&cursor={cursor}" if cursor else ""), headers=headers)
+        assert r.status_code == 200, r.text
+        itens += r.json()
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            return itens
+
+
+def test_tenants_are_paginated(client, admin_headers, tenants):
+    todos = _todas_paginas(client, admin_headers, "/api/super-admin/tenants?limit=2&sort=subdomain&order=asc")
+    subdomains = [t["subdomain"] for t in todos]
+    assert subdomains == sorted(subdomains)
+    assert len(subdomains) == len(set(subdomains))
+    assert {"admlist-alfa", "admlist-beta", "admlist-gama"} <= set(subdomains)
+
+
+@pytest.mark.parametrize("q,esperados", [
+    ("ADMLIST-", {"admlist-alfa", "admlist-beta", "admlist-gama"}),
+    ("Admlist-Be", {"admlist-beta"}),
+    ("admin@admlist-alfa", {"admlist-alfa"}),  # login email of the tenant admin
+    ("%", set()),
+])
+def test_tenant_search(client, admin_headers, tenants, q, esperados):
+    r = client.get("/api/super-admin/tenants", headers=admin_headers, params={"q": q, "limit": 500})
+    assert {t["subdomain"] for t in r.json()} == esperados
+
+
+def test_tenant_filters(client, admin_headers, tenants):
+    r = client.get("/api/super-admin/tenants?q=admlist&is_active=false", headers=admin_headers)
+    assert [t["subdomain"] for t in r.json()] == ["admlist-gama"]
+    r = client.get("/api/super-admin/tenants?q=admlist&subscription_status=trial&plan=basic", headers=admin_headers)
+    assert {t["subdomain"] for t in r.json()} == {"admlist-alfa", "admlist-beta"}
+    assert client.get("/api/super-admin/tenants?sort=cnpj", headers=admin_headers).status_code == 400
+
+
+def test_tenant_listing_is_super_admin_only(client, tenants):
+    _, headers = tenants["admlist-alfa"]
+    assert client.get("/api/super-admin/tenants", headers=headers).status_code == 403
+
+
+def test_users_search_and_scope(client, admin_headers, tenants):
+    tenant_id, headers = tenants["admlist-alfa"]
+    client.post("/api/users", headers=headers, json={"email": "maria@admlist-alfa.com", "name": "Maria", "password": "secret123"})
+
+    r = client.get("/api/users?q=mar", headers=admin_headers)
+    assert [u["email"] for u in r.json()] == ["maria@admlist-alfa.com"]
+    r = client.get(f"/api/users?tenant_id={tenant_id}&role=admin_empresa", headers=admin_headers)
+    assert [u["email"] for u in r.json()] == ["admin@admlist-alfa.com"]
+
+    # Tenant admins only ever see their own users
+    todos = _todas_paginas(client, headers, "/api/users?limit=1&sort=name&order=asc")
+    assert [u["name"] for u in todos] == ["Admin", "Maria"]
+    _, outro = tenants["admlist-beta"]
+    assert client.get("/api/users?q=maria", headers=outro).json() == []
@@ -0,0 +1,270 @@
+"""Availability engine: overlap rejection and free slots."""
+import itertools
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from agenda import AGENDA_TIMEZONE, expandir_recorrencia, horarios_livres, ocupacao_maxima
+from conftest import create_tenant
+from database import SessionLocal
+
+DIA = date.today() + timedelta(days=30)
+# Days of their own for the tests that read a booked day, clear of the others
+_DIAS_LIVRES = itertools.count(200, 3)
+
+
+def local(hora: str, dia: date = DIA) -> str:
+    """Naive salon time, as sent by the agenda form"""
+    return f"{dia}T{hora}:00"
+
+
+def utc(hora: str, dia: date = DIA) -> str:
+    return datetime.fromisoformat(local(hora, dia)).replace(tzinfo=AGENDA_TIMEZONE).astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+@pytest.fixture(scope="module")
+def agenda(client, admin_headers):
+    tenant_id, headers = create_tenant(client, admin_headers, "agenda")
+    cliente = client.post("/api/clientes", headers=headers, json={"nome": "Ana"}).json()
+    corte = client.post("/api/servicos", headers=headers, json={"nome": "Corte", "preco": 50, "duracao_minutos": 60}).json()
+    barba = client.post("/api/servicos", headers=headers, json={"nome": "Barba", "preco": 30, "duracao_minutos": 30}).json()
+
+    def agendar(hora, servico=corte, dia=DIA, **extra):
+        return client.post("/api/agendamentos", headers=headers, json={
+            "cliente_id": cliente["id"], "servico_id": servico["id"], "data_hora": local(hora, dia), **extra})
+
+    return {"tenant_id": tenant_id, "headers": headers, "cliente": cliente, "corte": corte, "barba": barba, "agendar": agendar}
+
+
+@pytest.fixture
+def dia_ocupado(agenda):
+    """A day of its own with 09:30 barba, 10:00 corte, 10:30 corte (cancelado), 12:00 and 16:00 corte."""
+    dia = DIA + timedelta(days=next(_DIAS_LIVRES))
+    agendar = agenda["agendar"]
+    for hora, servico, extra in (("09:30", agenda["barba"], {}), ("10:00", agenda["corte"], {}),
+                                 ("10:30", agenda["corte"], {"status": "cancelado"}),
+                                 ("12:00", agenda["corte"], {}), ("16:00", agenda["corte"], {})):
+        r = agendar(hora, servico=servico, dia=dia, **extra)
+        assert r.status_code == 200, r.text
+    return dia
+
+
+def t(minuto: int) -> datetime:
+    return datetime(2030, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=minuto)
+
+
+def test_ocupacao_maxima():
+    intervalos = [(t(0), t(60)), (t(30), t(90)), (t(60), t(120))]
+    assert ocupacao_maxima(intervalos, t(0), t(120)) == 2
+    # Back-to-back intervals do not overlap
+    assert ocupacao_maxima([(t(0), t(60)), (t(60), t(120))], t(0), t(120)) == 1
+    assert ocupacao_maxima(intervalos, t(120), t(180)) == 0
+
+
+def test_overlap_rejected(client, agenda):
+    agendar = agenda["agendar"]
+    r = agendar("10:00")
+    assert r.status_code == 200, r.text
+    assert r.json()["data_hora"].startswith(utc("10:00")[:19])
+
+    assert agendar("10:30").status_code == 409
+    assert agendar("09:30", servico=agenda["barba"]).status_code == 200  # ends at 10:00
+    assert agendar("09:45", servico=agenda["barba"]).status_code == 409
+    assert agendar("10:30", status="cancelado").status_code == 200
+    seguinte = agendar("11:00")
+    assert seguinte.status_code == 200
+
+    # Rescheduling checks the other agendamentos only
+    headers, corpo = agenda["headers"], {"cliente_id": agenda["cliente"]["id"], "servico_id": agenda["corte"]["id"]}
+    url = f"/api/agendamentos/{seguinte.json()['id']}"
+    assert client.put(url, headers=headers, json={**corpo, "data_hora": local("10:30")}).status_code == 409
+    assert client.put(url, headers=headers, json={**corpo, "data_hora": local("11:00"), "observacoes": "x"}).status_code == 200
+    assert client.put(url, headers=headers, json={**corpo, "data_hora": local("12:00")}).status_code == 200
+
+    assert agendar("15:00", servico={"id": "nao-existe"}).status_code == 404
+
+
+def test_disponibilidade(client, agenda, dia_ocupado):
+    r = client.get("/api/agendamentos/disponibilidade", headers=agenda["headers"], params={
+        "servico_id": agenda["corte"]["id"], "data_inicio": str(dia_ocupado), "data_fim": str(dia_ocupado + timedelta(days=1)),
+        "intervalo": 30})
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["duracao_minutos"] == 60
+    dia, seguinte = body["dias"]
+    assert dia["data"] == str(dia_ocupado)
+    horarios = {horario[:19] for horario in dia["horarios"]}
+    assert utc("08:00", dia_ocupado)[:19] in horarios
+    # Busy: 09:30-10:00 barba, 10:00 corte, 12:00 corte, 16:00 corte
+    for hora in ("09:00", "09:30", "10:00", "10:30", "11:30", "12:00", "15:30", "16:00", "16:30"):
+        assert utc(hora, dia_ocupado)[:19] not in horarios, hora
+    assert utc("11:00", dia_ocupado)[:19] in horarios and utc("13:00", dia_ocupado)[:19] in horarios
+    # Last start still ends by closing time (20:00)
+    assert utc("19:00", dia_ocupado)[:19] in horarios and utc("19:30", dia_ocupado)[:19] not in horarios
+    assert len(seguinte["horarios"]) == 23
+
+
+def test_disponibilidade_capacidade(agenda, dia_ocupado):
+    def livres(capacidade):
+        db = SessionLocal()
+        try:
+            ((_, horarios),) = horarios_livres(db, agenda["tenant_id"], 60, dia_ocupado, dia_ocupado,
+                                               intervalo_minutos=30, capacidade=capacidade)
+        finally:
+            db.close()
+        return {horario.isoformat()[:19] for horario in horarios}
+
+    # The agendamentos never overlap each other: a second chair frees every start time
+    uma, duas = livres(1), livres(2)
+    assert utc("09:30", dia_ocupado)[:19] not in uma and utc("09:30", dia_ocupado)[:19] in duas
+    assert len(duas) == 23
+
+
+def test_disponibilidade_validation(client, agenda):
+    headers, servico_id = agenda["headers"], agenda["corte"]["id"]
+    def get(**params):
+        return client.get("/api/agendamentos/disponibilidade", headers=headers, params={"servico_id": servico_id, **params}).status_code
+    assert get(data_inicio=str(DIA), data_fim=str(DIA - timedelta(days=1))) == 400
+    assert get(data_inicio=str(DIA), data_fim=str(DIA + timedelta(days=40))) == 400
+    assert get(data_inicio=str(DIA), abertura="18:00", fechamento="08:00") == 400
+    assert client.get("/api/agendamentos/disponibilidade", headers=headers,
+                      params={"servico_id": "nao-existe", "data_inicio": str(DIA)}).status_code == 404
+
+
+def test_calendario(client, agenda, dia_ocupado):
+    dia = dia_ocupado
+    # 23:30 in the salon is already the next day in UTC
+    assert agenda["agendar"]("23:30", servico=agenda["barba"], dia=dia).status_code == 200
+    r = client.get("/api/agendamentos/calendario", headers=agenda["headers"], params={
+        "data_inicio": str(dia - timedelta(days=1)), "data_fim": str(dia + timedelta(days=1))})
+    assert r.status_code == 200, r.text
+    anterior, atual, seguinte = r.json()
+    assert [anterior["data"], atual["data"], seguinte["data"]] == [str(dia - timedelta(days=1)), str(dia), str(dia + timedelta(days=1))]
+    assert anterior["agendamentos"] == [] and seguinte["agendamentos"] == []
+    horarios = [item["data_hora"][:19] for item in atual["agendamentos"]]
+    assert horarios == [utc(hora, dia)[:19] for hora in ("09:30", "10:00", "10:30", "12:00", "16:00", "23:30")]
+    primeiro = atual["agendamentos"][0]
+    assert primeiro["cliente_nome"] == "Ana" and primeiro["servico_nome"] == "Barba" and primeiro["duracao_minutos"] == 30
+
+    r = client.get("/api/agendamentos/calendario", headers=agenda["headers"], params={"data_inicio": str(dia), "status": "cancelado"})
+    dias = r.json()
+    assert len(dias) == 7
+    assert [item["data_hora"][:19] for item in dias[0]["agendamentos"]] == [utc("10:30", dia)[:19]]
+
+    def status(**params):
+        return client.get("/api/agendamentos/calendario", headers=agenda["headers"], params=params).status_code
+    assert status(data_inicio=str(dia), data_fim=str(dia - timedelta(days=1))) == 400
+    assert status(data_inicio=str(dia), data_fim=str(dia + timedelta(days=60))) == 400
+
+
+def test_list_window(client, agenda, dia_ocupado):
+    dia = dia_ocupado
+    assert agenda["agendar"]("23:30", servico=agenda["barba"], dia=dia).status_code == 200
+
+    def horarios(**params):
+        r = client.get("/api/agendamentos", headers=agenda["headers"], params=params)
+        assert r.status_code == 200, r.text
+        return [item["data_hora"][:19] for item in r.json()]
+
+    # Without a sort, a window is listed by data_hora
+    assert horarios(**{"from": local("10:00", dia), "to": local("16:00", dia), "order": "asc"}) == [
+        utc(hora, dia)[:19] for hora in ("10:00", "10:30", "12:00")]
+    assert horarios(**{"from": local("10:00", dia), "to": local("16:00", dia), "status": "agendado"}) == [
+        utc(hora, dia)[:19] for hora in ("12:00", "10:00")]
+    assert horarios(**{"from": utc("16:00", dia), "to": str(dia + timedelta(days=2))}) == [utc(hora, dia)[:19] for hora in ("23:30", "16:00")]
+
+
+def test_expandir_recorrencia():
+    def locais(*args, **kwargs):
+        return [inicio.astimezone(AGENDA_TIMEZONE).strftime("%Y-%m-%d %H:%M") for inicio in expandir_recorrencia(*args, **kwargs)]
+
+    assert locais(datetime(2030, 1, 31, 9, 0), "mensal", 3) == ["2030-01-31 09:00", "2030-02-28 09:00", "2030-03-31 09:00"]
+    assert locais(datetime(2030, 1, 1, 9, 0), "quinzenal", ate=date(2030, 1, 29)) == ["2030-01-01 09:00", "2030-01-15 09:00", "2030-01-29 09:00"]
+    # Stops one past the limit
+    assert len(expandir_recorrencia(datetime(2030, 1, 1, 9, 0), "semanal", ate=date(2040, 1, 1), limite=5)) == 6
+
+
+def test_lote(client, agenda):
+    headers = agenda["headers"]
+    inicio = DIA + timedelta(days=60)
+    ocupado = client.post("/api/agendamentos", headers=headers, json={
+        "cliente_id": agenda["cliente"]["id"], "servico_id": agenda["barba"]["id"],
+        "data_hora": f"{inicio + timedelta(days=7)}T10:30:00"})
+    assert ocupado.status_code == 200, ocupado.text
+    serie = {"cliente_id": agenda["cliente"]["id"], "servico_id": agenda["corte"]["id"], "data_hora": f"{inicio}T10:00:00",
+             "recorrencia": {"frequencia": "semanal", "quantidade": 4}}
+
+    r = client.post("/api/agendamentos/lote", headers=headers, json={**serie, "tudo_ou_nada": True})
+    assert r.status_code == 200, r.text
+    assert r.json()["criados"] == 0 and [o["resultado"] for o in r.json()["ocorrencias"]] == ["livre", "conflito", "livre", "livre"]
+
+    r = client.post("/api/agendamentos/lote", headers=headers, json=serie)
+    body = r.json()
+    assert (body["criados"], body["conflitos"]) == (3, 1)
+    assert [o["resultado"] for o in body["ocorrencias"]] == ["criado", "conflito", "criado", "criado"]
+    dias = client.get("/api/agendamentos/calendario", headers=headers, params={
+        "data_inicio": str(inicio), "data_fim": str(inicio + timedelta(days=21))}).json()
+    assert [len(dia["agendamentos"]) for dia in dias[::7]] == [1, 1, 1, 1]
+    assert dias[0]["agendamentos"][0]["id"] == body["ocorrencias"][0]["id"]
+
+    # An explicit list is checked against itself too
+    datas = [f"{inicio + timedelta(days=1)}T15:00:00", f"{inicio + timedelta(days=1)}T15:30:00", f"{inicio + timedelta(days=2)}T15:00:00"]
+    r = client.post("/api/agendamentos/lote", headers=headers, json={**serie, "recorrencia": None, "datas": datas})
+    assert [o["resultado"] for o in r.json()["ocorrencias"]] == ["criado", "conflito", "criado"]
+
+
+def test_lote_validation(client, agenda):
+    headers = agenda["headers"]
+    base = {"cliente_id": agenda["cliente"]["id"], "servico_id": agenda["corte"]["id"], "data_hora": local("10:00")}
+    def status(**corpo):
+        return client.post("/api/agendamentos/lote", headers=headers, json={**base, **corpo}).status_code
+    assert status() == 422
+    assert status(recorrencia={"frequencia": "semanal"}) == 422
+    assert status(recorrencia={"frequencia": "diaria", "quantidade": 2}) == 422
+    assert status(recorrencia={"frequencia": "semanal", "quantidade": 2}, datas=[local("11:00")]) == 422
+    assert status(recorrencia={"frequencia": "semanal", "ate": str(DIA + timedelta(days=1000))}) == 400
+    assert status(recorrencia={"frequencia": "semanal", "ate": str(DIA - timedelta(days=1))}) == 400
+    assert status(recorrencia={"frequencia": "semanal", "quantidade": 2}, servico_id="nao-existe") == 404
+
+
+def test_data_hora_sent_in_utc(client, agenda):
+    # A 10:00 salon booking comes back as the same instant, with its offset, from every route
+    headers, dia = agenda["headers"], DIA + timedelta(days=90)
+    esperado = datetime.combine(dia, datetime.min.time().replace(hour=10), tzinfo=AGENDA_TIMEZONE).astimezone(timezone.utc)
+
+    def instante(valor):
+        lido = datetime.fromisoformat(valor.replace("Z", "+00:00"))
+        assert lido.tzinfo is not None, valor
+        return lido
+
+    corpo = {"cliente_id": agenda["cliente"]["id"], "servico_id": agenda["corte"]["id"]}
+    criado = client.post("/api/agendamentos", headers=headers, json={**corpo, "data_hora": f"{dia}T10:00:00"}).json()
+    assert instante(criado["data_hora"]) == esperado and instante(criado["created_at"])
+
+    listado = client.get("/api/agendamentos", headers=headers, params={"from": str(dia), "to": str(dia + timedelta(days=1))}).json()
+    assert [instante(item["data_hora"]) for item in listado] == [esperado]
+    assert instante(listado[0]["created_at"])
+
+    (calendario,) = client.get("/api/agendamentos/calendario", headers=headers, params={"data_inicio": str(dia), "data_fim": str(dia)}).json()
+    assert [instante(item["data_hora"]) for item in calendario["agendamentos"]] == [esperado]
+
+    (disponivel,) = client.get("/api/agendamentos/disponibilidade", headers=headers, params={
+        "servico_id": agenda["corte"]["id"], "data_inicio": str(dia), "intervalo": 60}).json()["dias"]
+    horarios = [instante(horario) for horario in disponivel["horarios"]]
+    assert esperado not in horarios and esperado + timedelta(hours=1) in horarios
+
+    lote = client.post("/api/agendamentos/lote", headers=headers, json={
+        **corpo, "datas": [f"{dia}T10:00:00", f"{dia}T11:00:00"]}).json()
+    assert [(instante(o["data_hora"]), o["resultado"]) for o in lote["ocorrencias"]] == [
+        (esperado, "conflito"), (esperado + timedelta(hours=1), "criado")]
+
+
+def test_agendamentos_hoje_by_salon_day(client, agenda):
+    # Both ends of the salon's day, which fall on different UTC days
+    hoje = datetime.now(AGENDA_TIMEZONE).date()
+    antes = client.get("/api/dashboard", headers=agenda["headers"]).json()["agendamentos_hoje"]
+    for hora in ("00:30", "23:30"):
+        r = client.post("/api/agendamentos", headers=agenda["headers"], json={
+            "cliente_id": agenda["cliente"]["id"], "servico_id": agenda["barba"]["id"], "data_hora": f"{hoje}T{hora}:00"})
+        assert r.status_code == 200, r.text
+    assert client.get("/api/dashboard", headers=agenda["headers"]).json()["agendamentos_hoje"] == antes + 2
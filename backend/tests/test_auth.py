@@ -0,0 +1,119 @@
+"""Access tokens: the principal cache, and revocation through users.token_version."""
+import re
+from datetime import timedelta
+
+import pytest
+
+import server
+from auth_cache import principal_cache
+from conftest import capture_selects, create_tenant
+from server import create_access_token
+
+AUTH_TABLES = re.compile(r"\b(FROM|JOIN)\s+(users|tenants)\b", re.IGNORECASE)
+
+
+def _login(client, email, subdomain, password="secret123"):
+    r = client.post("/api/auth/login", json={"email": email, "password": password, "subdomain": subdomain})
+    assert r.status_code == 200, r.text
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def _operador(client, headers, subdomain, email):
+    r = client.post("/api/users", headers=headers, json={"email": email, "name": "Operador", "password": "secret123"})
+    assert r.status_code == 200, r.text
+    return r.json()["id"], _login(client, email, subdomain)
+
+
+def test_deactivation_revokes_tokens_for_good(client, admin_headers):
+    _, headers = create_tenant(client, admin_headers, "revogacao")
+    user_id, operador = _operador(client, headers, "revogacao", "op@revogacao.com")
+    assert client.get("/api/auth/me", headers=operador).status_code == 200
+
+    assert client.put(f"/api/users/{user_id}/toggle-status", headers=headers).status_code == 200
+    assert client.get("/api/auth/me", headers=operador).status_code == 401
+
+    # Reactivating the user does not bring the old token back
+    assert client.put(f"/api/users/{user_id}/toggle-status", headers=headers).status_code == 200
+    assert client.get("/api/auth/me", headers=operador).status_code == 401
+    assert client.get("/api/auth/me", headers=_login(client, "op@revogacao.com", "revogacao")).status_code == 200
+
+
+def test_role_change_revokes_tokens(client, admin_headers):
+    _, headers = create_tenant(client, admin_headers, "papel")
+    user_id, operador = _operador(client, headers, "papel", "op@papel.com")
+    usuario = {"email": "op@papel.com", "password": "", "role": "operador"}
+
+    # Renaming keeps the claims valid
+    r = client.put(f"/api/users/{user_id}", headers=headers, json={**usuario, "name": "Novo Nome"})
+    assert r.status_code == 200, r.text
+    assert client.get("/api/auth/me", headers=operador).status_code == 200
+
+    r = client.put(f"/api/users/{user_id}", headers=headers, json={**usuario, "name": "Novo Nome", "role": "admin_empresa"})
+    assert r.status_code == 200, r.text
+    assert client.get("/api/auth/me", headers=operador).status_code == 401
+    r = client.get("/api/auth/me", headers=_login(client, "op@papel.com", "papel"))
+    assert r.json()["role"] == "admin_empresa"
+
+
+def test_deleted_user_token_rejected(client, admin_headers):
+    _, headers = create_tenant(client, admin_headers, "exclusao")
+    user_id, operador = _operador(client, headers, "exclusao", "op@exclusao.com")
+    assert client.delete(f"/api/users/{user_id}", headers=headers).status_code == 200
+    assert client.get("/api/auth/me", headers=operador).status_code == 401
+
+
+def test_legacy_email_subject_rejected(client, admin_headers):
+    create_tenant(client, admin_headers, "legado")
+    token = create_access_token({"sub": "admin@legado.com"}, expires_delta=timedelta(minutes=5))
+    r = client.get("/api/auth/me", headers={"Authorization": f"Bearer {token}"})
+    assert r.status_code == 401
+
+
+def test_suspended_tenant_forbidden(client, admin_headers):
+    tenant_id, headers = create_tenant(client, admin_headers, "suspensao")
+    assert client.get("/api/clientes", headers=headers).status_code == 200
+
+    assert client.put(f"/api/super-admin/tenants/{tenant_id}/toggle-status", headers=admin_headers).status_code == 200
+    r = client.get("/api/clientes", headers=headers)
+    assert r.status_code == 403
+    assert r.json()["detail"] == "Tenant account suspended"
+
+    assert client.put(f"/api/super-admin/tenants/{tenant_id}/toggle-status", headers=admin_headers).status_code == 200
+    assert client.get("/api/clientes", headers=headers).status_code == 200
+
+
+def _auth_selects(statements):
+    return [statement for statement, _ in statements if AUTH_TABLES.search(statement)]
+
+
+@pytest.mark.skipif(server.AUTH_STRICT_MODE, reason="AUTH_STRICT_MODE checks every request against the database")
+def test_steady_state_auth_runs_no_queries(client, admin_headers):
+    tenant_id, headers = create_tenant(client, admin_headers, "cacheauth")
+    user_id, operador = _operador(client, headers, "cacheauth", "op@cacheauth.com")
+    assert client.get("/api/auth/me", headers=operador).status_code == 200
+    assert client.get("/api/auth/me", headers=headers).status_code == 200
+
+    antes = principal_cache.stats()
+    with capture_selects() as statements:
+        assert client.get("/api/auth/me", headers=operador).status_code == 200
+    assert statements == []
+    with capture_selects() as statements:
+        assert client.get("/api/clientes", headers=headers).status_code == 200
+    assert statements and _auth_selects(statements) == []
+    depois = principal_cache.stats()
+    assert (depois["hits"] - antes["hits"], depois["misses"] - antes["misses"]) == (2, 0)
+
+    # A status change drops the cached state: the next request reloads it
+    assert client.put(f"/api/users/{user_id}/toggle-status", headers=headers).status_code == 200
+    antes = principal_cache.stats()
+    with capture_selects() as statements:
+        assert client.get("/api/auth/me", headers=operador).status_code == 401
+    assert principal_cache.stats()["misses"] == antes["misses"] + 1
+    assert _auth_selects(statements)
+
+    assert client.put(f"/api/super-admin/tenants/{tenant_id}/toggle-status", headers=admin_headers).status_code == 200
+    antes = principal_cache.stats()
+    with capture_selects() as statements:
+        assert client.get("/api/clientes", headers=headers).status_code == 403
+    assert principal_cache.stats()["misses"] == antes["misses"] + 1
+    assert _auth_selects(statements)
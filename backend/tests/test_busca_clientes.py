@@ -0,0 +1,101 @@
+"""Indexed cliente search (/api/clientes/search)."""
+import pytest
+
+import busca_clientes
+
+from conftest import create_tenant
+from normalizacao import documento_busca, termos_busca
+
+
+@pytest.fixture(scope="module")
+def headers(client, admin_headers):
+    _, headers = create_tenant(client, admin_headers, "buscaclientes")
+    for cliente in [
+        {"nome": "João Conceição", "email": "joao.c@exemplo.com.br", "telefone": "(11) 98765-4321", "cpf_cnpj": "123.456.789-09"},
+        {"nome": "Joana Silva", "email": "joana@exemplo.com", "telefone": "21 3333-0000"},
+        {"nome": "Maria José D'Ávila", "cpf_cnpj": "12.345.678/0001-95"},
+        {"nome": "Ana Maria", "email": "ana@exemplo.com"},
+        {"nome": "Mariana Souza"},
+    ]:
+        assert client.post("/api/clientes", headers=headers, json=cliente).status_code == 200
+    return headers
+
+
+def buscar(client, headers, q, **params):
+    r = client.get("/api/clientes/search", headers=headers, params={"q": q, **params})
+    assert r.status_code == 200, r.text
+    return [cliente["nome"] for cliente in r.json()]
+
+
+def test_normalizacao():
+    assert documento_busca("João D'Ávila", "J.A@x.com", "(11) 9876-5432", None) == "joao d avila j a x com 11 9876 5432 1198765432"
+    assert termos_busca("(11) 9876") == ["119876"]
+    assert termos_busca("  Conceição  123.4 ") == ["conceicao", "1234"]
+    assert termos_busca(" -- ") == []
+
+
+def test_accent_and_case_insensitive(client, headers):
+    assert buscar(client, headers, "joao") == ["João Conceição"]
+    assert buscar(client, headers, "CONCEICAO") == ["João Conceição"]
+    assert buscar(client, headers, "davila") == [] and buscar(client, headers, "d'avila") == ["Maria José D'Ávila"]
+
+
+def test_prefix_of_every_term(client, headers):
+    assert sorted(buscar(client, headers, "jo")) == ["Joana Silva", "João Conceição", "Maria José D'Ávila"]
+    assert buscar(client, headers, "mar jos") == ["Maria José D'Ávila"]
+    assert buscar(client, headers, "xyz") == []
+
+
+def test_formatted_numbers(client, headers):
+    for q in ("123.456.789-09", "12345678909", "123456789"):
+        assert buscar(client, headers, q) == ["João Conceição"], q
+    assert buscar(client, headers, "(11) 98765-4321") == ["João Conceição"]
+    assert buscar(client, headers, "98765") == ["João Conceição"]
+    assert buscar(client, headers, "12.345.678/0001") == ["Maria José D'Ávila"]
+
+
+def test_email(client, headers):
+    assert buscar(client, headers, "joana@exemplo") == ["Joana Silva"]
+
+
+def test_ranking_and_limit(client, headers):
+    nomes = buscar(client, headers, "maria")
+    assert set(nomes) == {"Ana Maria", "Maria José D'Ávila", "Mariana Souza"}
+    assert buscar(client, headers, "maria", limit=1) == nomes[:1]
+    assert client.get("/api/clientes/search", headers=headers, params={"q": "a", "limit": 500}).status_code == 422
+
+
+def test_best_match_beyond_candidate_limit(client, headers, monkeypatch):
+    monkeypatch.setattr(busca_clientes, "BUSCA_CANDIDATOS", 3)
+    # Matches indexed before the best one fill the candidate limit
+    for i in range(3):
+        client.post("/api/clientes", headers=headers, json={"nome": f"Cliente {i}", "email": f"rosa{i}@exemplo.com"})
+        client.post("/api/clientes", headers=headers, json={"nome": f"Rosana {i}"})
+    client.post("/api/clientes", headers=headers, json={"nome": "Rosa Lima"})
+    assert buscar(client, headers, "rosa", limit=1) == ["Rosa Lima"]
+    assert buscar(client, headers, "lima rosa", limit=1) == ["Rosa Lima"]
+
+
+def test_follows_updates_and_deletes(client, headers):
+    cliente = client.post("/api/clientes", headers=headers, json={"nome": "Zélia Prado"}).json()
+    assert buscar(client, headers, "zelia") == ["Zélia Prado"]
+    r = client.put(f"/api/clientes/{cliente['id']}", headers=headers, json={"nome": "Zélia Prado", "telefone": "31 99999-1111"})
+    assert r.status_code == 200
+    assert buscar(client, headers, "3199999") == ["Zélia Prado"]
+    client.delete(f"/api/clientes/{cliente['id']}", headers=headers)
+    assert buscar(client, headers, "zelia") == []
+
+
+def test_imported_clientes_are_searchable(client, headers):
+    r = client.post("/api/clientes/import", headers={**headers, "Content-Type": "application/x-ndjson"},
+                    content='{"nome": "Ícaro Importado", "cpf_cnpj": "987.654.321-00"}\n')
+    assert r.status_code == 200, r.text
+    assert buscar(client, headers, "icaro") == ["Ícaro Importado"]
+    assert buscar(client, headers, "98765432100") == ["Ícaro Importado"]
+
+
+def test_tenant_isolation(client, admin_headers, headers):
+    _, outros = create_tenant(client, admin_headers, "buscaclientes2")
+    client.post("/api/clientes", headers=outros, json={"nome": "João Outro"})
+    assert buscar(client, headers, "joao") == ["João Conceição"]
+    assert buscar(client, outros, "joao") == ["João Outro"]
@@ -0,0 +1,78 @@
+"""Tenant dashboard figures read from the daily rollups."""
+from datetime import date, datetime, timedelta, timezone
+
+from agenda import AGENDA_TIMEZONE
+from conftest import create_tenant
+from database import ProdutoDiario, SessionLocal, User, Venda, VendaDiaria, VendaItem
+from rollups import dia_salao, rebuild_produtos_diarios, rebuild_vendas_diarias, registrar_venda
+
+
+def test_dashboard_from_rollups(client, admin_headers):
+    tenant_id, headers = create_tenant(client, admin_headers, "dashboard")
+    produto = {"nome": "Shampoo", "custo": 4, "preco": 10, "estoque_atual": 50}
+    shampoo = client.post("/api/produtos", headers=headers, json=produto).json()
+    condicionador = client.post("/api/produtos", headers=headers, json={**produto, "nome": "Condicionador", "custo": 3}).json()
+    servico = client.post("/api/servicos", headers=headers, json={"nome": "Corte", "preco": 50}).json()
+
+    def item(registro, tipo, quantidade, preco):
+        return {"tipo": tipo, "item_id": registro["id"], "nome": registro["nome"], "quantidade": quantidade,
+                "preco_unitario": preco, "total": quantidade * preco}
+
+    for itens in ([item(shampoo, "produto", 2, 10), item(servico, "servico", 1, 50)],
+                  [item(shampoo, "produto", 1, 10), item(condicionador, "produto", 1, 12)]):
+        r = client.post("/api/vendas", headers=headers, json={"itens": itens, "forma_pagamento": "pix"})
+        assert r.status_code == 200, r.text
+
+    # The cost is the one at sale time
+    client.put(f"/api/produtos/{shampoo['id']}", headers=headers, json={**produto, "custo": 100})
+    # Outside the default 30 day window
+    db = SessionLocal()
+    try:
+        db.add(ProdutoDiario(tenant_id=tenant_id, dia=datetime.now(timezone.utc).date() - timedelta(days=60),
+                             produto_id=condicionador["id"], nome="Condicionador", quantidade=10, total=120, custo=30))
+        db.commit()
+    finally:
+        db.close()
+
+    body = client.get("/api/dashboard", headers=headers).json()
+    assert body["total_vendas"] == 92
+    assert body["total_despesas"] == 3 * 4 + 3
+    assert [(p["nome"], p["vendas"], p["valor"]) for p in body["top_produtos"]] == [("Shampoo", 3, 30), ("Condicionador", 1, 12)]
+    assert sum(ponto["valor"] for ponto in body["vendas_periodo"]) == 92
+
+    inicio = (datetime.now(timezone.utc) - timedelta(days=90)).date()
+    body = client.get("/api/dashboard", headers=headers, params={"data_inicio": str(inicio)}).json()
+    assert body["total_despesas"] == 3 * 4 + 3 + 30
+    assert body["top_produtos"][0]["nome"] == "Condicionador"
+
+
+def test_sales_bucketed_by_salon_day(client, admin_headers):
+    tenant_id, _ = create_tenant(client, admin_headers, "diasalao")
+    # 21:30 in the salon is already the next day in UTC
+    noite = datetime(2030, 3, 10, 21, 30, tzinfo=AGENDA_TIMEZONE).astimezone(timezone.utc)
+    assert noite.date() == date(2030, 3, 11) and dia_salao(noite) == date(2030, 3, 10)
+
+    db = SessionLocal()
+    try:
+        vendedor_id = db.query(User.id).filter(User.tenant_id == tenant_id).scalar()
+        venda = Venda(itens="[]", subtotal=20, total=20, forma_pagamento="pix", tenant_id=tenant_id,
+                      vendedor_id=vendedor_id, created_at=noite)
+        venda.itens_venda = [VendaItem(tipo="produto", item_id="p1", nome="Shampoo", quantidade=2, preco_unitario=10,
+                                       total=20, tenant_id=tenant_id)]
+        db.add(venda)
+        db.flush()
+        registrar_venda(db, venda)
+        db.commit()
+
+        def dias():
+            return (sorted(dia for dia, in db.query(VendaDiaria.dia).filter(VendaDiaria.tenant_id == tenant_id)),
+                    sorted(dia for dia, in db.query(ProdutoDiario.dia).filter(ProdutoDiario.tenant_id == tenant_id)))
+
+        assert dias() == ([date(2030, 3, 10)], [date(2030, 3, 10)])
+        # A rebuild buckets the stored sales the same way
+        rebuild_vendas_diarias(db, tenant_id)
+        rebuild_produtos_diarios(db, tenant_id)
+        db.commit()
+        assert dias() == ([date(2030, 3, 10)], [date(2030, 3, 10)])
+    finally:
+        db.close()
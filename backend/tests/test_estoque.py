@@ -0,0 +1,83 @@
+"""Stock decrement of create_venda under concurrent sales."""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from conftest import create_tenant
+from database import Produto, SessionLocal
+
+PARALLEL_SALES = 40
+
+
+@pytest.fixture(scope="module")
+def tenant_headers(client, admin_headers):
+    _, headers = create_tenant(client, admin_headers, "estoque")
+    return headers
+
+
+def _produto(client, headers, estoque: int) -> dict:
+    r = client.post("/api/produtos", headers=headers, json={"nome": "Shampoo", "preco": 10.0, "estoque_atual": estoque})
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def _venda(produto: dict, quantidade: int, **extra) -> dict:
+    return {
+        "itens": [{"tipo": "produto", "item_id": produto["id"], "nome": produto["nome"], "quantidade": quantidade,
+                   "preco_unitario": 10.0, "total": 10.0 * quantidade}],
+        "forma_pagamento": "pix",
+        **extra,
+    }
+
+
+def _estoque(produto_id: str) -> int:
+    db = SessionLocal()
+    try:
+        return db.query(Produto.estoque_atual).filter(Produto.id == produto_id).scalar()
+    finally:
+        db.close()
+
+
+def _vender_em_paralelo(client, headers, vendas):
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        return list(executor.map(lambda venda: client.post("/api/vendas", headers=headers, json=venda).status_code, vendas))
+
+
+def test_parallel_sales_decrement_exactly(client, tenant_headers):
+    produto = _produto(client, tenant_headers, estoque=100)
+    status = _vender_em_paralelo(client, tenant_headers, [_venda(produto, 2) for _ in range(PARALLEL_SALES)])
+    assert status == [200] * PARALLEL_SALES
+    assert _estoque(produto["id"]) == 100 - 2 * PARALLEL_SALES
+
+
+def test_same_product_twice_in_cart(client, tenant_headers):
+    produto = _produto(client, tenant_headers, estoque=10)
+    venda = _venda(produto, 3)
+    venda["itens"] *= 2
+    assert client.post("/api/vendas", headers=tenant_headers, json=venda).status_code == 200
+    assert _estoque(produto["id"]) == 4
+
+
+def test_reject_mode_never_oversells(client, tenant_headers):
+    produto = _produto(client, tenant_headers, estoque=25)
+    status = _vender_em_paralelo(
+        client, tenant_headers, [_venda(produto, 1, rejeitar_sem_estoque=True) for _ in range(PARALLEL_SALES)]
+    )
+    assert status.count(200) == 25
+    assert status.count(409) == PARALLEL_SALES - 25
+    assert _estoque(produto["id"]) == 0
+
+    # Rejected sales leave nothing behind
+    r = client.get("/api/vendas?limit=500", headers=tenant_headers)
+    assert sum(1 for venda in r.json() if venda["itens"][0]["item_id"] == produto["id"]) == 25
+
+
+def test_reject_mode_rolls_back_whole_cart(client, tenant_headers):
+    com_estoque = _produto(client, tenant_headers, estoque=5)
+    sem_estoque = _produto(client, tenant_headers, estoque=1)
+    venda = _venda(com_estoque, 2, rejeitar_sem_estoque=True)
+    venda["itens"] += _venda(sem_estoque, 2)["itens"]
+    r = client.post("/api/vendas", headers=tenant_headers, json=venda)
+    assert r.status_code == 409
+    assert _estoque(com_estoque["id"]) == 5
+    assert _estoque(sem_estoque["id"]) == 1
@@ -0,0 +1,64 @@
+"""Streaming export of vendas, clientes and produtos."""
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from conftest import create_tenant
+from exportacao import exportar
+
+
+@pytest.fixture(scope="module")
+def tenant(client, admin_headers):
+    tenant_id, headers = create_tenant(client, admin_headers, "exportacao")
+    linhas = ["codigo,nome,preco"] + [f"P{i},Produto {i},{i}" for i in range(2500)] + ["X,=HYPERLINK(1),1"]
+    r = client.post("/api/produtos/import", headers={**headers, "Content-Type": "text/csv"}, content="\n".join(linhas).encode())
+    assert r.json()["importados"] == 2501
+    produto = client.get("/api/produtos?codigo=P1", headers=headers).json()[0]
+    for _ in range(3):
+        r = client.post("/api/vendas", headers=headers, json={
+            "itens": [{"tipo": "produto", "item_id": produto["id"], "nome": produto["nome"], "quantidade": 2,
+                       "preco_unitario": 1.0, "total": 2.0}],
+            "forma_pagamento": "pix",
+        })
+        assert r.status_code == 200, r.text
+    return tenant_id, headers
+
+
+def test_export_produtos_csv(client, tenant):
+    _, headers = tenant
+    r = client.get("/api/produtos/export", headers=headers)
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/csv")
+    assert "attachment" in r.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(r.text)))
+    assert len(rows) == 2501
+    assert rows[0]["codigo"] == "P0"
+    assert rows[-1]["nome"] == "'=HYPERLINK(1)"
+
+
+def test_export_vendas_ndjson_with_items(client, tenant):
+    _, headers = tenant
+    r = client.get("/api/vendas/export?formato=ndjson", headers=headers)
+    assert r.status_code == 200
+    vendas = [json.loads(linha) for linha in r.text.splitlines()]
+    assert len(vendas) == 3
+    assert vendas[0]["itens"][0]["quantidade"] == 2
+    assert vendas[0]["total"] == 2.0
+
+
+def test_export_date_filter(client, tenant):
+    _, headers = tenant
+    amanha = (datetime.now(timezone.utc) + timedelta(days=1)).date()
+    r = client.get(f"/api/vendas/export?data_inicio={amanha}", headers=headers)
+    assert r.text.splitlines()[1:] == []
+    r = client.get(f"/api/vendas/export?data_inicio={amanha}&data_fim={amanha - timedelta(days=2)}", headers=headers)
+    assert r.status_code == 400
+
+
+def test_export_streams_in_partitions(tenant):
+    tenant_id, _ = tenant
+    partes = list(exportar(tenant_id, "produtos", "ndjson", batch_size=1000))
+    assert [len(parte.splitlines()) for parte in partes] == [1000, 1000, 501]
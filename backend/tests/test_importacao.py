@@ -0,0 +1,53 @@
+"""Bulk import of clientes and produtos."""
+import json
+
+import pytest
+
+from conftest import create_tenant
+
+
+@pytest.fixture(scope="module")
+def tenant_headers(client, admin_headers):
+    _, headers = create_tenant(client, admin_headers, "importacao")
+    return headers
+
+
+def test_import_produtos_csv(client, tenant_headers):
+    linhas = ["codigo;nome;preco;custo;estoque_atual;categoria"]
+    linhas += [f"P{i};Produto {i};{i}.50;1;{i % 7};cat{i % 3}" for i in range(5000)]
+    linhas.insert(10, "X1;Sem preco;;1;1;cat")
+    linhas.insert(20, "X2;Preco errado;abc;1;1;cat")
+    r = client.post("/api/produtos/import?chunk_size=700", headers={**tenant_headers, "Content-Type": "text/csv"},
+                    content="\n".join(linhas).encode())
+    assert r.status_code == 200, r.text
+    resultado = r.json()
+    assert resultado["total_linhas"] == 5002
+    assert resultado["importados"] == 5000
+    assert resultado["erros_total"] == 2
+    assert [erro["linha"] for erro in resultado["erros"]] == [11, 21]
+    assert "preco" in resultado["erros"][0]["erros"][0]
+
+    r = client.get("/api/produtos?codigo=P4999", headers=tenant_headers)
+    produto = r.json()[0]
+    assert (produto["nome"], produto["preco"], produto["estoque_atual"], produto["estoque_minimo"]) == ("Produto 4999", 4999.5, 1, 0)
+
+
+def test_import_clientes_ndjson_multipart(client, tenant_headers):
+    registros = [json.dumps({"nome": f"Cliente {i}", "email": f"c{i}@x.com", "telefone": str(i)}) for i in range(300)]
+    registros += ['{"nome": "Email ruim", "email": "nao-e-email"}', "[1, 2]", "{quebrado"]
+    r = client.post("/api/clientes/import", headers=tenant_headers,
+                    files={"file": ("clientes.ndjson", "\n".join(registros).encode(), "application/octet-stream")})
+    assert r.status_code == 200, r.text
+    resultado = r.json()
+    assert (resultado["total_linhas"], resultado["importados"], resultado["erros_total"]) == (303, 300, 3)
+    assert [erro["linha"] for erro in resultado["erros"]] == [301, 302, 303]
+
+    r = client.get("/api/clientes?email=c299@x.com", headers=tenant_headers)
+    assert r.json()[0]["nome"] == "Cliente 299"
+
+
+def test_import_requires_known_format(client, tenant_headers):
+    r = client.post("/api/clientes/import", headers={**tenant_headers, "Content-Type": "application/octet-stream"}, content=b"nome\nA")
+    assert r.status_code == 400
+    r = client.post("/api/clientes/import?formato=csv", headers={**tenant_headers, "Content-Type": "application/octet-stream"}, content=b"nome\nA")
+    assert r.json()["importados"] == 1
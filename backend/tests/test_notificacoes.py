@@ -0,0 +1,54 @@
+"""Vencimento sweep (notificacoes.varrer_vencimentos)."""
+from datetime import datetime, timedelta, timezone
+
+from conftest import create_tenant
+from database import EmailOutbox, SessionLocal, Vencimento
+from notificacoes import varrer_vencimentos
+
+
+def test_sweep_notifies_open_windows_once(client, admin_headers):
+    tenant_id, _ = create_tenant(client, admin_headers, "vencimentos")
+    suspenso_id, _ = create_tenant(client, admin_headers, "vencimentossuspenso")
+    r = client.put(f"/api/super-admin/tenants/{suspenso_id}/toggle-status", headers=admin_headers)
+    assert r.status_code == 200, r.text
+
+    agora = datetime.now(timezone.utc)
+
+    def vencimento(tipo, dias, antecedencia, tenant=tenant_id):
+        return Vencimento(tipo=tipo, data_vencimento=agora + timedelta(days=dias), dias_antecedencia=antecedencia,
+                          email_notificacao=f"{tipo}@example.com", tenant_id=tenant)
+
+    db = SessionLocal()
+    try:
+        db.add_all([
+            vencimento("aberto", 5, 10),
+            vencimento("futuro", 20, 10),
+            vencimento("vencido", -1, 10),
+            vencimento("ampliado", 8, 5),
+            vencimento("suspenso", 5, 10, tenant=suspenso_id),
+        ])
+        db.commit()
+        # Widening dias_antecedencia moves notificar_em back and opens the window
+        ampliado = db.query(Vencimento).filter(Vencimento.tipo == "ampliado").one()
+        ampliado.dias_antecedencia = 10
+        db.commit()
+
+        def notificados():
+            rows = db.query(EmailOutbox.destinatario).filter(
+                EmailOutbox.tenant_id.in_([tenant_id, suspenso_id]), EmailOutbox.destinatario.like("%@example.com")
+            )
+            return sorted(destinatario for destinatario, in rows)
+
+        varrer_vencimentos(db, agora=agora, batch_size=1)
+        assert notificados() == ["aberto@example.com", "ampliado@example.com"]
+
+        # Each vencimento is notified once
+        varrer_vencimentos(db, agora=agora)
+        assert notificados() == ["aberto@example.com", "ampliado@example.com"]
+
+        # The window of "futuro" opens 10 days before it is due
+        varrer_vencimentos(db, agora=agora + timedelta(days=12))
+        assert notificados() == ["aberto@example.com", "ampliado@example.com", "futuro@example.com"]
+        assert db.query(Vencimento.notificado_email).filter(Vencimento.tipo == "suspenso").scalar() is False
+    finally:
+        db.close()
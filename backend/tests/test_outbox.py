@@ -0,0 +1,104 @@
+"""Email outbox worker (outbox.processar_lote) against the stub transport."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import outbox
+from database import EmailOutbox, SessionLocal, em_utc
+from outbox import StubTransport, backoff, enfileirar_email, processar_lote, reservar_lote
+
+
+@pytest.fixture
+def db():
+    db = SessionLocal()
+    # Messages queued by other tests must not land in these batches
+    outbox.drenar(db, StubTransport())
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def _enfileirar(db, destinatario):
+    mensagem = enfileirar_email(db, destinatario, "Assunto", "<p>Corpo</p>")
+    db.commit()
+    return mensagem.id
+
+
+def _mensagem(db, mensagem_id) -> EmailOutbox:
+    db.expire_all()
+    return db.get(EmailOutbox, mensagem_id)
+
+
+def _vencer(db, mensagem_id):
+    """Move the message's next attempt (backoff or lease) into the past."""
+    _mensagem(db, mensagem_id).proxima_tentativa = datetime.now(timezone.utc) - timedelta(seconds=1)
+    db.commit()
+
+
+def test_backoff_doubles_up_to_max():
+    assert backoff(1) == timedelta(seconds=outbox.OUTBOX_BACKOFF_BASE)
+    assert backoff(2) == timedelta(seconds=outbox.OUTBOX_BACKOFF_BASE * 2)
+    assert backoff(3) == timedelta(seconds=outbox.OUTBOX_BACKOFF_BASE * 4)
+    assert backoff(30) == timedelta(seconds=outbox.OUTBOX_BACKOFF_MAX)
+
+
+def test_failed_send_is_retried_after_backoff(db):
+    transport = StubTransport()
+    transport.falhas = 1
+    mensagem_id = _enfileirar(db, "retry@example.com")
+
+    antes = datetime.now(timezone.utc)
+    assert processar_lote(db, transport) == {"enviados": 0, "reagendados": 1, "falhou": 0}
+    mensagem = _mensagem(db, mensagem_id)
+    assert (mensagem.status, mensagem.tentativas, mensagem.lote) == ("pendente", 1, None)
+    assert mensagem.ultimo_erro == "stub transport failure"
+    assert em_utc(mensagem.proxima_tentativa) >= antes + backoff(1)
+
+    # Not due before the backoff elapses
+    assert processar_lote(db, transport) == {"enviados": 0, "reagendados": 0, "falhou": 0}
+
+    _vencer(db, mensagem_id)
+    assert processar_lote(db, transport) == {"enviados": 1, "reagendados": 0, "falhou": 0}
+    mensagem = _mensagem(db, mensagem_id)
+    assert (mensagem.status, mensagem.tentativas, mensagem.ultimo_erro) == ("enviado", 2, None)
+    assert mensagem.enviado_em is not None
+    assert [enviado.destinatario for enviado in transport.enviados] == ["retry@example.com"]
+
+
+def test_gives_up_after_max_attempts(db, monkeypatch):
+    monkeypatch.setattr(outbox, "OUTBOX_MAX_ATTEMPTS", 2)
+    transport = StubTransport()
+    transport.falhas = 10
+    mensagem_id = _enfileirar(db, "falha@example.com")
+
+    assert processar_lote(db, transport) == {"enviados": 0, "reagendados": 1, "falhou": 0}
+    _vencer(db, mensagem_id)
+    assert processar_lote(db, transport) == {"enviados": 0, "reagendados": 0, "falhou": 1}
+    mensagem = _mensagem(db, mensagem_id)
+    assert (mensagem.status, mensagem.tentativas) == ("falhou", 2)
+
+    # A failed message is never claimed again
+    _vencer(db, mensagem_id)
+    transport.falhas = 0
+    assert processar_lote(db, transport) == {"enviados": 0, "reagendados": 0, "falhou": 0}
+    assert transport.enviados == []
+
+
+def test_expired_lease_is_reclaimed(db):
+    transport = StubTransport()
+    mensagem_id = _enfileirar(db, "lease@example.com")
+
+    # A worker claims the message and crashes before sending it
+    assert [mensagem.id for mensagem in reservar_lote(db)] == [mensagem_id]
+    mensagem = _mensagem(db, mensagem_id)
+    assert (mensagem.status, mensagem.tentativas) == ("enviando", 1)
+
+    # Reserved while the lease lasts
+    assert processar_lote(db, transport) == {"enviados": 0, "reagendados": 0, "falhou": 0}
+
+    _vencer(db, mensagem_id)
+    assert processar_lote(db, transport) == {"enviados": 1, "reagendados": 0, "falhou": 0}
+    mensagem = _mensagem(db, mensagem_id)
+    assert (mensagem.status, mensagem.tentativas, mensagem.lote) == ("enviado", 2, None)
+    assert [enviado.destinatario for enviado in transport.enviados] == ["lease@example.com"]
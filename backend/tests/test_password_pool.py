@@ -0,0 +1,102 @@
+"""Bounded bcrypt pool (password_pool.PasswordPool)."""
+import asyncio
+import threading
+import time
+
+import pytest
+
+import server
+from password_pool import PasswordPool, PasswordPoolBusy
+
+
+def _bloqueante(liberar: threading.Event):
+    def fn():
+        assert liberar.wait(5)
+        return "ok"
+    return fn
+
+
+async def _esperar(condicao):
+    for _ in range(500):
+        if condicao():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+
+def test_concurrency_cap_and_counters():
+    pool = PasswordPool(max_workers=2, queue_limit=10)
+    lock = threading.Lock()
+    ativos = {"agora": 0, "max": 0}
+
+    def fn(i):
+        with lock:
+            ativos["agora"] += 1
+            ativos["max"] = max(ativos["max"], ativos["agora"])
+        time.sleep(0.02)
+        with lock:
+            ativos["agora"] -= 1
+        return i
+
+    async def main():
+        return await asyncio.gather(*[pool.run(fn, i) for i in range(6)])
+
+    assert asyncio.run(main()) == list(range(6))
+    assert ativos["max"] == 2
+    stats = pool.stats()
+    assert (stats["completed"], stats["running"], stats["queue_depth"], stats["rejected"]) == (6, 0, 0, 0)
+    # At most two of the six jobs had started when the last one was queued
+    assert stats["max_queue_depth"] >= 4
+    assert stats["avg_run_ms"] >= 20
+
+
+def test_queue_limit_rejects():
+    pool = PasswordPool(max_workers=1, queue_limit=1)
+    liberar = threading.Event()
+
+    async def main():
+        rodando = asyncio.ensure_future(pool.run(_bloqueante(liberar)))
+        await _esperar(lambda: pool.stats()["running"] == 1)
+        na_fila = asyncio.ensure_future(pool.run(_bloqueante(liberar)))
+        await asyncio.sleep(0)
+        assert pool.stats()["queue_depth"] == 1
+        with pytest.raises(PasswordPoolBusy):
+            await pool.run(_bloqueante(liberar))
+        liberar.set()
+        return await asyncio.gather(rodando, na_fila)
+
+    assert asyncio.run(main()) == ["ok", "ok"]
+    stats = pool.stats()
+    assert (stats["completed"], stats["rejected"], stats["queue_depth"]) == (2, 1, 0)
+
+
+def test_cancelled_while_queued_leaves_the_queue():
+    pool = PasswordPool(max_workers=1, queue_limit=1)
+    liberar = threading.Event()
+
+    async def main():
+        rodando = asyncio.ensure_future(pool.run(_bloqueante(liberar)))
+        await _esperar(lambda: pool.stats()["running"] == 1)
+        na_fila = asyncio.ensure_future(pool.run(_bloqueante(liberar)))
+        await asyncio.sleep(0)
+        assert pool.stats()["queue_depth"] == 1
+
+        # The client gave up before its job started
+        na_fila.cancel()
+        await asyncio.gather(na_fila, return_exceptions=True)
+        assert pool.stats()["queue_depth"] == 0
+        # The slot is free again
+        seguinte = asyncio.ensure_future(pool.run(_bloqueante(liberar)))
+        liberar.set()
+        return await asyncio.gather(rodando, seguinte)
+
+    assert asyncio.run(main()) == ["ok", "ok"]
+    stats = pool.stats()
+    assert (stats["completed"], stats["cancelled"], stats["queue_depth"], stats["running"]) == (2, 1, 0, 0)
+
+
+def test_busy_pool_returns_503(client, monkeypatch):
+    monkeypatch.setattr(server.password_pool, "queue_limit", 0)
+    r = client.post("/api/auth/login", json={"email": "admin@sistema.com", "password": "admin123"})
+    assert r.status_code == 503
+    assert r.headers["Retry-After"] == "1"
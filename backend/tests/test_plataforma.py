@@ -0,0 +1,48 @@
+"""Super admin dashboard snapshot."""
+from conftest import create_tenant
+from database import SessionLocal, Tenant, User
+from plataforma import PLAN_PRICES, resumo_plataforma
+
+
+def _contagens():
+    db = SessionLocal()
+    try:
+        tenants = db.query(Tenant).all()
+        return {
+            "total_tenants": len(tenants),
+            "active_tenants": sum(1 for t in tenants if t.is_active),
+            "trial_tenants": sum(1 for t in tenants if t.subscription_status == "trial"),
+            "suspended_tenants": sum(1 for t in tenants if t.is_active is False),
+            "monthly_revenue": round(sum(PLAN_PRICES.get(t.plan, 0.0) for t in tenants
+                                         if t.is_active and t.subscription_status == "active"), 2),
+        }
+    finally:
+        db.close()
+
+
+def test_dashboard_matches_tenants_and_is_invalidated(client, admin_headers):
+    before = client.get("/api/super-admin/dashboard", headers=admin_headers).json()
+    tenant_id, _ = create_tenant(client, admin_headers, "plataforma")
+
+    # Creating a tenant dropped the snapshot
+    dashboard = client.get("/api/super-admin/dashboard", headers=admin_headers).json()
+    assert dashboard["total_tenants"] == before["total_tenants"] + 1
+    assert dashboard["recent_signups"][0]["subdomain"] == "plataforma"
+    assert {k: dashboard[k] for k in _contagens()} == _contagens()
+
+    # Suspend, then reactivate: an active subscription pays its plan
+    client.put(f"/api/super-admin/tenants/{tenant_id}/toggle-status", headers=admin_headers)
+    dashboard = client.get("/api/super-admin/dashboard", headers=admin_headers).json()
+    assert dashboard["suspended_tenants"] == before["suspended_tenants"] + 1
+    client.put(f"/api/super-admin/tenants/{tenant_id}/toggle-status", headers=admin_headers)
+    dashboard = client.get("/api/super-admin/dashboard", headers=admin_headers).json()
+    assert dashboard["monthly_revenue"] == round(before["monthly_revenue"] + PLAN_PRICES["basic"], 2)
+    assert {k: dashboard[k] for k in _contagens()} == _contagens()
+
+
+def test_total_users_excludes_super_admin():
+    db = SessionLocal()
+    try:
+        assert resumo_plataforma(db)["total_users"] == db.query(User).filter(User.role != "super_admin").count()
+    finally:
+        db.close()
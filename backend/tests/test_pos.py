@@ -0,0 +1,50 @@
+"""POS bootstrap payload and its per-version cache."""
+import pytest
+
+from conftest import create_tenant
+from pos import bootstrap_cache
+
+
+@pytest.fixture(scope="module")
+def headers(client, admin_headers):
+    _, headers = create_tenant(client, admin_headers, "pos")
+    client.post("/api/produtos", headers=headers, json={"codigo": "B1", "nome": "Balm", "preco": 25, "estoque_atual": 3})
+    client.post("/api/produtos", headers=headers, json={"nome": "Afro", "preco": 12.5, "estoque_atual": 7})
+    client.post("/api/servicos", headers=headers, json={"nome": "Corte", "preco": 40, "duracao_minutos": 30})
+    client.post("/api/clientes", headers=headers, json={"nome": "Zeca", "email": "zeca@x.com", "telefone": "1"})
+    client.post("/api/clientes", headers=headers, json={"nome": "Ana"})
+    return headers
+
+
+def test_bootstrap_payload(client, headers):
+    r = client.get("/api/pos/bootstrap", headers=headers)
+    assert r.status_code == 200
+    body = r.json()
+    assert [p["nome"] for p in body["produtos"]] == ["Afro", "Balm"]
+    assert body["produtos"][1]["codigo"] == "B1"
+    assert body["produtos"][1]["estoque_atual"] == 3
+    assert body["servicos"][0]["preco"] == 40
+    assert body["servicos"][0]["duracao_minutos"] == 30
+    assert [set(c) for c in body["clientes"]] == [{"id", "nome"}] * 2
+    assert [c["nome"] for c in body["clientes"]] == ["Ana", "Zeca"]
+
+
+def test_bootstrap_is_cached_per_version(client, headers):
+    etag = client.get("/api/pos/bootstrap", headers=headers).headers["ETag"]
+    assert client.get("/api/pos/bootstrap", headers={**headers, "If-None-Match": etag}).status_code == 304
+
+    hits = bootstrap_cache.hits
+    assert client.get("/api/pos/bootstrap", headers=headers).headers["ETag"] == etag
+    assert bootstrap_cache.hits == hits + 1
+
+    produto = client.get("/api/pos/bootstrap", headers=headers).json()["produtos"][0]
+    r = client.post("/api/vendas", headers=headers, json={
+        "itens": [{"tipo": "produto", "item_id": produto["id"], "nome": produto["nome"], "quantidade": 2,
+                   "preco_unitario": 12.5, "total": 25}],
+        "forma_pagamento": "pix",
+    })
+    assert r.status_code == 200
+    r = client.get("/api/pos/bootstrap", headers={**headers, "If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["ETag"] != etag
+    assert r.json()["produtos"][0]["estoque_atual"] == produto["estoque_atual"] - 2
@@ -0,0 +1,77 @@
+"""Finding produtos: barcode lookup, list search and the unique (tenant_id, codigo) index."""
+import pytest
+
+from conftest import create_tenant
+
+
+@pytest.fixture(scope="module")
+def headers(client, admin_headers):
+    _, headers = create_tenant(client, admin_headers, "lookup")
+    for codigo, nome in [("7891000100103", "Shampoo"), ("7891000200209", "Condicionador"), ("ABC-1", "Escova")]:
+        r = client.post("/api/produtos", headers=headers, json={"codigo": codigo, "nome": nome, "preco": 10})
+        assert r.status_code == 200, r.text
+    return headers
+
+
+def test_lookup(client, headers):
+    r = client.get("/api/produtos/lookup", headers=headers, params={"codigo": "7891000100103"})
+    assert r.status_code == 200
+    assert r.json()["nome"] == "Shampoo"
+    # Scanners may pad the code
+    assert client.get("/api/produtos/lookup", headers=headers, params={"codigo": " ABC-1 "}).json()["nome"] == "Escova"
+    assert client.get("/api/produtos/lookup", headers=headers, params={"codigo": "000"}).status_code == 404
+
+
+def test_search(client, headers):
+    client.post("/api/produtos", headers=headers, json={"nome": "Pente", "categoria": "Acessórios", "preco": 5})
+
+    def buscar(q):
+        r = client.get("/api/produtos", headers=headers, params={"q": q, "sort": "nome", "order": "asc"})
+        assert r.status_code == 200, r.text
+        return [produto["nome"] for produto in r.json()]
+
+    assert buscar("sham") == ["Shampoo"]
+    assert buscar("7891") == ["Condicionador", "Shampoo"]
+    assert buscar("abc-1") == ["Escova"]
+    assert buscar("aces") == ["Pente"]
+    assert buscar("ampoo") == []
+
+
+def test_batch_lookup(client, headers):
+    r = client.post("/api/produtos/lookup", headers=headers, json={"codigos": ["ABC-1", "000", "7891000100103", "ABC-1"]})
+    assert r.status_code == 200
+    body = r.json()
+    assert [produto["nome"] for produto in body["produtos"]] == ["Escova", "Shampoo"]
+    assert body["nao_encontrados"] == ["000"]
+    assert client.post("/api/produtos/lookup", headers=headers, json={"codigos": []}).status_code == 422
+
+
+def test_codigo_unique_per_tenant(client, admin_headers, headers):
+    r = client.post("/api/produtos", headers=headers, json={"codigo": " 7891000100103", "nome": "Outro", "preco": 5})
+    assert r.status_code == 409
+
+    produto = client.post("/api/produtos", headers=headers, json={"codigo": "NOVO", "nome": "Novo", "preco": 5}).json()
+    r = client.put(f"/api/produtos/{produto['id']}", headers=headers, json={"codigo": "ABC-1", "nome": "Novo", "preco": 5})
+    assert r.status_code == 409
+    r = client.put(f"/api/produtos/{produto['id']}", headers=headers, json={"codigo": "NOVO", "nome": "Novo 2", "preco": 5})
+    assert r.status_code == 200
+
+    # Blank codes are stored as NULL and never collide
+    for _ in range(2):
+        r = client.post("/api/produtos", headers=headers, json={"codigo": "  ", "nome": "Sem código", "preco": 1})
+        assert r.status_code == 200 and r.json()["codigo"] is None
+
+    # Other tenants may reuse the code
+    _, outros = create_tenant(client, admin_headers, "lookup2")
+    assert client.post("/api/produtos", headers=outros, json={"codigo": "ABC-1", "nome": "X", "preco": 1}).status_code == 200
+    assert client.get("/api/produtos/lookup", headers=outros, params={"codigo": "ABC-1"}).json()["nome"] == "X"
+
+
+def test_import_reports_repeated_codes(client, headers):
+    csv = "codigo,nome,preco\nIMP-1,A,1\nABC-1,B,1\nIMP-1,C,1\n,D,1\nIMP-2,E,1\n"
+    r = client.post("/api/produtos/import?chunk_size=2", headers={**headers, "Content-Type": "text/csv"}, content=csv)
+    assert r.status_code == 200, r.text
+    resultado = r.json()
+    assert (resultado["importados"], resultado["erros_total"]) == (3, 2)
+    assert [erro["linha"] for erro in resultado["erros"]] == [3, 4]
+    assert client.get("/api/produtos/lookup", headers=headers, params={"codigo": "IMP-2"}).json()["nome"] == "E"
@@ -0,0 +1,194 @@
+"""Fails when a tenant route runs a query whose plan scans a whole table.
+
+The routes are called against a seeded dataset (several tenants, a few
+thousand rows per table, ANALYZEd), every SELECT they execute is captured and
+re-run under EXPLAIN QUERY PLAN. A plan step ``SCAN <table>`` means the query
+reads every row of the table (all tenants) instead of searching an index.
+"""
+import json
+import random
+import re
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import insert
+
+from conftest import capture_selects, create_tenant
+from database import Agendamento, CatalogoVersao, Cliente, Produto, Servico, SessionLocal, Tenant, User, Vencimento, Venda, VendaItem, engine
+from migrate_venda_itens import itens_para_linhas
+from notificacoes import varrer_vencimentos
+from rollups import rebuild_produtos_diarios, rebuild_vendas_diarias
+from versoes import RECURSOS
+
+pytestmark = pytest.mark.skipif(engine.dialect.name != "sqlite", reason="plans are checked with SQLite EXPLAIN QUERY PLAN")
+
+ROWS_PER_TENANT = 1500
+FILLER_TENANTS = 3
+
+FULL_SCAN = re.compile(r"^SCAN (\w+)(?: USING (?:COVERING )?INDEX \w+)?$")
+
+
+def _seed_tenant(db, tenant_id, vendedor_id):
+    rnd = random.Random(str(tenant_id))
+    agora = datetime.now(timezone.utc)
+
+    def created(i):
+        return agora - timedelta(minutes=i)
+
+    clientes = [{"id": str(uuid.uuid4()), "nome": f"Cliente {i:05d}", "email": f"c{i}@x.com", "telefone": str(i),
+                 "tenant_id": tenant_id, "created_at": created(i)} for i in range(ROWS_PER_TENANT)]
+    produtos = [{"id": str(uuid.uuid4()), "codigo": f"P{i:05d}", "nome": f"Produto {i:05d}", "categoria": f"cat{i % 10}",
+                 "custo": 5.0, "preco": 10.0, "estoque_atual": rnd.randint(0, 20), "estoque_minimo": 5,
+                 "tenant_id": tenant_id, "created_at": created(i)} for i in range(ROWS_PER_TENANT)]
+    servicos = [{"id": str(uuid.uuid4()), "nome": f"Servico {i:03d}", "duracao_minutos": 30, "preco": 50.0,
+                 "tenant_id": tenant_id, "created_at": created(i)} for i in range(50)]
+    vendas, linhas = [], []
+    for i in range(ROWS_PER_TENANT):
+        produto = rnd.choice(produtos)
+        itens = [{"tipo": "produto", "item_id": produto["id"], "nome": produto["nome"], "quantidade": 1,
+                  "preco_unitario": 10.0, "desconto": 0.0, "total": 10.0}]
+        venda_id = str(uuid.uuid4())
+        vendas.append({"id": venda_id, "cliente_id": rnd.choice(clientes)["id"], "itens": json.dumps(itens),
+                       "subtotal": 10.0, "desconto_total": 0.0, "total": 10.0, "forma_pagamento": rnd.choice(["pix", "dinheiro"]),
+                       "tenant_id": tenant_id, "vendedor_id": vendedor_id, "created_at": created(i * 7)})
+        linhas.extend(itens_para_linhas(venda_id, tenant_id, itens))
+    agendamentos = [{"id": str(uuid.uuid4()), "cliente_id": rnd.choice(clientes)["id"], "servico_id": rnd.choice(servicos)["id"],
+                     "data_hora": agora + timedelta(hours=i - ROWS_PER_TENANT // 2), "status": "agendado",
+                     "tenant_id": tenant_id, "created_at": created(i)} for i in range(ROWS_PER_TENANT)]
+    vencimentos = [{"id": str(uuid.uuid4()), "tipo": f"Tipo {i}", "descricao": f"Vencimento {i}", "data_vencimento": agora + timedelta(days=i % 90),
+                    "valor": 10.0, "status": "ativo", "notificado_email": i % 2 == 0, "dias_antecedencia": 30,
+                    "tenant_id": tenant_id, "created_at": created(i)} for i in range(ROWS_PER_TENANT)]
+
+    versoes = [{"id": str(uuid.uuid4()), "recurso": recurso, "versao": 1, "tenant_id": tenant_id} for recurso in RECURSOS]
+
+    for model, rows in ((Cliente, clientes), (Produto, produtos), (Servico, servicos), (Venda, vendas),
+                        (VendaItem, linhas), (Agendamento, agendamentos), (Vencimento, vencimentos),
+                        (CatalogoVersao, versoes)):
+        db.execute(insert(model), rows)
+    return produtos
+
+
+@pytest.fixture(scope="module")
+def seeded(client, admin_headers):
+    tenant_id, headers = create_tenant(client, admin_headers, "planos")
+    db = SessionLocal()
+    try:
+        vendedor_id = db.query(User.id).filter(User.tenant_id == tenant_id).scalar()
+        produtos = _seed_tenant(db, tenant_id, vendedor_id)
+        for i in range(FILLER_TENANTS):
+            filler = Tenant(subdomain=f"filler{i}", company_name=f"Filler {i}")
+            db.add(filler)
+            db.flush()
+            user = User(email=f"u@filler{i}.com", name="U", hashed_password="x", role="admin_empresa", tenant_id=filler.id)
+            db.add(user)
+            db.flush()
+            _seed_tenant(db, filler.id, user.id)
+        rebuild_vendas_diarias(db)
+        rebuild_produtos_diarios(db)
+        db.commit()
+        with engine.connect() as connection:
+            connection.exec_driver_sql("ANALYZE")
+    finally:
+        db.close()
+    return {"headers": headers, "produto": produtos[0], "tenant_id": tenant_id}
+
+
+def full_scans(statements):
+    scans = []
+    with engine.connect() as connection:
+        for statement, parameters in statements:
+            plan = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+            for _, _, _, detail in plan:
+                if FULL_SCAN.match(detail):
+                    scans.append(f"{detail}\n    in: {' '.join(statement.split())[:300]}")
+    return scans
+
+
+ROUTES = [
+    ("GET", "/api/auth/me", None),
+    ("GET", "/api/users", None),
+    ("GET", "/api/dashboard", None),
+    ("GET", "/api/dashboard?data_inicio=2020-01-01&data_fim=2030-12-31&agrupamento=mes", None),
+    ("GET", "/api/relatorios/vendas?data_inicio=2020-01-01&data_fim=2030-12-31&agrupar_por=forma_pagamento", None),
+    ("GET", "/api/relatorios/produtos?data_inicio=2020-01-01", None),
+    ("GET", "/api/clientes", None),
+    ("GET", "/api/clientes?sort=nome&order=asc&nome=Cliente%2001", None),
+    ("GET", "/api/clientes?email=c10@x.com", None),
+    ("GET", "/api/clientes/search?q=cliente%2001", None),
+    ("GET", "/api/produtos", None),
+    ("GET", "/api/produtos?codigo=P00010", None),
+    ("GET", "/api/produtos/lookup?codigo=P00010", None),
+    ("POST", "/api/produtos/lookup", {"codigos": ["P00010", "P00020", "nao-existe"]}),
+    ("GET", "/api/produtos?categoria=cat3&sort=nome", None),
+    ("GET", "/api/produtos?q=produto%2001&sort=nome&order=asc", None),
+    ("GET", "/api/servicos?sort=nome", None),
+    ("GET", "/api/pos/bootstrap", None),
+    ("GET", "/api/vendas", None),
+    ("GET", "/api/vendas?sort=total&order=asc", None),
+    ("GET", "/api/agendamentos", None),
+    ("GET", "/api/agendamentos?sort=data_hora&order=asc", None),
+    ("GET", "/api/agendamentos?from=2026-01-01&to=2026-01-08&status=agendado", None),
+    ("GET", "/api/agendamentos/calendario?data_inicio=2026-01-01", None),
+    ("GET", "/api/agendamentos/calendario?data_inicio=2026-01-01&data_fim=2026-02-11&status=cancelado", None),
+    ("GET", "/api/vencimentos", None),
+    ("GET", "/api/vencimentos?sort=data_vencimento&order=asc", None),
+    ("GET", "/api/vencimentos/proximos", None),
+]
+
+
+@pytest.mark.parametrize("method,path,body", ROUTES, ids=[f"{m} {p}" for m, p, _ in ROUTES])
+def test_route_does_not_scan_full_tables(client, seeded, method, path, body):
+    with capture_selects() as statements:
+        r = client.request(method, path, headers=seeded["headers"], json=body)
+    assert r.status_code == 200, r.text
+    assert statements, "route executed no SELECT"
+    scans = full_scans(statements)
+    assert not scans, "full table scans:\n" + "\n".join(scans)
+
+
+def test_create_venda_does_not_scan_full_tables(client, seeded):
+    produto = seeded["produto"]
+    venda = {"itens": [{"tipo": "produto", "item_id": produto["id"], "nome": produto["nome"], "quantidade": 1,
+                        "preco_unitario": 10.0, "total": 10.0}], "forma_pagamento": "pix"}
+    with capture_selects() as statements:
+        r = client.post("/api/vendas", headers=seeded["headers"], json=venda)
+    assert r.status_code == 200, r.text
+    scans = full_scans(statements)
+    assert not scans, "full table scans:\n" + "\n".join(scans)
+
+
+def test_agenda_does_not_scan_full_tables(client, seeded):
+    db = SessionLocal()
+    try:
+        servico_id = db.query(Servico.id).filter(Servico.tenant_id == seeded["tenant_id"]).limit(1).scalar()
+        cliente_id = db.query(Cliente.id).filter(Cliente.tenant_id == seeded["tenant_id"]).limit(1).scalar()
+    finally:
+        db.close()
+    amanha = (datetime.now(timezone.utc) + timedelta(days=1)).date()
+    with capture_selects() as statements:
+        r = client.get(f"/api/agendamentos/disponibilidade?servico_id={servico_id}&data_inicio={amanha}&data_fim={amanha + timedelta(days=6)}",
+                       headers=seeded["headers"])
+        assert r.status_code == 200, r.text
+        r = client.post("/api/agendamentos", headers=seeded["headers"], json={
+            "cliente_id": str(cliente_id), "servico_id": str(servico_id), "data_hora": f"{amanha + timedelta(days=60)}T10:00:00"})
+        assert r.status_code == 200, r.text
+        r = client.post("/api/agendamentos/lote", headers=seeded["headers"], json={
+            "cliente_id": str(cliente_id), "servico_id": str(servico_id), "data_hora": f"{amanha}T10:00:00",
+            "recorrencia": {"frequencia": "semanal", "quantidade": 8}})
+        assert r.status_code == 200, r.text
+    scans = full_scans(statements)
+    assert not scans, "full table scans:\n" + "\n".join(scans)
+
+
+def test_vencimento_sweep_does_not_scan_full_tables(seeded):
+    db = SessionLocal()
+    try:
+        with capture_selects() as statements:
+            resultado = varrer_vencimentos(db)
+    finally:
+        db.close()
+    assert resultado["notificados"]
+    assert resultado["lidos"] == resultado["notificados"] + resultado["sem_destinatario"]
+    scans = full_scans(statements)
+    assert not scans, "full table scans:\n" + "\n".join(scans)
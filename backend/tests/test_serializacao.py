@@ -0,0 +1,86 @@
+"""The orjson list responses keep the shape the pydantic response models produced."""
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+import pytest
+from pydantic import TypeAdapter
+
+from conftest import create_tenant
+from database import Servico, SessionLocal
+from server import AgendamentoResponse, ClienteResponse, ProdutoResponse, ServicoResponse, VendaResponse
+
+
+@pytest.fixture(scope="module")
+def headers(client, admin_headers):
+    _, headers = create_tenant(client, admin_headers, "serializacao")
+    cliente = client.post("/api/clientes", headers=headers, json={"nome": "Ana", "email": "ana@x.com"}).json()
+    produto = client.post("/api/produtos", headers=headers, json={"nome": "Shampoo", "preco": 10, "estoque_atual": 5}).json()
+    servico = client.post("/api/servicos", headers=headers, json={
+        "nome": "Corte", "preco": 50, "tributacao_iss": {"aliquota": 5, "codigo": "06.01"},
+    }).json()
+    client.post("/api/servicos", headers=headers, json={"nome": "Escova", "preco": 30})
+    for quantidade in (1, 2, 3):
+        r = client.post("/api/vendas", headers=headers, json={
+            "cliente_id": cliente["id"], "cliente_nome": "Ana", "forma_pagamento": "pix",
+            "itens": [{"tipo": "produto", "item_id": produto["id"], "nome": "Shampoo", "quantidade": quantidade,
+                       "preco_unitario": 10, "total": 10 * quantidade}],
+        })
+        assert r.status_code == 200, r.text
+    data_hora = (datetime.now(timezone.utc) + timedelta(days=1)).isoformat()
+    client.post("/api/agendamentos", headers=headers, json={"cliente_id": cliente["id"], "servico_id": servico["id"], "data_hora": data_hora})
+    return headers
+
+
+@pytest.mark.parametrize("path,model", [
+    ("/api/clientes", ClienteResponse),
+    ("/api/produtos", ProdutoResponse),
+    ("/api/servicos", ServicoResponse),
+    ("/api/vendas", VendaResponse),
+    ("/api/agendamentos", AgendamentoResponse),
+])
+def test_list_matches_response_model(client, headers, path, model):
+    r = client.get(path, headers=headers)
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/json"
+    body = r.json()
+    assert body
+    adapter = TypeAdapter(List[model])
+    assert adapter.dump_python(adapter.validate_python(body), mode="json") == body
+
+
+def test_nested_values(client, headers):
+    servicos = {servico["nome"]: servico for servico in client.get("/api/servicos", headers=headers).json()}
+    assert servicos["Corte"]["tributacao_iss"] == {"aliquota": 5, "codigo": "06.01"}
+    assert servicos["Escova"]["tributacao_iss"] is None
+
+    vendas = client.get("/api/vendas?sort=total&order=asc", headers=headers).json()
+    assert [venda["itens"][0]["quantidade"] for venda in vendas] == [1, 2, 3]
+    assert vendas[0]["itens"][0]["desconto"] == 0.0
+
+
+def test_next_cursor_header(client, headers):
+    r = client.get("/api/vendas?limit=2", headers=headers)
+    assert len(r.json()) == 2
+    cursor = r.headers["X-Next-Cursor"]
+    r = client.get(f"/api/vendas?limit=2&cursor={cursor}", headers=headers)
+    assert len(r.json()) == 1
+    assert "X-Next-Cursor" not in r.headers
+
+
+def test_tributacao_iss_round_trip(client, headers):
+    servico = client.post("/api/servicos", headers=headers, json={"nome": "Barba", "preco": 20}).json()
+    assert servico["tributacao_iss"] is None
+
+    def armazenado():
+        db = SessionLocal()
+        try:
+            return db.query(Servico.tributacao_iss.is_(None), Servico.tributacao_iss).filter(Servico.id == servico["id"]).one()
+        finally:
+            db.close()
+
+    # SQL NULL when absent, a JSON document otherwise
+    assert armazenado() == (True, None)
+    tributacao = {"aliquota": 2.5, "codigo_servico_municipal": "06.01", "retido": True}
+    r = client.put(f"/api/servicos/{servico['id']}", headers=headers, json={"nome": "Barba", "preco": 20, "tributacao_iss": tributacao})
+    assert r.json()["tributacao_iss"] == tributacao
+    assert armazenado() == (False, tributacao)
@@ -0,0 +1,71 @@
+"""ETag / If-None-Match on the catalog list routes."""
+import pytest
+
+from conftest import create_tenant
+
+
+@pytest.fixture(scope="module")
+def headers(client, admin_headers):
+    _, headers = create_tenant(client, admin_headers, "versoes")
+    return headers
+
+
+def _etag(client, headers, path):
+    r = client.get(path, headers=headers)
+    assert r.status_code == 200
+    assert r.headers["Cache-Control"] == "private, no-cache"
+    return r.headers["ETag"]
+
+
+def _revalidar(client, headers, path, etag):
+    return client.get(path, headers={**headers, "If-None-Match": etag})
+
+
+@pytest.mark.parametrize("path", ["/api/produtos", "/api/servicos", "/api/clientes"])
+def test_unchanged_catalog_is_not_modified(client, headers, path):
+    etag = _etag(client, headers, path)
+    r = _revalidar(client, headers, path, etag)
+    assert r.status_code == 304
+    assert r.content == b""
+    assert r.headers["ETag"] == etag
+    assert _revalidar(client, headers, path, f'"other", {etag}').status_code == 304
+    assert _revalidar(client, headers, path + "?limit=5", etag).status_code == 200
+
+
+def test_writes_change_the_etag(client, headers):
+    etag = _etag(client, headers, "/api/produtos")
+    produto = client.post("/api/produtos", headers=headers, json={"nome": "Gel", "preco": 8, "estoque_atual": 10}).json()
+    assert _revalidar(client, headers, "/api/produtos", etag).status_code == 200
+
+    etag = _etag(client, headers, "/api/produtos")
+    servicos = _etag(client, headers, "/api/servicos")
+    client.post("/api/vendas", headers=headers, json={
+        "itens": [{"tipo": "produto", "item_id": produto["id"], "nome": "Gel", "quantidade": 1, "preco_unitario": 8, "total": 8}],
+        "forma_pagamento": "pix",
+    })
+    r = _revalidar(client, headers, "/api/produtos", etag)
+    assert r.status_code == 200
+    assert r.json()[0]["estoque_atual"] == 9
+    # Other resources keep their version
+    assert _revalidar(client, headers, "/api/servicos", servicos).status_code == 304
+
+    etag = r.headers["ETag"]
+    client.put(f"/api/produtos/{produto['id']}", headers=headers, json={"nome": "Gel fixador", "preco": 8})
+    assert _revalidar(client, headers, "/api/produtos", etag).status_code == 200
+
+    etag = _etag(client, headers, "/api/produtos")
+    client.delete(f"/api/produtos/{produto['id']}", headers=headers)
+    assert _revalidar(client, headers, "/api/produtos", etag).status_code == 200
+
+
+def test_import_changes_the_etag(client, headers):
+    etag = _etag(client, headers, "/api/clientes")
+    r = client.post("/api/clientes/import", headers={**headers, "Content-Type": "text/csv"}, content=b"nome\nBia\n")
+    assert r.json()["importados"] == 1
+    assert _revalidar(client, headers, "/api/clientes", etag).status_code == 200
+
+
+def test_etag_is_per_tenant(client, admin_headers, headers):
+    _, outro = create_tenant(client, admin_headers, "versoes-outro")
+    etag = _etag(client, headers, "/api/servicos")
+    assert _revalidar(client, outro, "/api/servicos", etag).status_code == 200
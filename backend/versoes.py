@@ -0,0 +1,88 @@
+"""Catalog version counters and conditional GETs (ETag / If-None-Match).
+
+Every write route of clientes, produtos and servicos (sales too, for the
+produtos stock) calls ``incrementar_versao`` in its own transaction. The list
+routes derive their ETag from the tenant's counter and the query string, so a
+client revalidating an unchanged catalog gets ``304 Not Modified`` after one
+indexed lookup, without the list query or its serialization.
+"""
+import hashlib
+from datetime import datetime, timezone
+from typing import Dict, Iterable
+
+from fastapi import Request, Response
+from sqlalchemy.orm import Session
+
+from database import CatalogoVersao
+
+RECURSOS = ("clientes", "produtos", "servicos")
+
+
+def incrementar_versao(db: Session, tenant_id, recurso: str):
+    """Bump the (tenant, recurso) counter; must run in the transaction of the change.
+
+    Atomic upsert like the sales rollup, so concurrent writers never lose a bump.
+    """
+    dialect = db.bind.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        stmt = upsert(CatalogoVersao).values(
+            tenant_id=tenant_id, recurso=recurso, versao=1, updated_at=datetime.now(timezone.utc),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["tenant_id", "recurso"],
+            set_={"versao": CatalogoVersao.versao + 1, "updated_at": stmt.excluded.updated_at},
+        )
+        db.execute(stmt)
+        return
+
+    # Generic dialects: increment, inserting the row on the first change
+    atualizados = db.query(CatalogoVersao).filter_by(tenant_id=tenant_id, recurso=recurso).update(
+        {CatalogoVersao.versao: CatalogoVersao.versao + 1}, synchronize_session=False
+    )
+    if not atualizados:
+        db.add(CatalogoVersao(tenant_id=tenant_id, recurso=recurso, versao=1))
+
+
+def versoes(db: Session, tenant_id, recursos: Iterable[str]) -> Dict[str, int]:
+    """Current counters of ``recursos`` (0 for a resource never changed)."""
+    recursos = list(recursos)
+    atuais = dict(
+        db.query(CatalogoVersao.recurso, CatalogoVersao.versao)
+        .filter(CatalogoVersao.tenant_id == tenant_id, CatalogoVersao.recurso.in_(recursos))
+        .all()
+    )
+    return {recurso: atuais.get(recurso, 0) for recurso in recursos}
+
+
+def calcular_etag(tenant_id, versoes_atuais: Dict[str, int], variante: str = "") -> str:
+    """Weak ETag of a response built from ``versoes_atuais``; ``variante`` tells apart
+    responses of the same data (query string, page, filters)."""
+    chave = "|".join([str(tenant_id), *(f"{recurso}:{versao}" for recurso, versao in sorted(versoes_atuais.items())), variante])
+    return f'W/"{hashlib.sha1(chave.encode()).hexdigest()[:24]}"'
+
+
+def catalogo_etag(db: Session, request: Request, tenant_id, *recursos: str) -> str:
+    return calcular_etag(tenant_id, versoes(db, tenant_id, recursos), f"{request.url.path}?{request.url.query}")
+
+
+def etag_corresponde(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match matches ``etag`` (weak comparison)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag.removeprefix("W/") for tag in header.split(","))
+
+
+def cache_headers(etag: str) -> Dict[str, str]:
+    # Cached by the client only, and always revalidated
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag))
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useAuth } from '../App';
 import { Card, CardContent, CardHeader, CardTitle } from './ui/card';
 import { Button } from './ui/button';
@@ -22,14 +22,17 @@ import {
   XCircle
 } from 'lucide-react';
 import { toast } from 'sonner';
-import { format, parseISO } from 'date-fns';
+import { format, parseISO, startOfWeek } from 'date-fns';
 import { ptBR } from 'date-fns/locale';
 
 const Agendamentos = () => {
   const { api } = useAuth();
   const [agendamentos, setAgendamentos] = useState([]);
-  const [clientes, setClientes] = useState([]);
   const [servicos, setServicos] = useState([]);
+  // Cliente picker of the form, backed by /clientes/search
+  const [buscaCliente, setBuscaCliente] = useState('');
+  const [opcoesClientes, setOpcoesClientes] = useState([]);
+  const clienteEscolhido = useRef('');
   const [loading, setLoading] = useState(true);
   const [busca, setBusca] = useState('');
   const [showDialog, setShowDialog] = useState(false);
@@ -44,20 +47,79 @@ const Agendamentos = () => {
     status: 'agendado'
   });
 
+  // Recurrence of a new agendamento, booked in one request by /agendamentos/lote
+  const [repeticao, setRepeticao] = useState({ frequencia: 'nao', quantidade: 4 });
+
+  // The list shows the week of the date picked in the calendar
+  const inicioSemana = format(startOfWeek(selectedDate), 'yyyy-MM-dd');
+
   useEffect(() => {
     loadData();
+  }, [inicioSemana]);
+
+  // Free start times of the chosen service on the chosen day
+  const [horariosLivres, setHorariosLivres] = useState([]);
+  useEffect(() => {
+    if (!formData.servico_id || !formData.data) {
+      setHorariosLivres([]);
+      return;
+    }
+    api.get('/agendamentos/disponibilidade', {
+      params: { servico_id: formData.servico_id, data_inicio: formData.data }
+    })
+      .then(({ data }) => setHorariosLivres(data.dias[0]?.horarios || []))
+      .catch(() => setHorariosLivres([]));
+  }, [formData.servico_id, formData.data]);
+
+  useEffect(() => {
+    loadServicos();
   }, []);
 
+  useEffect(() => {
+    const termo = buscaCliente.trim();
+    if (!termo || termo === clienteEscolhido.current) {
+      setOpcoesClientes([]);
+      return;
+    }
+    const timer = setTimeout(() => {
+      api.get('/clientes/search', { params: { q: termo } })
+        .then(({ data }) => setOpcoesClientes(data))
+        .catch(() => setOpcoesClientes([]));
+    }, 300);
+    return () => clearTimeout(timer);
+  }, [buscaCliente]);
+
+  // Every page of the servicos (a short list), for the select of the form
+  const loadServicos = async () => {
+    try {
+      const todos = [];
+      let cursor = null;
+      do {
+        const params = { limit: 500, sort: 'nome', order: 'asc' };
+        if (cursor) params.cursor = cursor;
+        const response = await api.get('/servicos', { params });
+        todos.push(...response.data);
+        cursor = response.headers['x-next-cursor'] || null;
+      } while (cursor);
+      setServicos(todos);
+    } catch (error) {
+      toast.error('Erro ao carregar serviços');
+      console.error('Error loading servicos:', error);
+    }
+  };
+
+  const selecionarCliente = (cliente) => {
+    handleChange('cliente_id', cliente.id);
+    clienteEscolhido.current = cliente.nome;
+    setBuscaCliente(cliente.nome);
+    setOpcoesClientes([]);
+  };
+
   const loadData = async () => {
     try {
-      const [agendamentosRes, clientesRes, servicosRes] = await Promise.all([
-        api.get('/agendamentos'),
-        api.get('/clientes'),
-        api.get('/servicos')
-      ]);
-      setAgendamentos(agendamentosRes.data || []);
-      setClientes(clientesRes.data);
-      setServicos(servicosRes.data);
+      const calendarioRes = await api.get('/agendamentos/calendario', { params: { data_inicio: inicioSemana } });
+      // Days of the week with cliente/servico names already joined
+      setAgendamentos((calendarioRes.data || []).flatMap(dia => dia.agendamentos));
     } catch (error) {
       toast.error('Erro ao carregar dados');
       console.error('Error loading data:', error);
@@ -68,6 +130,10 @@ const Agendamentos = () => {
 
   const handleSubmit = async (e) => {
     e.preventDefault();
+    if (!formData.cliente_id) {
+      toast.error('Selecione um cliente');
+      return;
+    }
     setLoading(true);
 
     try {
@@ -81,6 +147,19 @@ const Agendamentos = () => {
       if (editingAgendamento) {
         await api.put(`/agendamentos/${editingAgendamento.id}`, data);
         toast.success('Agendamento atualizado com sucesso!');
+      } else if (repeticao.frequencia !== 'nao') {
+        const { data: lote } = await api.post('/agendamentos/lote', {
+          ...data,
+          recorrencia: { frequencia: repeticao.frequencia, quantidade: Number(repeticao.quantidade) }
+        });
+        if (lote.conflitos > 0) {
+          const datas = lote.ocorrencias
+            .filter(ocorrencia => ocorrencia.resultado === 'conflito')
+            .map(ocorrencia => format(new Date(ocorrencia.data_hora), 'dd/MM HH:mm'));
+          toast.warning(`${lote.criados} agendamentos criados; horário indisponível em ${datas.join(', ')}`);
+        } else {
+          toast.success(`${lote.criados} agendamentos cadastrados com sucesso!`);
+        }
       } else {
         await api.post('/agendamentos', data);
         toast.success('Agendamento cadastrado com sucesso!');
@@ -90,7 +169,11 @@ const Agendamentos = () => {
       resetForm();
       loadData();
     } catch (error) {
-      toast.error('Erro ao salvar agendamento');
+      if (error.response?.status === 409) {
+        toast.error('Horário indisponível para este serviço');
+      } else {
+        toast.error('Erro ao salvar agendamento');
+      }
       console.error('Error saving agendamento:', error);
     } finally {
       setLoading(false);
@@ -108,6 +191,9 @@ const Agendamentos = () => {
       observacoes: agendamento.observacoes || '',
       status: agendamento.status || 'agendado'
     });
+    clienteEscolhido.current = agendamento.cliente_nome || '';
+    setBuscaCliente(agendamento.cliente_nome || '');
+    setOpcoesClientes([]);
     setShowDialog(true);
   };
 
@@ -144,6 +230,10 @@ const Agendamentos = () => {
       observacoes: '',
       status: 'agendado'
     });
+    setRepeticao({ frequencia: 'nao', quantidade: 4 });
+    clienteEscolhido.current = '';
+    setBuscaCliente('');
+    setOpcoesClientes([]);
     setEditingAgendamento(null);
   };
 
@@ -175,12 +265,9 @@ const Agendamentos = () => {
   };
 
   const filteredAgendamentos = agendamentos.filter(agendamento => {
-    const cliente = clientes.find(c => c.id === agendamento.cliente_id);
-    const servico = servicos.find(s => s.id === agendamento.servico_id);
-    
     return (
-      (cliente?.nome.toLowerCase().includes(busca.toLowerCase())) ||
-      (servico?.nome.toLowerCase().includes(busca.toLowerCase())) ||
+      (agendamento.cliente_nome?.toLowerCase().includes(busca.toLowerCase())) ||
+      (agendamento.servico_nome?.toLowerCase().includes(busca.toLowerCase())) ||
       (agendamento.observacoes?.toLowerCase().includes(busca.toLowerCase()))
     );
   });
@@ -238,19 +325,32 @@ const Agendamentos = () => {
             <form onSubmit={handleSubmit} className="space-y-4">
               <div className="grid grid-cols-1 md:grid-cols-2 gap-4">
                 <div>
-                  <Label>Cliente *</Label>
-                  <Select onValueChange={(value) => handleChange('cliente_id', value)} value={formData.cliente_id}>
-                    <SelectTrigger>
-                      <SelectValue placeholder="Selecionar cliente" />
-                    </SelectTrigger>
-                    <SelectContent>
-                      {clientes.map((cliente) => (
-                        <SelectItem key={cliente.id} value={cliente.id}>
+                  <Label htmlFor="cliente">Cliente *</Label>
+                  <Input
+                    id="cliente"
+                    autoComplete="off"
+                    value={buscaCliente}
+                    onChange={(e) => {
+                      setBuscaCliente(e.target.value);
+                      handleChange('cliente_id', '');
+                    }}
+                    placeholder="Buscar por nome, telefone ou CPF"
+                  />
+                  {opcoesClientes.length > 0 && (
+                    <div className="mt-1 border rounded-md max-h-48 overflow-y-auto">
+                      {opcoesClientes.map((cliente) => (
+                        <button
+                          key={cliente.id}
+                          type="button"
+                          onClick={() => selecionarCliente(cliente)}
+                          className="block w-full text-left px-3 py-2 text-sm hover:bg-slate-50"
+                        >
                           {cliente.nome}
-                        </SelectItem>
+                          {cliente.telefone && <span className="text-slate-500 ml-2">{cliente.telefone}</span>}
+                        </button>
                       ))}
-                    </SelectContent>
-                  </Select>
+                    </div>
+                  )}
                 </div>
                 <div>
                   <Label>Serviço *</Label>
@@ -292,6 +392,64 @@ const Agendamentos = () => {
                 </div>
               </div>
 
+              {horariosLivres.length > 0 && (
+                <div>
+                  <Label>Horários livres</Label>
+                  <div className="flex flex-wrap gap-2 mt-2">
+                    {horariosLivres.map((horario) => {
+                      const hora = format(new Date(horario), 'HH:mm');
+                      return (
+                        <Button
+                          key={horario}
+                          type="button"
+                          size="sm"
+                          variant={formData.hora === hora ? 'default' : 'outline'}
+                          onClick={() => handleChange('hora', hora)}
+                        >
+                          {hora}
+                        </Button>
+                      );
+                    })}
+                  </div>
+                </div>
+              )}
+
+              {!editingAgendamento && (
+                <div className="grid grid-cols-1 md:grid-cols-2 gap-4">
+                  <div>
+                    <Label>Repetir</Label>
+                    <Select
+                      onValueChange={(value) => setRepeticao(prev => ({ ...prev, frequencia: value }))}
+                      value={repeticao.frequencia}
+                    >
+                      <SelectTrigger>
+                        <SelectValue />
+                      </SelectTrigger>
+                      <SelectContent>
+                        <SelectItem value="nao">Não repetir</SelectItem>
+                        <SelectItem value="semanal">Toda semana</SelectItem>
+                        <SelectItem value="quinzenal">A cada 2 semanas</SelectItem>
+                        <SelectItem value="mensal">Todo mês</SelectItem>
+                      </SelectContent>
+                    </Select>
+                  </div>
+                  {repeticao.frequencia !== 'nao' && (
+                    <div>
+                      <Label htmlFor="quantidade">Sessões</Label>
+                      <Input
+                        id="quantidade"
+                        type="number"
+                        min="2"
+                        max="100"
+                        required
+                        value={repeticao.quantidade}
+                        onChange={(e) => setRepeticao(prev => ({ ...prev, quantidade: e.target.value }))}
+                      />
+                    </div>
+                  )}
+                </div>
+              )}
+
               <div>
                 <Label>Status</Label>
                 <Select onValueChange={(value) => handleChange('status', value)} value={formData.status}>
@@ -435,9 +593,6 @@ const Agendamentos = () => {
                   {agendamentosPorData[data]
                     .sort((a, b) => new Date(a.data_hora).getTime() - new Date(b.data_hora).getTime())
                     .map((agendamento) => {
-                      const cliente = clientes.find(c => c.id === agendamento.cliente_id);
-                      const servico = servicos.find(s => s.id === agendamento.servico_id);
-                      
                       return (
                         <Card key={agendamento.id} className="hover-lift shadow-soft border-0">
                           <CardContent className="p-4">
@@ -455,20 +610,20 @@ const Agendamentos = () => {
                                 <div className="flex-1">
                                   <div className="flex items-center gap-2 mb-1">
                                     <User className="w-4 h-4 text-slate-400" />
-                                    <span className="font-semibold text-slate-800">{cliente?.nome}</span>
+                                    <span className="font-semibold text-slate-800">{agendamento.cliente_nome}</span>
                                   </div>
                                   <div className="flex items-center gap-2 mb-1">
                                     <Wrench className="w-4 h-4 text-slate-400" />
-                                    <span className="text-slate-600">{servico?.nome}</span>
+                                    <span className="text-slate-600">{agendamento.servico_nome}</span>
                                     <span className="text-emerald-600 font-semibold">
-                                      R$ {servico?.preco.toLocaleString('pt-BR', { minimumFractionDigits: 2 })}
+                                      R$ {agendamento.servico_preco?.toLocaleString('pt-BR', { minimumFractionDigits: 2 })}
                                     </span>
                                   </div>
-                                  {servico?.duracao_minutos && (
+                                  {agendamento.duracao_minutos && (
                                     <div className="flex items-center gap-2">
                                       <Clock className="w-4 h-4 text-slate-400" />
                                       <span className="text-sm text-slate-500">
-                                        {servico.duracao_minutos}min
+                                        {agendamento.duracao_minutos}min
                                       </span>
                                     </div>
                                   )}
@@ -519,7 +674,7 @@ const Agendamentos = () => {
             <div className="text-center py-12">
               <CalendarIcon className="w-16 h-16 mx-auto text-slate-400 mb-4" />
               <h3 className="text-lg font-semibold text-slate-600 mb-2">
-                {busca ? 'Nenhum agendamento encontrado' : 'Nenhum agendamento cadastrado'}
+                {busca ? 'Nenhum agendamento encontrado' : 'Nenhum agendamento nesta semana'}
               </h3>
               <p className="text-slate-500 mb-6">
                 {busca 
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useAuth } from '../App';
 import { Card, CardContent, CardHeader, CardTitle } from './ui/card';
 import { Button } from './ui/button';
@@ -22,11 +22,18 @@ import {
 } from 'lucide-react';
 import { toast } from 'sonner';
 
+const PAGE_SIZE = 30;
+const SEARCH_LIMIT = 50;
+
 const Clientes = () => {
   const { api } = useAuth();
   const [clientes, setClientes] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
   const [busca, setBusca] = useState('');
+  const buscaInicial = useRef(true);
+  const buscaAtual = useRef('');
+  buscaAtual.current = busca.trim();
   const [showDialog, setShowDialog] = useState(false);
   const [editingCliente, setEditingCliente] = useState(null);
   const [formData, setFormData] = useState({
@@ -42,10 +49,33 @@ const Clientes = () => {
     loadClientes();
   }, []);
 
-  const loadClientes = async () => {
+  // Search runs on the server (/clientes/search), shortly after the user stops typing
+  useEffect(() => {
+    if (buscaInicial.current) {
+      buscaInicial.current = false;
+      return;
+    }
+    const timer = setTimeout(() => loadClientes(), 300);
+    return () => clearTimeout(timer);
+  }, [busca]);
+
+  const loadClientes = async (cursor = null) => {
     try {
-      const response = await api.get('/clientes');
-      setClientes(response.data);
+      const termo = busca.trim();
+      if (termo) {
+        const response = await api.get('/clientes/search', { params: { q: termo, limit: SEARCH_LIMIT } });
+        // A later search term is already on its way
+        if (termo !== buscaAtual.current) return;
+        setClientes(response.data);
+        setNextCursor(null);
+        return;
+      }
+      const params = { limit: PAGE_SIZE };
+      if (cursor) params.cursor = cursor;
+      const response = await api.get('/clientes', { params });
+      if (termo !== buscaAtual.current) return;
+      setClientes(prev => (cursor ? [...prev, ...response.data] : response.data));
+      setNextCursor(response.headers['x-next-cursor'] || null);
     } catch (error) {
       toast.error('Erro ao carregar clientes');
       console.error('Error loading clientes:', error);
@@ -123,12 +153,6 @@ const Clientes = () => {
     }));
   };
 
-  const filteredClientes = clientes.filter(cliente =>
-    cliente.nome.toLowerCase().includes(busca.toLowerCase()) ||
-    (cliente.email && cliente.email.toLowerCase().includes(busca.toLowerCase())) ||
-    (cliente.cpf_cnpj && cliente.cpf_cnpj.includes(busca))
-  );
-
   const handleTakePhoto = () => {
     // Request camera permission explicitly
     if (navigator.mediaDevices && navigator.mediaDevices.getUserMedia) {
@@ -370,7 +394,7 @@ const Clientes = () => {
 
       {/* Clientes Grid */}
       <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6">
-        {filteredClientes.map((cliente) => (
+        {clientes.map((cliente) => (
           <Card key={cliente.id} className="hover-lift shadow-soft border-0">
             <CardHeader className="pb-3">
               <div className="flex items-start justify-between">
@@ -442,7 +466,15 @@ const Clientes = () => {
         ))}
       </div>
 
-      {filteredClientes.length === 0 && (
+      {nextCursor && (
+        <div className="text-center">
+          <Button variant="outline" onClick={() => loadClientes(nextCursor)}>
+            Carregar mais
+          </Button>
+        </div>
+      )}
+
+      {clientes.length === 0 && (
         <div className="text-center py-12">
           <Users className="w-16 h-16 mx-auto text-slate-400 mb-4" />
           <h3 className="text-lg font-semibold text-slate-600 mb-2">
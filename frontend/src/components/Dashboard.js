@@ -60,7 +60,7 @@ const Dashboard = () => {
 
   const kpiCards = [
     {
-      title: 'Total de Vendas',
+      title: 'Vendas (30 dias)',
       value: `R$ ${dashboard?.total_vendas?.toLocaleString('pt-BR', { minimumFractionDigits: 2 }) || '0,00'}`,
       icon: DollarSign,
       change: '+12.5%',
@@ -68,7 +68,7 @@ const Dashboard = () => {
       color: 'emerald'
     },
     {
-      title: 'Total de Despesas',
+      title: 'Despesas (30 dias)',
       value: `R$ ${dashboard?.total_despesas?.toLocaleString('pt-BR', { minimumFractionDigits: 2 }) || '0,00'}`,
       icon: ArrowDownRight,
       change: '+8.2%',
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useAuth } from '../App';
 import { Card, CardContent, CardHeader, CardTitle } from './ui/card';
 import { Button } from './ui/button';
@@ -19,11 +19,16 @@ import {
 } from 'lucide-react';
 import { toast } from 'sonner';
 
+const PAGE_SIZE = 30;
+
 const Empresas = () => {
   const { api, user } = useAuth();
   const [empresas, setEmpresas] = useState([]);
+  const [resumo, setResumo] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
   const [busca, setBusca] = useState('');
+  const buscaInicial = useRef(true);
   const [showDialog, setShowDialog] = useState(false);
   const [editingEmpresa, setEditingEmpresa] = useState(null);
   const [formData, setFormData] = useState({
@@ -43,10 +48,28 @@ const Empresas = () => {
     }
   }, [user]);
 
-  const loadEmpresas = async () => {
+  // Search runs on the server, shortly after the user stops typing
+  useEffect(() => {
+    if (buscaInicial.current) {
+      buscaInicial.current = false;
+      return;
+    }
+    const timer = setTimeout(() => loadEmpresas(), 300);
+    return () => clearTimeout(timer);
+  }, [busca]);
+
+  const loadEmpresas = async (cursor = null) => {
     try {
-      const response = await api.get('/super-admin/tenants');
-      setEmpresas(response.data);
+      const params = { limit: PAGE_SIZE };
+      if (busca.trim()) params.q = busca.trim();
+      if (cursor) params.cursor = cursor;
+      const [response, dashboard] = await Promise.all([
+        api.get('/super-admin/tenants', { params }),
+        cursor ? Promise.resolve(null) : api.get('/super-admin/dashboard')
+      ]);
+      setEmpresas(prev => (cursor ? [...prev, ...response.data] : response.data));
+      setNextCursor(response.headers['x-next-cursor'] || null);
+      if (dashboard) setResumo(dashboard.data);
     } catch (error) {
       toast.error('Erro ao carregar empresas');
       console.error('Error loading empresas:', error);
@@ -111,12 +134,6 @@ const Empresas = () => {
     }));
   };
 
-  const filteredEmpresas = empresas.filter(empresa =>
-    empresa.company_name.toLowerCase().includes(busca.toLowerCase()) ||
-    empresa.subdomain.toLowerCase().includes(busca.toLowerCase()) ||
-    (empresa.cnpj && empresa.cnpj.includes(busca))
-  );
-
   const getStatusColor = (isActive) => {
     return isActive ? 'bg-emerald-50 text-emerald-700 border-emerald-200' : 'bg-red-50 text-red-700 border-red-200';
   };
@@ -322,7 +339,7 @@ const Empresas = () => {
           <div className="relative">
             <Search className="absolute left-3 top-1/2 transform -translate-y-1/2 text-slate-400 w-5 h-5" />
             <Input
-              placeholder="Buscar empresas por nome, subdomínio ou CNPJ..."
+              placeholder="Buscar empresas por nome, subdomínio, CNPJ ou email..."
               value={busca}
               onChange={(e) => setBusca(e.target.value)}
               className="pl-10"
@@ -340,7 +357,7 @@ const Empresas = () => {
                 <Building2 className="w-6 h-6 text-blue-600" />
               </div>
               <div>
-                <p className="text-2xl font-bold text-slate-800">{empresas.length}</p>
+                <p className="text-2xl font-bold text-slate-800">{resumo?.total_tenants ?? 0}</p>
                 <p className="text-sm text-slate-600">Total de Empresas</p>
               </div>
             </div>
@@ -355,7 +372,7 @@ const Empresas = () => {
               </div>
               <div>
                 <p className="text-2xl font-bold text-slate-800">
-                  {empresas.filter(e => e.is_active).length}
+                  {resumo?.active_tenants ?? 0}
                 </p>
                 <p className="text-sm text-slate-600">Empresas Ativas</p>
               </div>
@@ -371,7 +388,7 @@ const Empresas = () => {
               </div>
               <div>
                 <p className="text-2xl font-bold text-slate-800">
-                  {empresas.filter(e => e.subscription_status === 'trial').length}
+                  {resumo?.trial_tenants ?? 0}
                 </p>
                 <p className="text-sm text-slate-600">Em Trial</p>
               </div>
@@ -387,9 +404,9 @@ const Empresas = () => {
               </div>
               <div>
                 <p className="text-2xl font-bold text-slate-800">
-                  {empresas.filter(e => e.plan === 'premium' || e.plan === 'enterprise').length}
+                  R$ {(resumo?.monthly_revenue ?? 0).toLocaleString('pt-BR', { minimumFractionDigits: 2 })}
                 </p>
-                <p className="text-sm text-slate-600">Planos Pagos</p>
+                <p className="text-sm text-slate-600">Receita Mensal</p>
               </div>
             </div>
           </CardContent>
@@ -398,7 +415,7 @@ const Empresas = () => {
 
       {/* Empresas Grid */}
       <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6">
-        {filteredEmpresas.map((empresa) => (
+        {empresas.map((empresa) => (
           <Card key={empresa.id} className="hover-lift shadow-soft border-0">
             <CardHeader className="pb-3">
               <div className="flex items-start justify-between">
@@ -448,7 +465,15 @@ const Empresas = () => {
         ))}
       </div>
 
-      {filteredEmpresas.length === 0 && (
+      {nextCursor && (
+        <div className="text-center">
+          <Button variant="outline" onClick={() => loadEmpresas(nextCursor)}>
+            Carregar mais
+          </Button>
+        </div>
+      )}
+
+      {empresas.length === 0 && (
         <div className="text-center py-12">
           <Building2 className="w-16 h-16 mx-auto text-slate-400 mb-4" />
           <h3 className="text-lg font-semibold text-slate-600 mb-2">
@@ -41,14 +41,10 @@ const POS = () => {
 
   const loadData = async () => {
     try {
-      const [produtosRes, servicosRes, clientesRes] = await Promise.all([
-        api.get('/produtos'),
-        api.get('/servicos'),
-        api.get('/clientes')
-      ]);
-      setProdutos(produtosRes.data);
-      setServicos(servicosRes.data);
-      setClientes(clientesRes.data);
+      const { data } = await api.get('/pos/bootstrap');
+      setProdutos(data.produtos);
+      setServicos(data.servicos);
+      setClientes(data.clientes);
     } catch (error) {
       toast.error('Erro ao carregar dados');
       console.error('Error loading data:', error);
@@ -135,6 +131,24 @@ const POS = () => {
     }
   };
 
+  // Barcode scanners type the code and press Enter
+  const lerCodigo = async (e) => {
+    if (e.key !== 'Enter' || !busca.trim()) return;
+    e.preventDefault();
+    try {
+      const { data } = await api.get('/produtos/lookup', { params: { codigo: busca.trim() } });
+      adicionarAoCarrinho(data, 'produto');
+      setBusca('');
+    } catch (error) {
+      if (error.response?.status === 404) {
+        toast.error('Produto não encontrado para este código');
+      } else {
+        toast.error('Erro ao buscar produto');
+        console.error('Error looking up product:', error);
+      }
+    }
+  };
+
   const calcularTotal = () => {
     return carrinho.reduce((total, item) => total + item.total, 0);
   };
@@ -169,9 +183,10 @@ const POS = () => {
               <div className="relative">
                 <Search className="absolute left-3 top-1/2 transform -translate-y-1/2 text-slate-400 w-5 h-5" />
                 <Input
-                  placeholder="Buscar produtos ou serviços..."
+                  placeholder="Buscar produtos ou serviços, ou ler código de barras..."
                   value={busca}
                   onChange={(e) => setBusca(e.target.value)}
+                  onKeyDown={lerCodigo}
                   className="pl-10"
                 />
               </div>
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useAuth } from '../App';
 import { Card, CardContent, CardHeader, CardTitle } from './ui/card';
 import { Button } from './ui/button';
@@ -20,11 +20,17 @@ import {
 } from 'lucide-react';
 import { toast } from 'sonner';
 
+const PAGE_SIZE = 30;
+
 const Produtos = () => {
   const { api } = useAuth();
   const [produtos, setProdutos] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
   const [busca, setBusca] = useState('');
+  const buscaInicial = useRef(true);
+  const buscaAtual = useRef('');
+  buscaAtual.current = busca.trim();
   const [showDialog, setShowDialog] = useState(false);
   const [editingProduto, setEditingProduto] = useState(null);
   const [formData, setFormData] = useState({
@@ -43,10 +49,39 @@ const Produtos = () => {
     loadProdutos();
   }, []);
 
-  const loadProdutos = async () => {
+  // Search runs on the server, shortly after the user stops typing
+  useEffect(() => {
+    if (buscaInicial.current) {
+      buscaInicial.current = false;
+      return;
+    }
+    const timer = setTimeout(() => loadProdutos(), 300);
+    return () => clearTimeout(timer);
+  }, [busca]);
+
+  const loadProdutos = async (cursor = null) => {
     try {
-      const response = await api.get('/produtos');
-      setProdutos(response.data);
+      const termo = busca.trim();
+      const params = { limit: PAGE_SIZE };
+      if (termo) {
+        // Start of the name, code or category, in name order
+        params.q = termo;
+        params.sort = 'nome';
+        params.order = 'asc';
+      }
+      if (cursor) params.cursor = cursor;
+      const [response, porCodigo] = await Promise.all([
+        api.get('/produtos', { params }),
+        // A typed or scanned code matches exactly
+        termo && !cursor ? api.get('/produtos', { params: { codigo: termo } }) : Promise.resolve(null)
+      ]);
+      // A later search term is already on its way
+      if (termo !== buscaAtual.current) return;
+      const encontrados = porCodigo
+        ? [...porCodigo.data, ...response.data.filter(produto => produto.codigo !== termo)]
+        : response.data;
+      setProdutos(prev => (cursor ? [...prev, ...encontrados] : encontrados));
+      setNextCursor(response.headers['x-next-cursor'] || null);
     } catch (error) {
       toast.error('Erro ao carregar produtos');
       console.error('Error loading produtos:', error);
@@ -138,12 +173,6 @@ const Produtos = () => {
     }));
   };
 
-  const filteredProdutos = produtos.filter(produto =>
-    produto.nome.toLowerCase().includes(busca.toLowerCase()) ||
-    (produto.codigo && produto.codigo.toLowerCase().includes(busca.toLowerCase())) ||
-    (produto.categoria && produto.categoria.toLowerCase().includes(busca.toLowerCase()))
-  );
-
   const getEstoqueStatus = (produto) => {
     if (produto.estoque_atual <= 0) return 'out';
     if (produto.estoque_atual <= produto.estoque_minimo) return 'low';
@@ -362,7 +391,7 @@ const Produtos = () => {
           <div className="relative">
             <Search className="absolute left-3 top-1/2 transform -translate-y-1/2 text-slate-400 w-5 h-5" />
             <Input
-              placeholder="Buscar produtos por nome, código ou categoria..."
+              placeholder="Buscar pelo início do nome, código ou categoria..."
               value={busca}
               onChange={(e) => setBusca(e.target.value)}
               className="pl-10"
@@ -438,7 +467,7 @@ const Produtos = () => {
 
       {/* Produtos Grid */}
       <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6">
-        {filteredProdutos.map((produto) => {
+        {produtos.map((produto) => {
           const estoqueStatus = getEstoqueStatus(produto);
           const margem = calcularMargem(produto.custo, produto.preco);
           
@@ -523,7 +552,15 @@ const Produtos = () => {
         })}
       </div>
 
-      {filteredProdutos.length === 0 && (
+      {nextCursor && (
+        <div className="text-center">
+          <Button variant="outline" onClick={() => loadProdutos(nextCursor)}>
+            Carregar mais
+          </Button>
+        </div>
+      )}
+
+      {produtos.length === 0 && (
         <div className="text-center py-12">
           <Package className="w-16 h-16 mx-auto text-slate-400 mb-4" />
           <h3 className="text-lg font-semibold text-slate-600 mb-2">
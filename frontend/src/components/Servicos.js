@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useAuth } from '../App';
 import { Card, CardContent, CardHeader, CardTitle } from './ui/card';
 import { Button } from './ui/button';
@@ -20,11 +20,17 @@ import {
 } from 'lucide-react';
 import { toast } from 'sonner';
 
+const PAGE_SIZE = 30;
+
 const Servicos = () => {
   const { api } = useAuth();
   const [servicos, setServicos] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
   const [busca, setBusca] = useState('');
+  const buscaInicial = useRef(true);
+  const buscaAtual = useRef('');
+  buscaAtual.current = busca.trim();
   const [showDialog, setShowDialog] = useState(false);
   const [editingServico, setEditingServico] = useState(null);
   const [formData, setFormData] = useState({
@@ -40,10 +46,32 @@ const Servicos = () => {
     loadServicos();
   }, []);
 
-  const loadServicos = async () => {
+  // Search runs on the server, shortly after the user stops typing
+  useEffect(() => {
+    if (buscaInicial.current) {
+      buscaInicial.current = false;
+      return;
+    }
+    const timer = setTimeout(() => loadServicos(), 300);
+    return () => clearTimeout(timer);
+  }, [busca]);
+
+  const loadServicos = async (cursor = null) => {
     try {
-      const response = await api.get('/servicos');
-      setServicos(response.data);
+      const termo = busca.trim();
+      const params = { limit: PAGE_SIZE };
+      if (termo) {
+        // Name prefix, in name order
+        params.nome = termo;
+        params.sort = 'nome';
+        params.order = 'asc';
+      }
+      if (cursor) params.cursor = cursor;
+      const response = await api.get('/servicos', { params });
+      // A later search term is already on its way
+      if (termo !== buscaAtual.current) return;
+      setServicos(prev => (cursor ? [...prev, ...response.data] : response.data));
+      setNextCursor(response.headers['x-next-cursor'] || null);
     } catch (error) {
       toast.error('Erro ao carregar serviços');
       console.error('Error loading servicos:', error);
@@ -135,11 +163,6 @@ const Servicos = () => {
     }));
   };
 
-  const filteredServicos = servicos.filter(servico =>
-    servico.nome.toLowerCase().includes(busca.toLowerCase()) ||
-    (servico.descricao && servico.descricao.toLowerCase().includes(busca.toLowerCase()))
-  );
-
   const formatDuracao = (minutos) => {
     const horas = Math.floor(minutos / 60);
     const mins = minutos % 60;
@@ -301,7 +324,7 @@ const Servicos = () => {
           <div className="relative">
             <Search className="absolute left-3 top-1/2 transform -translate-y-1/2 text-slate-400 w-5 h-5" />
             <Input
-              placeholder="Buscar serviços por nome ou descrição..."
+              placeholder="Buscar serviços pelo início do nome..."
               value={busca}
               onChange={(e) => setBusca(e.target.value)}
               className="pl-10"
@@ -361,7 +384,7 @@ const Servicos = () => {
 
       {/* Servicos Grid */}
       <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6">
-        {filteredServicos.map((servico) => (
+        {servicos.map((servico) => (
           <Card key={servico.id} className="hover-lift shadow-soft border-0">
             <CardHeader className="pb-3">
               <div className="flex items-start justify-between">
@@ -430,7 +453,15 @@ const Servicos = () => {
         ))}
       </div>
 
-      {filteredServicos.length === 0 && (
+      {nextCursor && (
+        <div className="text-center">
+          <Button variant="outline" onClick={() => loadServicos(nextCursor)}>
+            Carregar mais
+          </Button>
+        </div>
+      )}
+
+      {servicos.length === 0 && (
         <div className="text-center py-12">
           <Wrench className="w-16 h-16 mx-auto text-slate-400 mb-4" />
           <h3 className="text-lg font-semibold text-slate-600 mb-2">
@@ -22,10 +22,13 @@ import {
 } from 'lucide-react';
 import { toast } from 'sonner';
 
+const PAGE_SIZE = 30;
+
 const SuperAdminDashboard = () => {
   const { api } = useAuth();
   const [dashboard, setDashboard] = useState(null);
   const [tenants, setTenants] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
   const [showCreateTenant, setShowCreateTenant] = useState(false);
   const [formData, setFormData] = useState({
@@ -43,14 +46,17 @@ const SuperAdminDashboard = () => {
     loadData();
   }, []);
 
-  const loadData = async () => {
+  const loadData = async (cursor = null) => {
     try {
+      const params = { limit: PAGE_SIZE };
+      if (cursor) params.cursor = cursor;
       const [dashboardRes, tenantsRes] = await Promise.all([
-        api.get('/super-admin/dashboard'),
-        api.get('/super-admin/tenants')
+        cursor ? Promise.resolve(null) : api.get('/super-admin/dashboard'),
+        api.get('/super-admin/tenants', { params })
       ]);
-      setDashboard(dashboardRes.data);
-      setTenants(tenantsRes.data);
+      if (dashboardRes) setDashboard(dashboardRes.data);
+      setTenants(prev => (cursor ? [...prev, ...tenantsRes.data] : tenantsRes.data));
+      setNextCursor(tenantsRes.headers['x-next-cursor'] || null);
     } catch (error) {
       toast.error('Erro ao carregar dados do super admin');
       console.error('Error loading super admin data:', error);
@@ -405,6 +411,14 @@ const SuperAdminDashboard = () => {
               </div>
             ))}
             
+            {nextCursor && (
+              <div className="text-center">
+                <Button variant="outline" onClick={() => loadData(nextCursor)}>
+                  Carregar mais
+                </Button>
+              </div>
+            )}
+            
             {tenants.length === 0 && (
               <div className="text-center py-12">
                 <Building2 className="w-16 h-16 mx-auto text-slate-400 mb-4" />
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useAuth } from '../App';
 import { Card, CardContent, CardHeader, CardTitle } from './ui/card';
 import { Button } from './ui/button';
@@ -21,11 +21,15 @@ import {
 } from 'lucide-react';
 import { toast } from 'sonner';
 
+const PAGE_SIZE = 30;
+
 const Usuarios = () => {
   const { api, user } = useAuth();
   const [usuarios, setUsuarios] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
   const [busca, setBusca] = useState('');
+  const buscaInicial = useRef(true);
   const [showDialog, setShowDialog] = useState(false);
   const [editingUsuario, setEditingUsuario] = useState(null);
   const [formData, setFormData] = useState({
@@ -41,10 +45,24 @@ const Usuarios = () => {
     }
   }, [user]);
 
-  const loadUsuarios = async () => {
+  // Search runs on the server, shortly after the user stops typing
+  useEffect(() => {
+    if (buscaInicial.current) {
+      buscaInicial.current = false;
+      return;
+    }
+    const timer = setTimeout(() => loadUsuarios(), 300);
+    return () => clearTimeout(timer);
+  }, [busca]);
+
+  const loadUsuarios = async (cursor = null) => {
     try {
-      const response = await api.get('/users');
-      setUsuarios(response.data);
+      const params = { limit: PAGE_SIZE };
+      if (busca.trim()) params.q = busca.trim();
+      if (cursor) params.cursor = cursor;
+      const response = await api.get('/users', { params });
+      setUsuarios(prev => (cursor ? [...prev, ...response.data] : response.data));
+      setNextCursor(response.headers['x-next-cursor'] || null);
     } catch (error) {
       toast.error('Erro ao carregar usuários');
       console.error('Error loading usuarios:', error);
@@ -129,12 +147,6 @@ const Usuarios = () => {
     }));
   };
 
-  const filteredUsuarios = usuarios.filter(usuario =>
-    usuario.name.toLowerCase().includes(busca.toLowerCase()) ||
-    usuario.email.toLowerCase().includes(busca.toLowerCase()) ||
-    usuario.role.toLowerCase().includes(busca.toLowerCase())
-  );
-
   const getRoleColor = (role) => {
     switch (role) {
       case 'super_admin': return 'bg-red-50 text-red-700 border-red-200';
@@ -305,7 +317,7 @@ const Usuarios = () => {
           <div className="relative">
             <Search className="absolute left-3 top-1/2 transform -translate-y-1/2 text-slate-400 w-5 h-5" />
             <Input
-              placeholder="Buscar usuários por nome, email ou função..."
+              placeholder="Buscar usuários por nome ou email..."
               value={busca}
               onChange={(e) => setBusca(e.target.value)}
               className="pl-10"
@@ -381,7 +393,7 @@ const Usuarios = () => {
 
       {/* Usuarios Grid */}
       <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6">
-        {filteredUsuarios.map((usuario) => (
+        {usuarios.map((usuario) => (
           <Card key={usuario.id} className="hover-lift shadow-soft border-0">
             <CardHeader className="pb-3">
               <div className="flex items-start justify-between">
@@ -453,7 +465,15 @@ const Usuarios = () => {
         ))}
       </div>
 
-      {filteredUsuarios.length === 0 && (
+      {nextCursor && (
+        <div className="text-center">
+          <Button variant="outline" onClick={() => loadUsuarios(nextCursor)}>
+            Carregar mais
+          </Button>
+        </div>
+      )}
+
+      {usuarios.length === 0 && (
         <div className="text-center py-12">
           <Users className="w-16 h-16 mx-auto text-slate-400 mb-4" />
           <h3 className="text-lg font-semibold text-slate-600 mb-2">